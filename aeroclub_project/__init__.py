@@ -0,0 +1,4 @@
+# Application Celery chargee avec Django (shared_task, .delay depuis les vues)
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
@@ -0,0 +1,62 @@
+"""
+Application Celery du projet.
+
+Worker et planificateur :
+    celery -A aeroclub_project worker -l info
+    celery -A aeroclub_project beat -l info
+
+Les taches sont declarees dans le module tasks.py de chaque application ;
+la configuration est lue dans les settings (prefixe CELERY_).
+"""
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_init
+
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "aeroclub_project.settings")
+
+app = Celery("aeroclub_project")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
+
+
+@worker_init.connect
+def refuse_unshared_cache(**kwargs):
+    """Pas de worker sans cache partage (verrous et jobs invisibles)."""
+    from django.core.exceptions import ImproperlyConfigured
+    from core.checks import unshared_cache_error
+
+    message = unshared_cache_error()
+    if message:
+        raise ImproperlyConfigured(message)
+
+
+# ============================================================
+# PLANIFICATION (CELERY BEAT)
+# ============================================================
+
+app.conf.beat_schedule = {
+    # Meteo rafraichie avant l'expiration du cache METAR (5 minutes)
+    "prefetch-weather": {
+        "task": "meteo.tasks.prefetch_weather",
+        "schedule": 4 * 60,
+    },
+    "send-alert-emails": {
+        "task": "alerts.tasks.send_alert_emails",
+        "schedule": 15 * 60,
+    },
+    "expire-documents": {
+        "task": "members.tasks.expire_documents",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "run-alert-checks": {
+        "task": "alerts.tasks.run_alert_checks",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "purge-pdf-exports": {
+        "task": "exports.tasks.purge_pdf_exports",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -37,6 +38,8 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "rest_framework",
+    "django_filters",
     # Local Apps
     "core",
     "members",
@@ -47,9 +50,11 @@ INSTALLED_APPS = [
     "alerts",
     "exports",
     "meteo",
+    "api",
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestStatsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,11 +87,57 @@ WSGI_APPLICATION = "aeroclub_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# Profil choisi par DATABASE_PROFILE :
+# - sqlite (defaut) : WAL (lectures concurrentes des ecritures), transactions
+#   IMMEDIATE (verrou d'ecriture pris des le debut : attente au lieu de
+#   "database is locked"), attente de verrou de 20 s, mmap et tables
+#   temporaires en memoire
+# - sqlite-basic : reglages SQLite par defaut de Django (comparaison)
+# - postgresql : connexions persistantes verifiees (necessite psycopg)
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "sqlite")
+
+SQLITE_PATH = os.environ.get("SQLITE_PATH", str(BASE_DIR / "db.sqlite3"))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 134217728,  # 128 Mo
+    "temp_store": "MEMORY",
+    "cache_size": -20000,  # 20 Mo
+}
+
+DATABASE_PROFILES = {
+    "sqlite": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "NAME": SQLITE_PATH,
+        "OPTIONS": {
+            "init_command": "".join(f"PRAGMA {name}={value};" for name, value in SQLITE_PRAGMAS.items()),
+            "transaction_mode": "IMMEDIATE",
+            # Attente d'un verrou (secondes), seul reglage du busy timeout :
+            # un PRAGMA busy_timeout dans init_command le remplacerait
+            "timeout": 20,
+        },
+    },
+    "sqlite-basic": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": SQLITE_PATH,
+    },
+    "postgresql": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "aeroclub"),
+        "USER": os.environ.get("POSTGRES_USER", "aeroclub"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.environ.get("POSTGRES_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "connect_timeout": 5,
+        },
+    },
+}
+
+DATABASES = {
+    "default": DATABASE_PROFILES[DATABASE_PROFILE],
 }
 
 
@@ -141,3 +192,93 @@ LOGIN_URL = "/accounts/login/"  # Page de connexion
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Cache (core.cache) : CACHE_BACKEND = locmem (defaut, un cache par processus),
+# file (partage entre les workers d'une machine) ou redis (REDIS_URL)
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "aeroclub",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+CACHES = {
+    "default": {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        "KEY_PREFIX": "aeroclub",
+        "TIMEOUT": 300,
+    },
+}
+
+# Instrumentation des requetes (core.instrumentation)
+REQUEST_STATS_ENABLED = True
+REQUEST_STATS_SLOW_MS = 500  # Requetes plus lentes journalisees avec leurs requetes SQL
+
+# Jeton signe des QR codes membres : anciennete maximale acceptee au scan
+MEMBER_QR_TOKEN_MAX_AGE_DAYS = 400
+
+# Documents membres : taille maximale d'un fichier depose, miniatures en arriere-plan
+# (tache Celery members.tasks.generate_document_thumbnail)
+MEMBER_DOCUMENT_MAX_SIZE = 10 * 1024 * 1024
+MEMBER_DOCUMENT_THUMBNAILS_ASYNC = True
+
+# Taches Celery (aeroclub_project/celery.py). Les verrous des taches et le
+# suivi des exports PDF passent par le cache : avec des workers, CACHE_BACKEND
+# doit etre partage (file ou redis), sinon le demarrage est refuse
+# (core.checks).
+# CELERY_TASK_ALWAYS_EAGER=1 : taches executees dans le processus appelant
+# (tests, developpement sans broker) ; actif par defaut avec le cache locmem
+CELERY_TASK_ALWAYS_EAGER = os.environ.get(
+    "CELERY_TASK_ALWAYS_EAGER", "1" if CACHE_BACKEND == "locmem" else "0"
+) == "1"
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_BROKER_URL = os.environ.get(
+    "CELERY_BROKER_URL", "memory://" if CELERY_TASK_ALWAYS_EAGER else "redis://127.0.0.1:6379/0"
+)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_TIME_LIMIT = 30 * 60
+
+# Emails (alertes) : console par defaut, SMTP en production
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "Aeroclub <noreply@aeroclub.fr>")
+
+# Aerodromes dont la meteo est prechargee en arriere-plan
+WEATHER_PREFETCH_STATIONS = ["LFNE", "LFPT"]
+
+# Continuite de l'horametre (fleet.meters) : un chevauchement entre deux vols
+# est toujours refuse ; un trou (heures non saisies) est signale, ou refuse
+# si FLIGHT_METER_REJECT_GAPS=1
+FLIGHT_METER_REJECT_GAPS = os.environ.get("FLIGHT_METER_REJECT_GAPS", "0") == "1"
+
+# Plage quotidienne ouverte a la location (heures locales) : base des heures
+# disponibles du tableau d'utilisation de la flotte (fleet.analytics)
+FLEET_OPERATING_HOURS = (8, 20)
+
+# API REST (application api) : lecture seule, session (navigateur) ou JWT
+# (application mobile), pagination par curseur definie par vue
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+    ],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
+    "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "rest_framework.throttling.AnonRateThrottle",
+        "rest_framework.throttling.UserRateThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {"anon": "60/hour", "user": "2000/hour", "sync": "120/hour"},
+}
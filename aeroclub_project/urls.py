@@ -31,6 +31,7 @@ urlpatterns = [
     path("alerts/", include("alerts.urls")),
     path("exports/", include("exports.urls")),
     path("meteo/", include("meteo.urls")),
+    path("api/", include("api.urls")),
     path("", include("core.urls")),
 ]
 
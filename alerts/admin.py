@@ -6,6 +6,8 @@ from .models import Alert, AlertConfiguration
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
     list_display = ['severity_badge', 'title', 'user', 'alert_type', 'status', 'expires_at', 'created_at']
+    list_select_related = ['user']
+    show_full_result_count = False
     list_filter = ['severity', 'alert_type', 'status', 'created_at']
     search_fields = ['title', 'message', 'user__username', 'user__last_name']
     readonly_fields = ['created_at', 'acknowledged_at', 'resolved_at', 'unique_key']
@@ -1,19 +1,27 @@
 """
 Service de génération et gestion des alertes automatiques.
-À exécuter périodiquement (via Celery, cron, ou commande Django).
+Exécuté chaque nuit par la tâche Celery alerts.tasks.run_alert_checks
+(ou la commande check_alerts).
 """
 from datetime import date, timedelta
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.db.models import Q
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
 
+from core.cache import CacheNamespace
 from .models import Alert, AlertConfiguration
 from members.models import Member
+from fleet.forecast import forecast_deadlines
 from fleet.models import Aircraft, MaintenanceDeadline
 
 
+# Résumé des alertes par utilisateur (widget, API) : invalidé par les signaux
+# d'Alert, ou en entier après une création en masse
+ALERTS_CACHE = CacheNamespace('alerts', clearable=True)
+ALERTS_SUMMARY_TTL = 300
+
 # Seuils par défaut si pas de configuration
 DEFAULT_THRESHOLDS = {
     'days_info': 60,
@@ -56,6 +64,15 @@ def create_or_update_alert(unique_key, **kwargs):
     return alert, created
 
 
+def medical_alert_key(user_id, medical_validity):
+    """
+    Clé d'unicité de l'alerte médicale : une par utilisateur et mois
+    d'échéance. Partagée avec l'expiration des documents médicaux
+    (members.documents) pour ne pas doubler l'alerte.
+    """
+    return f"medical_{user_id}_{medical_validity.strftime('%Y-%m')}"
+
+
 def check_member_medical_alerts():
     """
     Vérifie les certificats médicaux de tous les membres.
@@ -81,7 +98,7 @@ def check_member_medical_alerts():
         severity = get_severity_for_days(days_remaining, config)
 
         if severity:
-            unique_key = f"medical_{member.user.id}_{member.medical_validity.strftime('%Y-%m')}"
+            unique_key = medical_alert_key(member.user.id, member.medical_validity)
 
             if days_remaining <= 0:
                 title = f"Certificat médical EXPIRÉ"
@@ -117,24 +134,24 @@ def check_member_license_alerts():
     threshold_date = today + timedelta(days=days_info)
 
     members = Member.objects.filter(
-        Q(top_validity__isnull=False) &
-        Q(top_validity__lte=threshold_date)
+        Q(sep_validity__isnull=False) &
+        Q(sep_validity__lte=threshold_date)
     ).select_related('user')
 
     alerts_created = 0
     for member in members:
-        days_remaining = (member.top_validity - today).days
+        days_remaining = (member.sep_validity - today).days
         severity = get_severity_for_days(days_remaining, config)
 
         if severity:
-            unique_key = f"license_{member.user.id}_{member.top_validity.strftime('%Y-%m')}"
+            unique_key = f"license_{member.user.id}_{member.sep_validity.strftime('%Y-%m')}"
 
             if days_remaining <= 0:
                 title = f"Licence/SEP EXPIRÉE"
-                message = f"Votre licence a expiré le {member.top_validity.strftime('%d/%m/%Y')}. Contactez un instructeur pour un vol de prorogation."
+                message = f"Votre licence a expiré le {member.sep_validity.strftime('%d/%m/%Y')}. Contactez un instructeur pour un vol de prorogation."
             else:
                 title = f"Licence expire dans {days_remaining} jour(s)"
-                message = f"Votre licence expire le {member.top_validity.strftime('%d/%m/%Y')}. Planifiez un vol de prorogation avec un instructeur."
+                message = f"Votre licence expire le {member.sep_validity.strftime('%d/%m/%Y')}. Planifiez un vol de prorogation avec un instructeur."
 
             alert, created = create_or_update_alert(
                 unique_key=unique_key,
@@ -143,7 +160,7 @@ def check_member_license_alerts():
                 severity=severity,
                 title=title,
                 message=message,
-                expires_at=member.top_validity,
+                expires_at=member.sep_validity,
             )
             if created:
                 alerts_created += 1
@@ -236,39 +253,63 @@ def check_member_balance_alerts():
     return alerts_created
 
 
+def _most_severe(*severities):
+    """Sévérité la plus haute (None ignorées)."""
+    order = [level for level, _ in Alert.SEVERITY_LEVELS]
+    found = [severity for severity in severities if severity]
+    return max(found, key=order.index) if found else None
+
+
+def _severity_for_hours(hours_remaining):
+    """Seuils horaires fixes, faute d'historique d'usage pour estimer une date."""
+    if hours_remaining <= 0:
+        return 'BLOCKING'
+    elif hours_remaining <= 5:
+        return 'CRITICAL'
+    elif hours_remaining <= 10:
+        return 'WARNING'
+    elif hours_remaining <= 20:
+        return 'INFO'
+    return None
+
+
 def check_aircraft_maintenance_alerts():
     """
     Vérifie les échéances de maintenance des avions.
+
+    Une butée horaire est convertie en date estimée d'après l'usage récent
+    de l'avion et ses réservations confirmées (fleet.forecast), puis classée
+    avec les mêmes seuils en jours qu'une butée calendaire.
     """
-    today = date.today()
+    today = timezone.localdate()
     config = AlertConfiguration.objects.filter(alert_type='MAINTENANCE', is_active=True).first()
 
+    deadlines = list(MaintenanceDeadline.objects.filter(is_completed=False).select_related('aircraft'))
+    forecasts = forecast_deadlines(deadlines, today)
+
     alerts_created = 0
 
-    for deadline in MaintenanceDeadline.objects.select_related('aircraft').all():
+    for deadline in deadlines:
         aircraft = deadline.aircraft
+        forecast = forecasts[deadline.id]
         severity = None
         days_remaining = None
-        hours_remaining = None
+        hours_remaining = forecast['hours_remaining']
+        projected_date = forecast['projected_date']
 
         # Vérification butée calendaire
         if deadline.due_at_date:
             days_remaining = (deadline.due_at_date - today).days
             severity = get_severity_for_days(days_remaining, config)
 
-        # Vérification butée horaire
-        if deadline.due_at_hours:
-            hours_remaining = float(deadline.due_at_hours - aircraft.current_hours)
-
-            # Convertir en "équivalent jours" pour la sévérité (10h de vol = ~7 jours en moyenne)
-            if hours_remaining <= 0:
-                severity = 'BLOCKING'
-            elif hours_remaining <= 5:
-                severity = 'CRITICAL' if severity != 'BLOCKING' else severity
-            elif hours_remaining <= 10:
-                severity = 'WARNING' if severity not in ['BLOCKING', 'CRITICAL'] else severity
-            elif hours_remaining <= 20:
-                severity = 'INFO' if severity is None else severity
+        # Vérification butée horaire : date estimée (au plus tôt demain tant
+        # qu'il reste des heures), seuils fixes sans historique d'usage
+        if hours_remaining is not None:
+            if hours_remaining <= 0 or projected_date is None:
+                severity = _most_severe(severity, _severity_for_hours(hours_remaining))
+            else:
+                projected_days = max((projected_date - today).days, 1)
+                severity = _most_severe(severity, get_severity_for_days(projected_days, config))
 
         if severity:
             unique_key = f"maintenance_{aircraft.id}_{deadline.id}"
@@ -286,6 +327,11 @@ def check_aircraft_maintenance_alerts():
                     parts.append(f"Butée horaire dépassée de {-hours_remaining:.1f}h")
                 else:
                     parts.append(f"{hours_remaining:.1f}h avant butée horaire ({deadline.due_at_hours}h)")
+                    if projected_date:
+                        parts.append(
+                            f"Butée horaire estimée le {projected_date.strftime('%d/%m/%Y')} "
+                            f"(usage {forecast['daily_rate']:.1f}h/jour et réservations confirmées)"
+                        )
 
             if severity == 'BLOCKING':
                 title = f"⛔ {aircraft.registration} - {deadline.title} - BLOQUÉ"
@@ -352,7 +398,7 @@ def resolve_outdated_alerts():
         if alert.user:
             try:
                 member = alert.user.member_profile
-                if member.top_validity and member.top_validity > today:
+                if member.sep_validity and member.sep_validity > today:
                     alert.resolve()
                     resolved_count += 1
             except Member.DoesNotExist:
@@ -383,6 +429,63 @@ def resolve_outdated_alerts():
     return resolved_count
 
 
+# ============================================================
+# ENVOI DES EMAILS
+# ============================================================
+
+EMAIL_BATCH_SIZE = 200
+
+
+def send_alert_emails(limit=EMAIL_BATCH_SIZE):
+    """
+    Envoie par email les alertes actives pas encore notifiées, pour les types
+    dont la configuration prévoit l'envoi (tous par défaut).
+
+    Chaque alerte est réservée (email_sent passé à True par une mise à jour
+    conditionnelle) avant l'envoi : deux exécutions concurrentes ne peuvent
+    pas envoyer le même email. En cas d'échec, la réservation est annulée et
+    l'alerte sera reprise au passage suivant.
+
+    Returns:
+        Nombre d'emails envoyés
+    """
+    disabled_types = list(
+        AlertConfiguration.objects.filter(send_email=False).values_list('alert_type', flat=True)
+    )
+    alerts = list(
+        Alert.objects.filter(status='ACTIVE', email_sent=False, user__isnull=False)
+        .exclude(user__email='')
+        .exclude(alert_type__in=disabled_types)
+        .select_related('user')
+        .order_by('created_at')[:limit]
+    )
+
+    sent = 0
+    connection = get_connection()
+    for alert in alerts:
+        claimed = Alert.objects.filter(pk=alert.pk, email_sent=False).update(
+            email_sent=True, email_sent_at=timezone.now(),
+        )
+        if not claimed:
+            continue
+
+        message = EmailMessage(
+            subject=f"[Aéroclub] {alert.title}",
+            body=alert.message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[alert.user.email],
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception:
+            Alert.objects.filter(pk=alert.pk).update(email_sent=False, email_sent_at=None)
+            raise
+        sent += 1
+
+    return sent
+
+
 def get_user_active_alerts(user):
     """
     Récupère les alertes actives pour un utilisateur.
@@ -409,3 +512,38 @@ def has_blocking_alerts(user):
     Vérifie si l'utilisateur a des alertes bloquantes.
     """
     return get_blocking_alerts(user).exists()
+
+
+def get_user_alerts_summary(user):
+    """
+    Résumé des alertes actives d'un utilisateur (compteurs + 10 premières),
+    mis en cache par utilisateur.
+    """
+    return ALERTS_CACHE.get_or_set(f"summary:{user.pk}", lambda: _build_alerts_summary(user), ALERTS_SUMMARY_TTL)
+
+
+def _build_alerts_summary(user):
+    alerts = get_user_active_alerts(user)
+    return {
+        'count': alerts.count(),
+        'blocking_count': alerts.filter(severity='BLOCKING').count(),
+        'alerts': [
+            {
+                'id': a.id,
+                'type': a.alert_type,
+                'severity': a.severity,
+                'title': a.title,
+                'message': a.message,
+                'days_until_expiry': a.days_until_expiry,
+            }
+            for a in alerts[:10]  # Limiter à 10 pour le widget
+        ]
+    }
+
+
+def invalidate_alerts_cache(user_id=None):
+    """Invalide le résumé d'un utilisateur, ou de tous (alerte globale, création en masse)."""
+    if user_id:
+        ALERTS_CACHE.delete(f"summary:{user_id}")
+    else:
+        ALERTS_CACHE.clear()
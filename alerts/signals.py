@@ -0,0 +1,14 @@
+"""
+Invalidation du résumé des alertes en cache (widget / API).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Alert
+from .services import invalidate_alerts_cache
+
+
+@receiver([post_save, post_delete], sender=Alert)
+def alert_changed(sender, instance, **kwargs):
+    # Alerte globale (sans destinataire) : visible par tous
+    invalidate_alerts_cache(instance.user_id)
@@ -0,0 +1,26 @@
+"""
+Tâches Celery des alertes (planifiées dans aeroclub_project/celery.py).
+"""
+from celery import shared_task
+
+from core.tasks import single_instance
+from . import services
+
+
+@shared_task
+@single_instance('alerts:checks', timeout=30 * 60)
+def run_alert_checks():
+    """Vérification quotidienne des échéances, puis envoi des emails."""
+    total, results = services.run_all_checks()
+    # Alertes créées / résolues une par une : le résumé de chaque
+    # utilisateur concerné est déjà invalidé par les signaux
+    resolved = services.resolve_outdated_alerts()
+    send_alert_emails.delay()
+    return {'created': total, 'resolved': resolved, **results}
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=60, max_retries=5)
+@single_instance('alerts:emails', timeout=15 * 60)
+def send_alert_emails():
+    """Envoi des emails des alertes actives non encore notifiées."""
+    return {'sent': services.send_alert_emails()}
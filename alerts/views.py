@@ -6,7 +6,9 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 
 from .models import Alert
-from .services import get_user_active_alerts, run_all_checks, resolve_outdated_alerts
+from .services import (
+    get_user_active_alerts, get_user_alerts_summary, run_all_checks, resolve_outdated_alerts,
+)
 
 
 @login_required
@@ -88,21 +90,4 @@ def run_checks(request):
 @login_required
 def alerts_api(request):
     """API JSON pour récupérer les alertes (HTMX, widgets, etc.)."""
-    alerts = get_user_active_alerts(request.user)
-
-    data = {
-        'count': alerts.count(),
-        'blocking_count': alerts.filter(severity='BLOCKING').count(),
-        'alerts': [
-            {
-                'id': a.id,
-                'type': a.alert_type,
-                'severity': a.severity,
-                'title': a.title,
-                'message': a.message,
-                'days_until_expiry': a.days_until_expiry,
-            }
-            for a in alerts[:10]  # Limiter à 10 pour le widget
-        ]
-    }
-    return JsonResponse(data)
+    return JsonResponse(get_user_alerts_summary(request.user))
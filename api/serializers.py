@@ -0,0 +1,174 @@
+"""
+Serialiseurs de l'API REST (lecture seule).
+
+Champs partiels : ?fields=id,date,aircraft_registration ne renvoie que les
+champs demandes (SparseFieldsetMixin) ; les vues n'effectuent alors que les
+jointures utiles a ces champs (related_fields).
+"""
+from rest_framework import serializers
+
+from alerts.models import Alert
+from finance.models import Transaction
+from fleet.models import Aircraft, Flight
+from members.models import Member
+from planning.models import Reservation
+
+
+def requested_fields(request):
+    """Ensemble des champs demandes par ?fields=, None si tous."""
+    if request is None:
+        return None
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """Retire les champs non demandes par ?fields= (champs inconnus ignores)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+def _full_name(user):
+    return f"{user.first_name} {user.last_name}".strip() or user.username
+
+
+# ============================================================
+# FLOTTE
+# ============================================================
+
+class AircraftSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Annote par AircraftQuerySet.with_maintenance_status()
+    airworthy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Aircraft
+        fields = [
+            'id', 'registration', 'model_name', 'manufacturer', 'category', 'num_seats',
+            'fuel_type', 'fuel_consumption', 'current_hours', 'engine_hours', 'engine_tsoh',
+            'engine_tbo', 'cycles_count', 'hourly_rate', 'hourly_rate_instruction', 'status',
+            'airworthy', 'updated_at',
+        ]
+
+    def get_airworthy(self, aircraft):
+        return aircraft.status == 'AVAILABLE' and not aircraft.has_overdue_maintenance
+
+
+class FlightSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    aircraft_registration = serializers.CharField(source='aircraft.registration')
+    pilot_name = serializers.SerializerMethodField()
+    copilot_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Flight
+        fields = [
+            'id', 'aircraft', 'aircraft_registration', 'pilot', 'pilot_name', 'copilot',
+            'copilot_name', 'date', 'flight_type', 'departure_airport', 'arrival_airport', 'route',
+            'hour_meter_start', 'hour_meter_end', 'duration', 'block_off', 'takeoff_time',
+            'landing_time', 'block_on', 'landings_count', 'landings_day', 'landings_night',
+            'fuel_added', 'oil_added', 'complaints', 'complaint_resolved', 'passengers_count',
+            'cost', 'updated_at',
+        ]
+
+    def get_pilot_name(self, flight):
+        return _full_name(flight.pilot)
+
+    def get_copilot_name(self, flight):
+        return _full_name(flight.copilot) if flight.copilot_id else None
+
+
+class TechLogEntrySerializer(serializers.ModelSerializer):
+    """
+    Vol saisi hors ligne (synchronisation, voir fleet.sync). Avion et second
+    pilote sont des identifiants verifies en une requete pour tout le lot.
+    """
+    client_uuid = serializers.UUIDField()
+    aircraft_id = serializers.IntegerField()
+    copilot_id = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Flight
+        fields = [
+            'client_uuid', 'aircraft_id', 'copilot_id', 'date', 'flight_type', 'departure_airport',
+            'arrival_airport', 'route', 'hour_meter_start', 'hour_meter_end', 'block_off',
+            'takeoff_time', 'landing_time', 'block_on', 'landings_count', 'landings_day',
+            'landings_night', 'fuel_added', 'oil_added', 'complaints', 'passengers_count',
+        ]
+
+
+class TechLogSyncSerializer(serializers.Serializer):
+    sync_token = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    flights = TechLogEntrySerializer(many=True, required=False)
+
+
+# ============================================================
+# PLANNING
+# ============================================================
+
+class ReservationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    aircraft_registration = serializers.CharField(source='aircraft.registration')
+    pilot_name = serializers.SerializerMethodField()
+    instructor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Reservation
+        fields = [
+            'id', 'aircraft', 'aircraft_registration', 'user', 'pilot_name', 'start_time',
+            'end_time', 'title', 'destination', 'is_instruction', 'instructor', 'instructor_name',
+            'passengers_count', 'status', 'updated_at',
+        ]
+
+    def get_pilot_name(self, reservation):
+        return _full_name(reservation.user)
+
+    def get_instructor_name(self, reservation):
+        return _full_name(reservation.instructor) if reservation.instructor_id else None
+
+
+# ============================================================
+# MEMBRES
+# ============================================================
+
+class MemberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    name = serializers.CharField(source='full_name')
+    qualifications = serializers.ListField(source='qualifications_list', child=serializers.CharField())
+    # Annotes par MemberQuerySet.with_flight_stats()
+    last_flight_date = serializers.DateField()
+    landings_last_90_days = serializers.IntegerField()
+    hours_last_12_months = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        model = Member
+        fields = [
+            'id', 'name', 'member_number', 'ffa_number', 'license_type', 'license_number',
+            'is_student', 'medical_validity', 'sep_validity', 'club_subscription_validity',
+            'ffa_subscription_validity', 'insurance_validity', 'account_balance', 'qualifications',
+            'last_flight_date', 'landings_last_90_days', 'hours_last_12_months',
+        ]
+
+
+# ============================================================
+# ALERTES ET FINANCES
+# ============================================================
+
+class AlertSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Alert
+        fields = [
+            'id', 'alert_type', 'severity', 'status', 'title', 'message', 'created_at',
+            'expires_at', 'related_aircraft', 'user',
+        ]
+
+
+class TransactionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    aircraft_registration = serializers.CharField(source='aircraft.registration', default=None)
+
+    class Meta:
+        model = Transaction
+        fields = ['id', 'date', 'type', 'amount', 'description', 'aircraft', 'aircraft_registration', 'user']
@@ -0,0 +1,187 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from alerts.models import Alert
+from finance.models import Transaction
+from fleet.models import Aircraft, Flight
+from members.models import Member
+from planning.models import Reservation
+
+
+LISTS = ('aircraft', 'flight', 'reservation', 'alert', 'transaction')
+
+
+@override_settings(REQUEST_STATS_SLOW_MS=60 * 1000)
+class ApiTestCase(TestCase):
+    """Deux pilotes, un membre du staff (second pilote de tous les vols), deux avions."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote', first_name='Pierre', last_name='Dupont')
+        cls.other = User.objects.create_user('autre', first_name='Paul', last_name='Martin')
+        cls.staff = User.objects.create_user('tresorier', is_staff=True)
+        for user in (cls.pilot, cls.other, cls.staff):
+            Member.objects.create(user=user, account_balance=Decimal('0'))
+        cls.planes = [
+            Aircraft.objects.create(registration=f"F-G{n}AA", model_name='DR400', hourly_rate=150)
+            for n in range(2)
+        ]
+
+    @classmethod
+    def add_rows(cls, count):
+        """count vols (pilote et autre membre en alternance), reservations et alertes."""
+        now = timezone.now()
+        for n in range(count):
+            plane = cls.planes[n % 2]
+            start = plane.current_hours
+            Flight.objects.create(
+                aircraft=plane, pilot=(cls.pilot, cls.other)[n % 2], copilot=cls.staff,
+                hour_meter_start=start, hour_meter_end=start + 1,
+            )
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=cls.pilot, aircraft=cls.planes[n % 2], instructor=cls.staff,
+                start_time=now + timedelta(days=n), end_time=now + timedelta(days=n, hours=1),
+            )
+            for n in range(count)
+        )
+        Alert.objects.bulk_create(
+            Alert(
+                user=cls.pilot, alert_type='BALANCE', title=f"Alerte {n}", message='-',
+                related_aircraft=cls.planes[0], unique_key=f"test_{count}_{n}",
+            )
+            for n in range(count)
+        )
+
+    def list(self, basename, **params):
+        return self.client.get(reverse(f'api:{basename}-list'), params)
+
+
+# ============================================================
+# NOMBRE DE REQUETES
+# ============================================================
+
+class ListQueriesTests(ApiTestCase):
+    # Session, utilisateur, page
+    QUERIES = 3
+
+    def setUp(self):
+        self.client.force_login(self.pilot)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for count in (3, 30):
+            self.add_rows(count)
+            for basename in LISTS:
+                for fields in (None, 'id', 'id,aircraft_registration,pilot_name'):
+                    params = {'fields': fields} if fields else {}
+                    with self.subTest(rows=count, list=basename, fields=fields), \
+                            self.assertNumQueries(self.QUERIES):
+                        response = self.list(basename, page_size=200, **params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response.json()['results'])
+
+    def test_member_me_is_one_query(self):
+        self.add_rows(5)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse('api:member_me'))
+        self.assertEqual(response.json()['landings_last_90_days'], 3)
+
+    def test_page_size_is_capped(self):
+        Transaction.objects.bulk_create(
+            Transaction(user=self.pilot, amount=Decimal('1'), type='CREDIT', description='-')
+            for _ in range(250)
+        )
+        response = self.list('transaction', page_size=1000)
+        self.assertEqual(len(response.json()['results']), 200)
+        self.assertTrue(response.json()['next'])
+
+
+# ============================================================
+# CHAMPS PARTIELS
+# ============================================================
+
+class SparseFieldsTests(ApiTestCase):
+    def setUp(self):
+        self.add_rows(4)
+        self.client.force_login(self.pilot)
+
+    def test_only_requested_fields_are_returned(self):
+        response = self.list('flight', fields='id,date,unknown')
+        self.assertEqual({frozenset(row) for row in response.json()['results']}, {frozenset({'id', 'date'})})
+
+    def test_unrequested_relations_are_not_joined(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.list('flight', fields='id,date')
+        self.assertNotIn('JOIN', queries.captured_queries[-1]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.list('flight', fields='id,aircraft_registration')
+        self.assertIn('JOIN', queries.captured_queries[-1]['sql'])
+        self.assertTrue(all(row['aircraft_registration'] for row in response.json()['results']))
+
+
+# ============================================================
+# GET CONDITIONNEL
+# ============================================================
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        self.add_rows(4)
+        self.client.force_login(self.pilot)
+        self.url = reverse('api:flight-list')
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.add_rows(2)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+# ============================================================
+# DONNEES DES AUTRES MEMBRES
+# ============================================================
+
+class VisibilityTests(ApiTestCase):
+    def setUp(self):
+        self.add_rows(6)
+
+    def ids(self, basename, **params):
+        return {row['id'] for row in self.list(basename, page_size=200, **params).json()['results']}
+
+    def test_member_sees_only_own_flights_and_transactions(self):
+        self.client.force_login(self.pilot)
+        own_flights = set(Flight.objects.filter(pilot=self.pilot).values_list('id', flat=True))
+        self.assertEqual(self.ids('flight'), own_flights)
+        self.assertEqual(self.ids('flight', pilot=self.other.id), set())
+        self.assertEqual(
+            self.ids('transaction'), set(Transaction.objects.filter(user=self.pilot).values_list('id', flat=True)),
+        )
+        self.assertEqual(self.ids('transaction', user=self.other.id), set())
+
+        other_flight = Flight.objects.filter(pilot=self.other).first()
+        other_debit = Transaction.objects.filter(user=self.other).first()
+        self.assertEqual(self.client.get(reverse('api:flight-detail', args=[other_flight.id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api:transaction-detail', args=[other_debit.id])).status_code, 404)
+
+    def test_each_member_sees_their_own_flights(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.ids('flight'), set(Flight.objects.filter(pilot=self.other).values_list('id', flat=True)))
+
+    def test_staff_sees_everything(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(len(self.ids('flight')), 6)
+        self.assertEqual(len(self.ids('transaction')), 6)
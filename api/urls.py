@@ -0,0 +1,25 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from . import views
+
+app_name = 'api'
+
+router = DefaultRouter()
+router.register('aircraft', views.AircraftViewSet, basename='aircraft')
+router.register('flights', views.FlightViewSet, basename='flight')
+router.register('reservations', views.ReservationViewSet, basename='reservation')
+router.register('alerts', views.AlertViewSet, basename='alert')
+router.register('transactions', views.TransactionViewSet, basename='transaction')
+
+urlpatterns = [
+    path('members/me/', views.MemberMeView.as_view(), name='member_me'),
+    path('sync/tech-log/', views.TechLogSyncView.as_view(), name='tech_log_sync'),
+
+    # Jetons JWT (application mobile)
+    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    path('', include(router.urls)),
+]
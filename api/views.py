@@ -0,0 +1,250 @@
+"""
+API REST en lecture seule (application tablette / mobile du carnet de route).
+
+Chaque liste est paginee par curseur (pas de COUNT, pages stables pendant
+les insertions) sur un ordre couvert par un index, et ne charge que les
+jointures utiles aux champs demandes : une liste = un nombre de requetes
+fixe, quel que soit le nombre de lignes.
+
+Les reponses portent un ETag (empreinte du contenu) et, si le modele a un
+champ updated_at, un Last-Modified : un client qui renvoie If-None-Match /
+If-Modified-Since recoit 304 sans contenu.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import generics, status, viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+
+from alerts.models import Alert
+from finance.models import Transaction
+from fleet.models import Aircraft, Flight
+from fleet.sync import SyncRejected, make_sync_token, post_offline_flights, read_sync_token, server_changes
+from members.services import member_status_queryset
+from planning.models import Reservation
+from .serializers import (
+    AircraftSerializer, AlertSerializer, FlightSerializer, MemberSerializer,
+    ReservationSerializer, TechLogSyncSerializer, TransactionSerializer, requested_fields,
+)
+
+
+# ============================================================
+# PAGINATION, CHAMPS PARTIELS, GET CONDITIONNEL
+# ============================================================
+
+class ApiCursorPagination(CursorPagination):
+    """Pagination par curseur sur l'ordre declare par la vue (cursor_ordering)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        return view.cursor_ordering
+
+
+class SparseQuerysetMixin:
+    """
+    select_related limite aux relations des champs demandes.
+
+    related_fields : champ serialise -> relation a joindre
+    """
+    related_fields = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        wanted = requested_fields(self.request)
+        relations = {
+            relation for field, relation in self.related_fields.items()
+            if wanted is None or field in wanted
+        }
+        return queryset.select_related(*relations) if relations else queryset
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified sur les reponses GET, 304 si le client est a jour."""
+    last_modified_field = None
+
+    def _track(self, objects):
+        if self.last_modified_field:
+            dates = [getattr(obj, self.last_modified_field) for obj in objects]
+            dates = [value for value in dates if value]
+            self._last_modified = max(dates) if dates else None
+        return objects
+
+    def paginate_queryset(self, queryset):
+        return self._track(super().paginate_queryset(queryset))
+
+    def get_object(self):
+        return self._track([super().get_object()])[0]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+            return response
+
+        content = json.dumps(response.data, cls=DjangoJSONEncoder, sort_keys=True)
+        response['ETag'] = quote_etag(hashlib.sha256(content.encode()).hexdigest()[:32])
+        last_modified = getattr(self, '_last_modified', None)
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+
+        return get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+            response=response,
+        )
+
+
+class ReadOnlyApiViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    pagination_class = ApiCursorPagination
+    cursor_ordering = ('-id',)
+
+
+# ============================================================
+# RESSOURCES
+# ============================================================
+
+class AircraftViewSet(ReadOnlyApiViewSet):
+    """Flotte avec navigabilite (echeances de maintenance depassees)."""
+    serializer_class = AircraftSerializer
+    queryset = Aircraft.objects.with_maintenance_status()
+    cursor_ordering = ('registration',)
+    last_modified_field = 'updated_at'
+    filterset_fields = ['status', 'category']
+
+
+class FlightViewSet(ReadOnlyApiViewSet):
+    """Vols du pilote (en commandant de bord ou second pilote), tous pour le staff."""
+    serializer_class = FlightSerializer
+    queryset = Flight.objects.all()
+    cursor_ordering = ('-date', '-id')
+    last_modified_field = 'updated_at'
+    related_fields = {
+        'aircraft_registration': 'aircraft',
+        'pilot_name': 'pilot',
+        'copilot_name': 'copilot',
+    }
+    filterset_fields = {
+        'aircraft': ['exact'],
+        'pilot': ['exact'],
+        'flight_type': ['exact'],
+        'date': ['gte', 'lte'],
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_staff:
+            queryset = queryset.filter(Q(pilot=user) | Q(copilot=user))
+        return queryset
+
+
+class ReservationViewSet(ReadOnlyApiViewSet):
+    """Planning des reservations (partage par tous les membres)."""
+    serializer_class = ReservationSerializer
+    queryset = Reservation.objects.all()
+    cursor_ordering = ('-start_time', '-id')
+    last_modified_field = 'updated_at'
+    related_fields = {
+        'aircraft_registration': 'aircraft',
+        'pilot_name': 'user',
+        'instructor_name': 'instructor',
+    }
+    filterset_fields = {
+        'aircraft': ['exact'],
+        'user': ['exact'],
+        'status': ['exact'],
+        'start_time': ['gte', 'lte'],
+    }
+
+
+class AlertViewSet(ReadOnlyApiViewSet):
+    """Alertes de l'utilisateur et alertes globales."""
+    serializer_class = AlertSerializer
+    queryset = Alert.objects.all()
+    cursor_ordering = ('-created_at', '-id')
+    filterset_fields = ['status', 'severity', 'alert_type']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(Q(user=self.request.user) | Q(user__isnull=True))
+
+
+class TransactionViewSet(ReadOnlyApiViewSet):
+    """Ecritures du compte pilote, toutes pour le staff (?user=)."""
+    serializer_class = TransactionSerializer
+    queryset = Transaction.objects.all()
+    cursor_ordering = ('-date', '-id')
+    related_fields = {'aircraft_registration': 'aircraft'}
+    filterset_fields = {
+        'user': ['exact'],
+        'type': ['exact'],
+        'date': ['gte', 'lte'],
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+
+class MemberMeView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """Profil du membre connecte, avec ses statistiques de vol (une requete)."""
+    serializer_class = MemberSerializer
+
+    def get_queryset(self):
+        return member_status_queryset()
+
+    def get_object(self):
+        return generics.get_object_or_404(self.get_queryset(), user=self.request.user)
+
+
+# ============================================================
+# SYNCHRONISATION DU CARNET DE ROUTE (HORS LIGNE)
+# ============================================================
+
+class TechLogSyncView(APIView):
+    """
+    POST {"sync_token": "...", "flights": [{"client_uuid": ..., "aircraft_id": ...}, ...]}
+
+    Enregistre les vols saisis hors ligne (voir fleet.sync) et renvoie les
+    modifications du serveur depuis sync_token, avec le nouveau jeton et les
+    trous d'horametre signales (warnings).
+    409 si le lot est refuse (rien n'est enregistre).
+    """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'sync'
+
+    def post(self, request):
+        payload = TechLogSyncSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+
+        try:
+            created, duplicates, warnings = post_offline_flights(request.user, payload.validated_data.get('flights', []))
+        except SyncRejected as e:
+            return Response({'errors': e.errors}, status=status.HTTP_409_CONFLICT)
+
+        now = timezone.now()
+        changes = server_changes(request.user, read_sync_token(payload.validated_data.get('sync_token')), now)
+        context = {'request': request}
+        return Response({
+            'posted': [{'client_uuid': str(flight.client_uuid), 'id': flight.pk} for flight in created],
+            'duplicates': duplicates,
+            'warnings': warnings,
+            'sync_token': make_sync_token(now),
+            'changes': {
+                'aircraft': AircraftSerializer(changes['aircraft'], many=True, context=context).data,
+                'flights': FlightSerializer(changes['flights'], many=True, context=context).data,
+                'reservations': ReservationSerializer(changes['reservations'], many=True, context=context).data,
+            },
+        })
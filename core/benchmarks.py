@@ -0,0 +1,520 @@
+"""
+Scenarios de benchmark des endpoints critiques.
+
+Chaque scenario execute une requete via le client de test Django contre la
+base courante (typiquement le jeu genere par generate_synthetic_data) et
+mesure le temps de reponse et le nombre de requetes SQL. Les scenarios qui
+ecrivent (reservation, carnet de route) sont executes dans un savepoint
+annule a chaque iteration : la base n'est pas modifiee.
+
+Les budgets de requetes par defaut peuvent etre surcharges via le setting
+BENCHMARK_QUERY_BUDGETS ou un fichier JSON (option --budgets).
+"""
+import json
+import math
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from fleet.models import Aircraft
+from members.models import Member
+
+
+# Nombre maximal de requetes SQL par appel (session + auth inclus)
+DEFAULT_QUERY_BUDGETS = {
+    'events_api': 10,
+    'create_reservation': 20,
+    'log_flight': 20,
+    'scan_member': 4,
+    'scan_token': 2,
+    'alerts_api': 8,
+    'finance_dashboard': 10,
+    'fleet_analytics': 8,
+    'my_progression': 12,
+    'export_account_statement': 10,
+    'export_flight_log': 10,
+    'admin_members': 8,
+    'admin_users': 8,
+    'admin_aircraft': 8,
+    'admin_alerts': 8,
+    'admin_documents': 8,
+    'api_aircraft': 4,
+    'api_flights': 4,
+    'api_reservations': 4,
+    'api_alerts': 4,
+    'api_transactions': 4,
+    'api_member_me': 4,
+    'api_tech_log_sync': 25,
+}
+
+
+def get_query_budgets(path=None):
+    """Budgets par defaut, surcharges par les settings puis par un fichier JSON."""
+    budgets = dict(DEFAULT_QUERY_BUDGETS)
+    budgets.update(getattr(settings, 'BENCHMARK_QUERY_BUDGETS', {}))
+    if path:
+        with open(path, encoding='utf-8') as f:
+            budgets.update(json.load(f))
+    return budgets
+
+
+class QueryCounter:
+    """
+    Compte les requetes SQL executees (connection.execute_wrapper).
+    Contrairement a connection.queries, aucun plafond de journalisation.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche (valeurs deja triees)."""
+    if not values:
+        return None
+    rank = max(int(math.ceil(pct / 100 * len(values))) - 1, 0)
+    return values[rank]
+
+
+# ============================================================
+# CONTEXTE (UTILISATEURS ET OBJETS DE REFERENCE)
+# ============================================================
+
+class BenchmarkContext:
+    """
+    Selectionne les objets utilises par les scenarios : un pilote en etat de
+    voler, un eleve, un membre du staff et un avion disponible.
+    """
+
+    def __init__(self):
+        today = date.today()
+        members = Member.objects.select_related('user')
+
+        self.pilot = (
+            members.filter(
+                medical_validity__gte=today,
+                has_sep=True,
+                sep_validity__gte=today,
+                account_balance__gt=0,
+                is_student=False,
+            ).order_by('id').first()
+            or members.order_by('id').first()
+        )
+        self.student = (
+            members.filter(is_student=True, user__training_progression__isnull=False).order_by('id').first()
+            or self.pilot
+        )
+        self.staff = User.objects.filter(is_staff=True).order_by('id').first()
+        if self.staff is None:
+            # Cree dans la transaction du benchmark, annulee a la fin
+            self.staff = User.objects.create_user('bench_staff', is_staff=True)
+        self.admin = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if self.admin is None:
+            self.admin = User.objects.create_superuser('bench_admin', password=None)
+
+        self.aircraft = (
+            Aircraft.objects.filter(status='AVAILABLE').order_by('id').first()
+            or Aircraft.objects.order_by('id').first()
+        )
+        if self.pilot is None or self.aircraft is None:
+            raise ValueError(
+                "Base vide : generer un jeu de donnees (manage.py generate_synthetic_data)."
+            )
+        self.reservation_day = self._free_reservation_day()
+
+        self._clients = {}
+
+    def _free_reservation_day(self):
+        """
+        Premier jour a venir sans reservation de l'avion apres la derniere :
+        le creneau du scenario create_reservation ne chevauche jamais une
+        reservation existante (refus = mesure du mauvais chemin).
+        """
+        from planning.models import Reservation
+        last_end = Reservation.objects.filter(aircraft=self.aircraft).aggregate(last=Max('end_time'))['last']
+        day = date.today() + timedelta(days=1)
+        if last_end is not None:
+            day = max(day, last_end.date() + timedelta(days=1))
+        return day
+
+    def client(self, role):
+        """Client de test authentifie pour un role (None = anonyme)."""
+        if role not in self._clients:
+            client = Client()
+            user = {
+                'pilot': self.pilot.user if self.pilot else None,
+                'student': self.student.user if self.student else None,
+                'staff': self.staff,
+                'admin': self.admin,
+            }.get(role)
+            if user is not None:
+                client.force_login(user)
+            self._clients[role] = client
+        return self._clients[role]
+
+
+# ============================================================
+# SCENARIOS
+# ============================================================
+
+class Scenario:
+    """
+    Args:
+        writes: iteration executee dans un savepoint annule (les lignes
+                creees sont supprimees apres chaque iteration)
+        check: fonction (response) -> message d'erreur ou None, pour les
+               endpoints qui signalent un refus dans une reponse 200
+    """
+
+    def __init__(self, name, role, run, writes=False, check=None):
+        self.name = name
+        self.role = role
+        self.run = run
+        self.writes = writes
+        self.check = check
+
+
+def _json_success(response):
+    """Refus signale par {'success': false} (reponse 200)."""
+    try:
+        data = json.loads(response.content)
+    except ValueError:
+        return "Reponse non JSON"
+    if not data.get('success'):
+        return f"Refuse : {data.get('error', '?')}"
+    return None
+
+
+def _events_api(ctx, client):
+    return client.get(reverse('api_events'))
+
+
+def _create_reservation(ctx, client):
+    start = ctx.reservation_day.isoformat()
+    return client.post(
+        reverse('api_create_reservation'),
+        data=json.dumps({
+            'aircraft': ctx.aircraft.id,
+            'start': f"{start}T10:00:00+00:00",
+            'end': f"{start}T12:00:00+00:00",
+        }),
+        content_type='application/json',
+    )
+
+
+def _log_flight(ctx, client):
+    aircraft = Aircraft.objects.get(pk=ctx.aircraft.pk)
+    start = aircraft.current_hours
+    return client.post(reverse('log_flight', args=[aircraft.id]), {
+        'hour_meter_start': str(start),
+        'hour_meter_end': str(start + 1),
+        'block_off': '10:00',
+        'block_on': '11:10',
+        'landings_count': '1',
+        'fuel_added': '0',
+        'oil_added': '0',
+    })
+
+
+def _scan_member(ctx, client):
+    return client.get(reverse('scan_member', args=[ctx.pilot.id]))
+
+
+def _scan_token(ctx, client):
+    from members.services import make_member_token
+    return client.get(reverse('scan_token', args=[make_member_token(ctx.pilot.id)]))
+
+
+def _alerts_api(ctx, client):
+    return client.get(reverse('alerts:api'))
+
+
+def _finance_dashboard(ctx, client):
+    return client.get(reverse('finance_dashboard'))
+
+
+def _fleet_analytics(ctx, client):
+    # Calcul complet sur trois ans (cache de la periode vide a chaque appel)
+    from django.utils import timezone
+    from fleet.analytics import ANALYTICS_CACHE
+    end = timezone.localdate()
+    start = end - timedelta(days=3 * 365 - 1)
+    ANALYTICS_CACHE.delete(f"{start.isoformat()}:{end.isoformat()}")
+    return client.get(reverse('admin_analytics'), {'days': 3 * 365})
+
+
+def _my_progression(ctx, client):
+    return client.get(reverse('my_progression'))
+
+
+def _export_account_statement(ctx, client):
+    return client.get(reverse('exports:my_account_statement'), {'period': 'year'})
+
+
+def _export_flight_log(ctx, client):
+    return client.get(reverse('exports:aircraft_flight_log', args=[ctx.aircraft.id]), {'period': 'month'})
+
+
+def _admin_changelist(model):
+    # Page complete de la liste (100 lignes) : le budget ne depend pas du
+    # nombre de lignes affichees
+    def run(ctx, client):
+        return client.get(reverse(f'admin:{model}_changelist'))
+    return run
+
+
+def _api_list(basename):
+    # Page maximale (200 lignes) : le budget ne depend pas de la taille de page
+    def run(ctx, client):
+        return client.get(reverse(f'api:{basename}-list'), {'page_size': 200})
+    return run
+
+
+def _api_member_me(ctx, client):
+    return client.get(reverse('api:member_me'))
+
+
+def _api_tech_log_sync(ctx, client):
+    import uuid
+    start = Aircraft.objects.get(pk=ctx.aircraft.pk).current_hours
+    return client.post(reverse('api:tech_log_sync'), data=json.dumps({
+        'flights': [{
+            'client_uuid': str(uuid.uuid4()),
+            'aircraft_id': ctx.aircraft.id,
+            'date': date.today().isoformat(),
+            'hour_meter_start': str(start),
+            'hour_meter_end': str(start + 1),
+            'block_off': '10:00',
+            'block_on': '11:10',
+        }],
+    }), content_type='application/json')
+
+
+SCENARIOS = [
+    Scenario('events_api', None, _events_api),
+    Scenario('create_reservation', 'pilot', _create_reservation, writes=True, check=_json_success),
+    Scenario('log_flight', 'pilot', _log_flight, writes=True),
+    Scenario('scan_member', 'staff', _scan_member),
+    Scenario('scan_token', None, _scan_token),
+    Scenario('alerts_api', 'pilot', _alerts_api),
+    Scenario('finance_dashboard', 'staff', _finance_dashboard),
+    Scenario('fleet_analytics', 'staff', _fleet_analytics),
+    Scenario('my_progression', 'student', _my_progression),
+    Scenario('export_account_statement', 'pilot', _export_account_statement),
+    Scenario('export_flight_log', 'staff', _export_flight_log),
+    Scenario('admin_members', 'admin', _admin_changelist('members_member')),
+    Scenario('admin_users', 'admin', _admin_changelist('auth_user')),
+    Scenario('admin_aircraft', 'admin', _admin_changelist('fleet_aircraft')),
+    Scenario('admin_alerts', 'admin', _admin_changelist('alerts_alert')),
+    Scenario('admin_documents', 'admin', _admin_changelist('members_memberdocument')),
+    Scenario('api_aircraft', 'pilot', _api_list('aircraft')),
+    Scenario('api_flights', 'staff', _api_list('flight')),
+    Scenario('api_reservations', 'pilot', _api_list('reservation')),
+    Scenario('api_alerts', 'pilot', _api_list('alert')),
+    Scenario('api_transactions', 'staff', _api_list('transaction')),
+    Scenario('api_member_me', 'pilot', _api_member_me),
+    Scenario('api_tech_log_sync', 'pilot', _api_tech_log_sync, writes=True),
+]
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def _run_once(scenario, ctx, client):
+    """Execute une iteration, retourne (duree_ms, nb_requetes, status, erreur)."""
+    counter = QueryCounter()
+    with transaction.atomic():
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = scenario.run(ctx, client)
+            elapsed = (time.perf_counter() - started) * 1000
+        if scenario.writes:
+            transaction.set_rollback(True)
+    error = scenario.check(response) if scenario.check else None
+    return elapsed, counter.count, response.status_code, error
+
+
+def run_scenario(scenario, ctx, iterations=20, warmup=2):
+    """Mesure un scenario : percentiles de temps et nombre de requetes."""
+    client = ctx.client(scenario.role)
+    for _ in range(warmup):
+        _run_once(scenario, ctx, client)
+
+    timings = []
+    query_counts = []
+    statuses = set()
+    errors = set()
+    for _ in range(iterations):
+        elapsed, nb_queries, status, error = _run_once(scenario, ctx, client)
+        timings.append(elapsed)
+        query_counts.append(nb_queries)
+        statuses.add(status)
+        if error:
+            errors.add(error)
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'min_ms': round(timings[0], 2),
+        'max_ms': round(timings[-1], 2),
+        'queries': max(query_counts),
+        'queries_min': min(query_counts),
+        'status_codes': sorted(statuses),
+        'errors': sorted(errors),
+    }
+
+
+def failed_statuses(result):
+    """
+    Echecs d'un resultat (mesure non representative) : codes HTTP hors
+    2xx/3xx et refus signales dans la reponse (Scenario.check).
+    """
+    return [
+        str(status) for status in result['status_codes'] if not 200 <= status < 400
+    ] + result.get('errors', [])
+
+
+def run_benchmarks(names=None, iterations=20, warmup=2):
+    """
+    Execute les scenarios demandes (tous par defaut).
+    Tout est fait dans une transaction annulee a la fin.
+
+    L'environnement de test Django est installe le temps du benchmark
+    (hote 'testserver' autorise, emails en memoire) : sans lui, chaque
+    requete du client de test repond 400 (DisallowedHost) sans toucher
+    la base.
+    """
+    results = {}
+    setup_test_environment()
+    try:
+        with transaction.atomic():
+            ctx = BenchmarkContext()
+            for scenario in SCENARIOS:
+                if names and scenario.name not in names:
+                    continue
+                results[scenario.name] = run_scenario(scenario, ctx, iterations, warmup)
+            transaction.set_rollback(True)
+    finally:
+        teardown_test_environment()
+    return results
+
+
+def dataset_summary():
+    """Volumetrie de la base, enregistree avec les resultats."""
+    from finance.models import Transaction
+    from fleet.models import Flight
+    from planning.models import Reservation
+
+    return {
+        'aircraft': Aircraft.objects.count(),
+        'members': Member.objects.count(),
+        'flights': Flight.objects.count(),
+        'reservations': Reservation.objects.count(),
+        'transactions': Transaction.objects.count(),
+    }
+
+
+# ============================================================
+# CONCURRENCE EN ECRITURE
+# ============================================================
+# Plusieurs threads (une connexion chacun) executent des transactions
+# lecture + ecriture, comme la saisie d'un vol ou d'une reservation. Sur
+# SQLite sans reglage, un verrou partage promu en verrou d'ecriture echoue
+# immediatement ("database is locked") ; en mode WAL + IMMEDIATE, les
+# ecrivains attendent leur tour.
+
+CONCURRENCY_MARKER = 'bench_concurrency_'
+
+
+def _concurrent_writer(worker, writes, user_id, results, barrier):
+    from django.db import OperationalError
+    from django.db.models import F
+    from alerts.models import Alert
+
+    latencies = []
+    errors = 0
+    barrier.wait()
+    try:
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    # Lecture puis ecriture dans la meme transaction
+                    Alert.objects.filter(user_id=user_id, status='ACTIVE').count()
+                    Alert.objects.create(
+                        user_id=user_id,
+                        alert_type='BALANCE',
+                        severity='INFO',
+                        title='Benchmark concurrence',
+                        message='-',
+                        unique_key=f"{CONCURRENCY_MARKER}{worker}_{i}",
+                    )
+                    Member.objects.filter(user_id=user_id).update(account_balance=F('account_balance'))
+                latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                errors += 1
+    finally:
+        connection.close()
+    results.append((latencies, errors))
+
+
+def run_concurrency_benchmark(threads=8, writes=25):
+    """
+    Transactions d'ecriture concurrentes sur la base courante.
+    Les lignes creees sont supprimees a la fin.
+
+    Returns:
+        dict (profil, debit, erreurs de verrou, percentiles de latence)
+    """
+    import threading
+    from alerts.models import Alert
+
+    member = Member.objects.order_by('id').first()
+    if member is None:
+        raise ValueError("Base vide : generer un jeu de donnees (manage.py generate_synthetic_data).")
+
+    results = []
+    barrier = threading.Barrier(threads)
+    workers = [
+        threading.Thread(target=_concurrent_writer, args=(n, writes, member.user_id, results, barrier))
+        for n in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    Alert.objects.filter(unique_key__startswith=CONCURRENCY_MARKER).delete()
+
+    latencies = sorted(round(ms, 2) for worker_latencies, _ in results for ms in worker_latencies)
+    errors = sum(worker_errors for _, worker_errors in results)
+    return {
+        'profile': getattr(settings, 'DATABASE_PROFILE', None),
+        'vendor': connection.vendor,
+        'threads': threads,
+        'attempted': threads * writes,
+        'committed': len(latencies),
+        'lock_errors': errors,
+        'writes_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'max_ms': latencies[-1] if latencies else None,
+    }
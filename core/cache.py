@@ -0,0 +1,314 @@
+"""
+Couche de cache commune aux applications.
+
+Le backend (memoire locale, fichiers, Redis) est choisi dans les settings
+(variable d'environnement CACHE_BACKEND). Chaque application declare son
+espace de noms :
+
+    METEO_CACHE = CacheNamespace('meteo')
+
+    @METEO_CACHE.cached('metar:{icao_code}', ttl=300)
+    def fetch_metar(icao_code): ...
+
+- Cles prefixees et versionnees : 'meteo:v1:metar:LFPG'. Changer la version
+  d'un espace de noms (format des valeurs modifie) ignore les anciennes cles.
+- Espace "effacable" (clearable=True) : un numero de generation partage,
+  incremente par clear(), invalide toutes les cles dans tous les processus.
+- get_or_set / cached : un seul calcul a la fois par cle (calcul en cours
+  enregistre par cle entre threads, verrou cache.add entre processus), les
+  autres appelants de la meme cle attendent la valeur calculee. Aucun verrou
+  partage entre cles n'est tenu pendant un calcul.
+- lock : verrou exclusif a duree limitee (taches periodiques qui ne doivent
+  pas se chevaucher). Partage entre processus avec un backend partage
+  (fichiers, Redis).
+- Succes / echecs / calculs comptes par espace de noms (cache_metrics),
+  exposes par la vue request_stats.
+"""
+import functools
+import inspect
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+_MISSING = object()
+
+# Duree de vie du verrou inter-processus d'un calcul, et attente maximale
+# d'un appelant qui trouve le verrou pris
+SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+SINGLE_FLIGHT_WAIT = 10
+SINGLE_FLIGHT_POLL = 0.05
+
+
+class _InFlight:
+    """Calcul en cours d'une cle dans le processus (threads en attente)."""
+
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.value = _MISSING
+
+
+# Calculs en cours par cle ; le verrou ne protege que le dictionnaire
+# (enregistrement / retrait), jamais un calcul ou une attente
+_IN_FLIGHT = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+# ============================================================
+# METRIQUES
+# ============================================================
+
+class CacheMetrics:
+    """Compteurs par espace de noms, en memoire du processus."""
+
+    FIELDS = ['hits', 'misses', 'computed', 'compute_ms', 'waited']
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces = {}
+
+    def add(self, namespace, **values):
+        with self._lock:
+            stats = self._namespaces.get(namespace)
+            if stats is None:
+                stats = self._namespaces[namespace] = dict.fromkeys(self.FIELDS, 0)
+            for field, value in values.items():
+                stats[field] += value
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for namespace, stats in sorted(self._namespaces.items()):
+                reads = stats['hits'] + stats['misses']
+                result[namespace] = {
+                    **{key: round(value, 2) for key, value in stats.items()},
+                    'hit_ratio': round(stats['hits'] / reads, 3) if reads else None,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._namespaces.clear()
+
+
+cache_metrics = CacheMetrics()
+
+
+# ============================================================
+# ESPACES DE NOMS
+# ============================================================
+
+class CacheNamespace:
+    """
+    Cles d'une application dans le cache par defaut.
+
+    Args:
+        name: prefixe des cles ('meteo', 'members.status'...)
+        version: version du format des valeurs
+        clearable: True pour pouvoir invalider tout l'espace (clear())
+    """
+
+    def __init__(self, name, version=1, clearable=False):
+        self.name = name
+        self.version = version
+        self.clearable = clearable
+        self._generation_key = f"{name}:v{version}:generation"
+
+    # ---------- Cles ----------
+
+    def generation(self):
+        """Generation courante de l'espace (initialisee a 1 si absente)."""
+        generation = cache.get(self._generation_key)
+        if generation is None:
+            cache.add(self._generation_key, 1, timeout=None)
+            generation = cache.get(self._generation_key, 1)
+        return generation
+
+    def _prefix(self):
+        if self.clearable:
+            return f"{self.name}:v{self.version}:g{self.generation()}:"
+        return f"{self.name}:v{self.version}:"
+
+    def make_key(self, key):
+        return f"{self._prefix()}{key}"
+
+    def clear(self):
+        """Invalide toutes les cles de l'espace, dans tous les processus."""
+        if not self.clearable:
+            raise ValueError(f"L'espace de cache '{self.name}' n'est pas effacable")
+        try:
+            cache.incr(self._generation_key)
+        except ValueError:
+            # Cle absente ou expiree : repartir d'une generation neuve
+            cache.set(self._generation_key, 1, timeout=None)
+
+    # ---------- Lecture / ecriture ----------
+
+    def get(self, key, default=None):
+        value = cache.get(self.make_key(key), _MISSING)
+        if value is _MISSING:
+            cache_metrics.add(self.name, misses=1)
+            return default
+        cache_metrics.add(self.name, hits=1)
+        return value
+
+    def get_many(self, keys):
+        prefix = self._prefix()
+        found = cache.get_many([f"{prefix}{key}" for key in keys])
+        cache_metrics.add(self.name, hits=len(found), misses=len(keys) - len(found))
+        return {key[len(prefix):]: value for key, value in found.items()}
+
+    def set(self, key, value, ttl=DEFAULT_TIMEOUT):
+        cache.set(self.make_key(key), value, ttl)
+
+    def delete(self, key):
+        cache.delete(self.make_key(key))
+
+    def delete_many(self, keys):
+        prefix = self._prefix()
+        cache.delete_many([f"{prefix}{key}" for key in keys])
+
+    def get_or_set(self, key, compute, ttl=DEFAULT_TIMEOUT):
+        """
+        Valeur en cache, sinon calculee une seule fois pour tous les appelants
+        concurrents. Une valeur None n'est pas mise en cache (erreur, absent).
+        """
+        full_key = self.make_key(key)
+        value = cache.get(full_key, _MISSING)
+        if value is not _MISSING:
+            cache_metrics.add(self.name, hits=1)
+            return value
+        cache_metrics.add(self.name, misses=1)
+
+        with _IN_FLIGHT_LOCK:
+            flight = _IN_FLIGHT.get(full_key)
+            if flight is None:
+                flight = _IN_FLIGHT[full_key] = _InFlight()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            # Appel imbrique sur la meme cle dans le meme thread : pas d'attente
+            if flight.owner == threading.get_ident():
+                return self._compute(full_key, compute, ttl)
+            # Meme cle calculee par un autre thread du processus
+            if flight.done.wait(SINGLE_FLIGHT_WAIT) and flight.value is not _MISSING:
+                cache_metrics.add(self.name, waited=1)
+                return flight.value
+            # Calcul en echec ou trop long : calcul direct
+            return self._compute(full_key, compute, ttl)
+
+        try:
+            flight.value = self._compute_once(full_key, compute, ttl)
+            return flight.value
+        finally:
+            with _IN_FLIGHT_LOCK:
+                _IN_FLIGHT.pop(full_key, None)
+            flight.done.set()
+
+    def _compute_once(self, full_key, compute, ttl):
+        """Calcul unique entre processus (verrou cache.add, sans verrou local)."""
+        # Calculee par un autre thread juste avant l'enregistrement
+        value = cache.get(full_key, _MISSING)
+        if value is not _MISSING:
+            cache_metrics.add(self.name, waited=1)
+            return value
+
+        lock_key = f"{full_key}:lock"
+        if not cache.add(lock_key, 1, SINGLE_FLIGHT_LOCK_TIMEOUT):
+            value = self._wait_for(full_key)
+            if value is not _MISSING:
+                cache_metrics.add(self.name, waited=1)
+                return value
+        try:
+            return self._compute(full_key, compute, ttl)
+        finally:
+            cache.delete(lock_key)
+
+    def _compute(self, full_key, compute, ttl):
+        started = time.perf_counter()
+        value = compute()
+        cache_metrics.add(
+            self.name, computed=1, compute_ms=(time.perf_counter() - started) * 1000,
+        )
+        if value is not None:
+            cache.set(full_key, value, ttl)
+        return value
+
+    def _wait_for(self, full_key):
+        """Attend la valeur calculee par un autre processus (_MISSING si delai depasse)."""
+        deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(SINGLE_FLIGHT_POLL)
+            value = cache.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return _MISSING
+
+    # ---------- Verrou ----------
+
+    @contextmanager
+    def lock(self, key, timeout):
+        """
+        Verrou exclusif : with NS.lock('checks', 600) as acquired.
+
+        acquired vaut False si le verrou est deja pris. Le verrou expire apres
+        timeout secondes (processus interrompu) et n'est libere que par son
+        detenteur.
+        """
+        lock_key = self.make_key(f"{key}:lock")
+        token = uuid.uuid4().hex
+        acquired = cache.add(lock_key, token, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    # ---------- Decorateur ----------
+
+    def cached(self, key, ttl=DEFAULT_TIMEOUT):
+        """
+        Met en cache le resultat d'une fonction.
+
+        Args:
+            key: gabarit formate avec les arguments de la fonction
+                 ('metar:{icao_code}') ou fonction (*args, **kwargs) -> cle
+            ttl: duree de vie en secondes (par defaut : TIMEOUT du backend,
+                 None : sans expiration)
+
+        La fonction decoree expose uncached (appel direct) et invalidate(...)
+        (supprime la cle correspondant aux arguments).
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            def make_key(*args, **kwargs):
+                if callable(key):
+                    return key(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return key.format(**bound.arguments)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_set(make_key(*args, **kwargs), lambda: func(*args, **kwargs), ttl)
+
+            wrapper.uncached = func
+            wrapper.invalidate = lambda *args, **kwargs: self.delete(make_key(*args, **kwargs))
+            return wrapper
+        return decorator
+
+    def __repr__(self):
+        return f"<CacheNamespace {self.name} v{self.version}>"
+
+
+def cached(namespace, key, ttl=DEFAULT_TIMEOUT):
+    """Raccourci : @cached(METEO_CACHE, 'metar:{icao_code}', ttl=300)."""
+    return namespace.cached(key, ttl)
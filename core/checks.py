@@ -0,0 +1,42 @@
+"""
+Verifications de configuration (manage.py check, demarrage des workers).
+
+Les verrous des taches Celery (core.tasks.single_instance) et le suivi des
+exports PDF (exports.jobs) passent par le cache : un cache propre a chaque
+processus (locmem) n'est pas vu des workers. Les taches non eager exigent
+donc un cache partage (file ou redis).
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Caches dont le contenu n'est pas partage entre processus
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def unshared_cache_error():
+    """Message d'erreur si le cache par defaut n'est pas partage, sinon None."""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PROCESS_LOCAL_CACHES:
+        return (
+            f"Le cache {backend} n'est pas partage entre processus : les taches "
+            f"Celery en arriere-plan (verrous, exports PDF) exigent CACHE_BACKEND=file ou redis."
+        )
+    return None
+
+
+@register(Tags.caches)
+def check_celery_cache(app_configs, **kwargs):
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return []
+    message = unshared_cache_error()
+    if message is None:
+        return []
+    return [Error(
+        message,
+        hint="Definir CACHE_BACKEND=file ou redis, ou CELERY_TASK_ALWAYS_EAGER=1 (sans worker).",
+        id='core.E001',
+    )]
@@ -0,0 +1,288 @@
+"""
+Instrumentation des requetes HTTP (SQL, cache, temps de reponse).
+
+RequestStatsMiddleware mesure pour chaque requete :
+- le nombre de requetes SQL et le temps passe en base,
+- les requetes dupliquees (meme SQL execute plusieurs fois : signature N+1),
+- les succes / echecs de lecture du cache,
+- le temps de reponse total.
+
+Les mesures sont agregees par nom d'URL (ex: 'finance_dashboard') dans la
+memoire du processus et exposees aux membres du staff (vue request_stats),
+en JSON ou au format texte Prometheus. Les requetes lentes sont journalisees
+avec leurs requetes SQL les plus couteuses.
+
+Settings :
+    REQUEST_STATS_ENABLED   (defaut True)
+    REQUEST_STATS_SLOW_MS   seuil de requete lente en ms (defaut 500)
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 500
+# Nombre de requetes SQL conservees dans le journal d'une requete lente
+SLOW_LOG_QUERIES = 5
+
+_current = contextvars.ContextVar('request_stats_current', default=None)
+_MISSING = object()
+
+
+# ============================================================
+# MESURE D'UNE REQUETE
+# ============================================================
+
+class RequestRecorder:
+    """
+    Mesures d'une requete HTTP en cours.
+    S'installe comme execute_wrapper sur chaque connexion.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.signatures = Counter()
+        self.slowest = []  # (duree_s, sql) des requetes les plus lentes
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            # Le SQL contient des %s : il sert directement de signature
+            self.signatures[sql] += 1
+            self._keep_slowest(elapsed, sql)
+
+    def _keep_slowest(self, elapsed, sql):
+        if len(self.slowest) < SLOW_LOG_QUERIES:
+            self.slowest.append((elapsed, sql))
+        elif elapsed > self.slowest[-1][0]:
+            self.slowest[-1] = (elapsed, sql)
+        else:
+            return
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+
+    @property
+    def duplicates(self):
+        """Executions en trop des requetes SQL identiques."""
+        return sum(n - 1 for n in self.signatures.values() if n > 1)
+
+    def duplicate_signatures(self, limit=3):
+        return [(sql, n) for sql, n in self.signatures.most_common(limit) if n > 1]
+
+
+# ============================================================
+# COMPTAGE DU CACHE
+# ============================================================
+
+def _instrument_cache(cache):
+    """
+    Enveloppe get/get_many d'une instance de cache (une fois par thread)
+    pour compter les succes et echecs de la requete en cours.
+    """
+    if getattr(cache, '_request_stats_instrumented', False):
+        return
+
+    original_get = cache.get
+    original_get_many = cache.get_many
+
+    def get(key, default=None, version=None):
+        value = original_get(key, _MISSING, version=version)
+        recorder = _current.get()
+        if recorder is not None:
+            if value is _MISSING:
+                recorder.cache_misses += 1
+            else:
+                recorder.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(keys, version=None):
+        keys = list(keys)
+        values = original_get_many(keys, version=version)
+        recorder = _current.get()
+        if recorder is not None:
+            recorder.cache_hits += len(values)
+            recorder.cache_misses += len(keys) - len(values)
+        return values
+
+    cache.get = get
+    cache.get_many = get_many
+    cache._request_stats_instrumented = True
+
+
+# ============================================================
+# AGREGATS PAR NOM D'URL
+# ============================================================
+
+class RequestStatsStore:
+    """Agregats par nom d'URL, en memoire du processus."""
+
+    FIELDS = [
+        'requests', 'total_ms', 'max_ms', 'queries', 'max_queries',
+        'db_ms', 'duplicates', 'cache_hits', 'cache_misses', 'slow',
+    ]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._duplicates = {}
+
+    def record(self, view_name, recorder, elapsed_ms, slow):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = dict.fromkeys(self.FIELDS, 0)
+                self._duplicates[view_name] = Counter()
+
+            stats['requests'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['queries'] += recorder.queries
+            stats['max_queries'] = max(stats['max_queries'], recorder.queries)
+            stats['db_ms'] += recorder.db_time * 1000
+            stats['duplicates'] += recorder.duplicates
+            stats['cache_hits'] += recorder.cache_hits
+            stats['cache_misses'] += recorder.cache_misses
+            stats['slow'] += int(slow)
+            for sql, n in recorder.duplicate_signatures():
+                self._duplicates[view_name][sql] += n - 1
+
+    def snapshot(self):
+        """Copie des agregats, avec moyennes et principales requetes dupliquees."""
+        with self._lock:
+            result = {}
+            for view_name, stats in sorted(self._views.items()):
+                n = stats['requests']
+                result[view_name] = {
+                    **{key: round(value, 2) for key, value in stats.items()},
+                    'avg_ms': round(stats['total_ms'] / n, 2),
+                    'avg_queries': round(stats['queries'] / n, 2),
+                    'top_duplicates': [
+                        {'sql': sql[:300], 'extra_executions': count}
+                        for sql, count in self._duplicates[view_name].most_common(3)
+                    ],
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._duplicates.clear()
+
+
+request_stats = RequestStatsStore()
+
+
+PROMETHEUS_METRICS = [
+    # (nom, type, champ, facteur, aide)
+    ('aeroclub_http_requests_total', 'counter', 'requests', 1, "Requetes HTTP traitees"),
+    ('aeroclub_http_request_duration_seconds_sum', 'counter', 'total_ms', 0.001, "Temps de reponse cumule"),
+    ('aeroclub_http_slow_requests_total', 'counter', 'slow', 1, "Requetes au-dela du seuil de lenteur"),
+    ('aeroclub_db_queries_total', 'counter', 'queries', 1, "Requetes SQL executees"),
+    ('aeroclub_db_queries_max', 'gauge', 'max_queries', 1, "Maximum de requetes SQL pour une requete HTTP"),
+    ('aeroclub_db_duration_seconds_sum', 'counter', 'db_ms', 0.001, "Temps cumule passe en base"),
+    ('aeroclub_db_duplicate_queries_total', 'counter', 'duplicates', 1, "Requetes SQL dupliquees (N+1)"),
+    ('aeroclub_cache_hits_total', 'counter', 'cache_hits', 1, "Lectures du cache reussies"),
+    ('aeroclub_cache_misses_total', 'counter', 'cache_misses', 1, "Lectures du cache manquees"),
+]
+
+
+CACHE_PROMETHEUS_METRICS = [
+    ('aeroclub_cache_namespace_hits_total', 'counter', 'hits', 1, "Lectures reussies par espace de cache"),
+    ('aeroclub_cache_namespace_misses_total', 'counter', 'misses', 1, "Lectures manquees par espace de cache"),
+    ('aeroclub_cache_namespace_computed_total', 'counter', 'computed', 1, "Valeurs calculees (cache manque)"),
+    ('aeroclub_cache_namespace_compute_seconds_sum', 'counter', 'compute_ms', 0.001, "Temps de calcul cumule"),
+    ('aeroclub_cache_namespace_waited_total', 'counter', 'waited', 1, "Appels servis par le calcul d'un autre"),
+]
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _render_series(lines, metrics, label_name, snapshot):
+    for name, metric_type, field, factor, help_text in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for key, stats in snapshot.items():
+            lines.append(f'{name}{{{label_name}="{_label(key)}"}} {round(stats[field] * factor, 6)}')
+
+
+def render_prometheus(snapshot, cache_snapshot=None):
+    """
+    Format texte d'exposition Prometheus : une serie par nom d'URL, puis une
+    par espace de cache (core.cache).
+    """
+    lines = []
+    _render_series(lines, PROMETHEUS_METRICS, 'view', snapshot)
+    if cache_snapshot:
+        _render_series(lines, CACHE_PROMETHEUS_METRICS, 'namespace', cache_snapshot)
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+class RequestStatsMiddleware:
+    """Mesure chaque requete et alimente request_stats."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_STATS_ENABLED', True)
+        self.slow_ms = getattr(settings, 'REQUEST_STATS_SLOW_MS', DEFAULT_SLOW_MS)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = RequestRecorder()
+        token = _current.set(recorder)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                for alias in settings.CACHES:
+                    _instrument_cache(caches[alias])
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or '<unresolved>'
+        slow = elapsed_ms >= self.slow_ms
+        request_stats.record(view_name, recorder, elapsed_ms, slow)
+        if slow:
+            self._log_slow_request(request, view_name, recorder, elapsed_ms)
+        return response
+
+    def _log_slow_request(self, request, view_name, recorder, elapsed_ms):
+        details = [
+            f"  {elapsed * 1000:.1f} ms : {sql[:500]}" for elapsed, sql in recorder.slowest
+        ]
+        details += [
+            f"  x{n} : {sql[:500]}" for sql, n in recorder.duplicate_signatures()
+        ]
+        logger.warning(
+            "Requete lente %s %s (%s) : %.0f ms, %d requete(s) SQL (%.0f ms), %d dupliquee(s)\n%s",
+            request.method, request.path, view_name, elapsed_ms,
+            recorder.queries, recorder.db_time * 1000, recorder.duplicates,
+            '\n'.join(details),
+        )
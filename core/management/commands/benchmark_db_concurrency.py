@@ -0,0 +1,98 @@
+"""
+Benchmark des ecritures concurrentes sur la base configuree.
+
+Mesure le debit et les erreurs "database is locked" de transactions
+lecture + ecriture lancees en parallele. --compare relance la mesure dans un
+sous-processus par profil de base (DATABASE_PROFILE) pour les comparer.
+
+Usage:
+    python manage.py benchmark_db_concurrency
+    python manage.py benchmark_db_concurrency --threads 16 --writes 50
+    python manage.py benchmark_db_concurrency --compare sqlite-basic sqlite
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import run_concurrency_benchmark
+
+
+COLUMNS = [
+    ('profile', 'Profil', 14),
+    ('committed', 'Validees', 9),
+    ('lock_errors', 'Verrous', 8),
+    ('writes_per_s', 'Ecr./s', 8),
+    ('p50_ms', 'p50 ms', 8),
+    ('p95_ms', 'p95 ms', 8),
+    ('max_ms', 'max ms', 9),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark des transactions d\'ecriture concurrentes (verrous SQLite, profils de base)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Ecrivains concurrents (defaut: 8)')
+        parser.add_argument('--writes', type=int, default=25, help='Transactions par ecrivain (defaut: 25)')
+        parser.add_argument(
+            '--compare',
+            nargs='+',
+            choices=sorted(settings.DATABASE_PROFILES),
+            help='Profils de base a comparer (un sous-processus par profil)',
+        )
+        parser.add_argument('--json', action='store_true', help='Resultat brut en JSON')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            results = [self._run_profile(profile, options) for profile in options['compare']]
+        else:
+            if not options['json']:
+                self.stdout.write(
+                    f"[*] {options['threads']} ecrivains x {options['writes']} transactions "
+                    f"(profil {settings.DATABASE_PROFILE})..."
+                )
+            try:
+                results = [run_concurrency_benchmark(options['threads'], options['writes'])]
+            except ValueError as e:
+                raise CommandError(str(e))
+            if options['json']:
+                self.stdout.write(json.dumps(results[0]))
+                return
+
+        self._print_table(results)
+        if any(result['lock_errors'] for result in results):
+            self.stdout.write(self.style.WARNING("[!] Erreurs 'database is locked' constatees"))
+        else:
+            self.stdout.write(self.style.SUCCESS("[OK] Aucune erreur de verrou"))
+
+    def _run_profile(self, profile, options):
+        self.stdout.write(f"[*] Profil {profile}...")
+        completed = subprocess.run(
+            [
+                sys.executable, 'manage.py', 'benchmark_db_concurrency', '--json',
+                '--threads', str(options['threads']), '--writes', str(options['writes']),
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DATABASE_PROFILE': profile},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Profil {profile} : {completed.stderr.strip()}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _print_table(self, results):
+        self.stdout.write('')
+        self.stdout.write(''.join(label.rjust(width) if i else label.ljust(width)
+                                  for i, (_, label, width) in enumerate(COLUMNS)))
+        for result in results:
+            self.stdout.write(''.join(
+                str(result[key] if result[key] is not None else '-').rjust(width) if i
+                else str(result[key]).ljust(width)
+                for i, (key, _, width) in enumerate(COLUMNS)
+            ))
+        self.stdout.write('')
@@ -0,0 +1,47 @@
+"""
+Plans d'execution des requetes critiques.
+
+Affiche le plan de chaque requete (EXPLAIN QUERY PLAN sous SQLite) et
+signale les parcours complets de table. Code de sortie en erreur si un
+parcours complet est detecte (utilisable en integration continue).
+
+Usage:
+    python manage.py explain_queries
+    python manage.py explain_queries --only landings_90_days reservation_overlap --sql
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.query_plans import explain_queries, query_names
+
+
+class Command(BaseCommand):
+    help = 'Plans d\'execution des requetes critiques (detection des parcours complets de table)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=query_names(), help='Requetes a expliquer')
+        parser.add_argument('--sql', action='store_true', help='Afficher aussi le SQL genere')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"[*] Plans d'execution ({connection.vendor})...")
+        results = explain_queries(options['only'])
+
+        flagged = []
+        for result in results:
+            self.stdout.write('')
+            if result['full_scans']:
+                flagged.append(result['name'])
+                self.stdout.write(self.style.WARNING(
+                    f"[!] {result['name']} : parcours complet de {', '.join(result['full_scans'])}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[OK] {result['name']}"))
+            if options['sql']:
+                self.stdout.write(f"    {result['sql']}")
+            for line in result['plan'].splitlines():
+                self.stdout.write(f"    {line}")
+
+        self.stdout.write('')
+        if flagged:
+            raise CommandError(f"Parcours complet de table : {', '.join(flagged)}")
+        self.stdout.write(self.style.SUCCESS(f"[OK] {len(results)} requetes, aucun parcours complet"))
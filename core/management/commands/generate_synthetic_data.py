@@ -0,0 +1,557 @@
+"""
+Commande pour generer un jeu de donnees synthetique de grande taille
+(benchmarks, mesures de performance).
+
+Toutes les donnees sont creees par bulk_create, par lots, a partir d'une
+graine fixe : deux executions avec les memes options produisent le meme jeu.
+Les objets generes sont prefixes (utilisateurs 'synth_', avions 'F-S...')
+pour pouvoir etre supprimes sans toucher aux donnees reelles.
+
+Usage:
+    python manage.py generate_synthetic_data --preset small
+    python manage.py generate_synthetic_data --preset large --seed 42 --flush
+    python manage.py generate_synthetic_data --flush-only
+"""
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from alerts.models import Alert
+from finance.models import Transaction
+from finance.services import rebuild_ledger_totals
+from fleet.models import Aircraft, Flight, MaintenanceDeadline
+from instruction.models import (
+    Lesson, TrainingProgram, TrainingExercise, StudentProgression, ExerciseProgress
+)
+from instruction.services import read_training_program, sync_training_program
+from members.models import Member
+from planning.models import Reservation
+
+
+USERNAME_PREFIX = 'synth_'
+REGISTRATION_PREFIX = 'F-S'
+
+PRESETS = {
+    'tiny': {
+        'aircraft': 3, 'members': 20, 'flights': 1_000, 'reservations': 500,
+        'credits': 200, 'lessons': 100, 'alerts': 50,
+    },
+    'small': {
+        'aircraft': 5, 'members': 100, 'flights': 10_000, 'reservations': 4_000,
+        'credits': 2_000, 'lessons': 1_000, 'alerts': 500,
+    },
+    'medium': {
+        'aircraft': 20, 'members': 500, 'flights': 100_000, 'reservations': 40_000,
+        'credits': 15_000, 'lessons': 8_000, 'alerts': 2_000,
+    },
+    'large': {
+        'aircraft': 50, 'members': 2_000, 'flights': 500_000, 'reservations': 200_000,
+        'credits': 60_000, 'lessons': 40_000, 'alerts': 10_000,
+    },
+}
+
+FIRST_NAMES = [
+    'Jean', 'Marie', 'Pierre', 'Sophie', 'Luc', 'Claire', 'Paul', 'Julie', 'Marc', 'Anne',
+    'Thomas', 'Camille', 'Nicolas', 'Laura', 'Julien', 'Emma', 'Antoine', 'Chloe', 'Hugo', 'Lea',
+]
+LAST_NAMES = [
+    'MARTIN', 'BERNARD', 'DUBOIS', 'THOMAS', 'ROBERT', 'RICHARD', 'PETIT', 'DURAND', 'LEROY',
+    'MOREAU', 'SIMON', 'LAURENT', 'LEFEBVRE', 'MICHEL', 'GARCIA', 'DAVID', 'BERTRAND', 'ROUX',
+    'VINCENT', 'FOURNIER', 'MOREL', 'GIRARD', 'ANDRE', 'MERCIER', 'DUPONT', 'LAMBERT',
+]
+AIRCRAFT_MODELS = [
+    ('Robin DR400-120', 'Robin', Decimal('145.00')),
+    ('Robin DR400-160', 'Robin', Decimal('175.00')),
+    ('Cessna 172 Skyhawk', 'Cessna', Decimal('165.00')),
+    ('Piper PA28-161', 'Piper', Decimal('155.00')),
+    ('Aquila A210', 'Aquila', Decimal('140.00')),
+    ('Cap 10', 'Mudry', Decimal('190.00')),
+]
+AIRPORTS = ['LFNE', 'LFMV', 'LFMT', 'LFMN', 'LFML', 'LFTH', 'LFNA', 'LFMA', 'LFKC', 'LFLY']
+FLIGHT_TYPES = [
+    ('LOCAL', 40), ('NAV', 25), ('INSTRUCTION', 30), ('CHECK', 3), ('FERRY', 1), ('MAINTENANCE', 1),
+]
+LESSON_TITLES = [
+    'Tours de piste', 'Maniabilite', 'Decrochages', 'Navigation', 'Pannes moteur',
+    'Vent de travers', 'Radionavigation', 'Vol de synthese',
+]
+ALERT_TYPES = ['MEDICAL', 'LICENSE', 'EXPERIENCE', 'BALANCE', 'MAINTENANCE', 'COTISATION']
+SEVERITIES = ['INFO', 'WARNING', 'CRITICAL', 'BLOCKING']
+
+
+def weighted_choice(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+class Command(BaseCommand):
+    help = 'Genere un jeu de donnees synthetique volumineux et reproductible (benchmarks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--preset',
+            choices=sorted(PRESETS),
+            default='small',
+            help='Taille du jeu de donnees (defaut: small)',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Graine aleatoire (defaut: 1)')
+        parser.add_argument('--batch-size', type=int, default=5_000, help='Taille des lots bulk_create')
+        parser.add_argument('--years', type=int, default=3, help="Profondeur d'historique en annees")
+        parser.add_argument(
+            '--reference-date',
+            help="Date de reference AAAA-MM-JJ (defaut: aujourd'hui), pour des jeux identiques d'un jour a l'autre",
+        )
+        for name in ('aircraft', 'members', 'flights', 'reservations', 'credits', 'lessons', 'alerts'):
+            parser.add_argument(f'--{name}', type=int, help=f'Surcharger le nombre de {name} du preset')
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Supprimer les donnees synthetiques existantes avant generation',
+        )
+        parser.add_argument(
+            '--flush-only',
+            action='store_true',
+            help='Supprimer les donnees synthetiques existantes et quitter',
+        )
+
+    # ============================================================
+    # POINT D'ENTREE
+    # ============================================================
+
+    def handle(self, *args, **options):
+        if options['flush'] or options['flush_only']:
+            self.flush()
+            if options['flush_only']:
+                return
+
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(
+                "Des donnees synthetiques existent deja. Relancer avec --flush pour les regenerer."
+            )
+
+        sizes = dict(PRESETS[options['preset']])
+        for name in sizes:
+            if options.get(name) is not None:
+                sizes[name] = options[name]
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = (
+            date.fromisoformat(options['reference_date']) if options['reference_date'] else date.today()
+        )
+        self.start_date = self.today - timedelta(days=365 * options['years'])
+        self.tz = timezone.get_current_timezone()
+
+        self.stdout.write(
+            f"[*] Generation preset '{options['preset']}' (graine {options['seed']}) : "
+            + ", ".join(f"{k}={v}" for k, v in sizes.items())
+        )
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            self.step('Avions', self.create_aircraft, sizes['aircraft'])
+            self.step('Membres', self.create_members, sizes['members'])
+            self.step('Vols + debits', self.create_flights, sizes['flights'])
+            self.step('Credits', self.create_credits, sizes['credits'])
+            self.step('Soldes et compteurs', self.update_totals)
+            self.step('Cumuls mensuels finance', rebuild_ledger_totals)
+            self.step('Echeances maintenance', self.create_deadlines)
+            self.step('Reservations', self.create_reservations, sizes['reservations'])
+            self.step('Progressions + lecons', self.create_instruction, sizes['lessons'])
+            self.step('Alertes', self.create_alerts, sizes['alerts'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] Donnees synthetiques generees en {time.perf_counter() - started:.1f}s"
+        ))
+
+    def step(self, label, func, *args):
+        started = time.perf_counter()
+        count = func(*args)
+        suffix = f" : {count} ligne(s)" if count is not None else ""
+        self.stdout.write(f"  - {label}{suffix} ({time.perf_counter() - started:.1f}s)")
+
+    def bulk(self, model, objects):
+        """bulk_create par lots a partir d'un iterable (memoire constante)."""
+        batch = []
+        total = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                total += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            total += len(batch)
+        return total
+
+    def aware(self, day, hour=12, minute=0):
+        return timezone.make_aware(datetime.combine(day, dtime(hour, minute)), self.tz)
+
+    def random_day(self, start=None, end=None):
+        start = start or self.start_date
+        end = end or self.today
+        return start + timedelta(days=self.rng.randint(0, (end - start).days))
+
+    # ============================================================
+    # SUPPRESSION
+    # ============================================================
+
+    def flush(self):
+        self.stdout.write("[*] Suppression des donnees synthetiques...")
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        aircraft = Aircraft.objects.filter(registration__startswith=REGISTRATION_PREFIX)
+        with transaction.atomic():
+            # Ordre explicite : les tables volumineuses sont videes par lots SQL
+            Transaction.objects.filter(user__in=users).delete()
+            Lesson.objects.filter(student__in=users).delete()
+            Reservation.objects.filter(aircraft__in=aircraft).delete()
+            Reservation.objects.filter(user__in=users).delete()
+            Alert.objects.filter(unique_key__startswith=USERNAME_PREFIX).delete()
+            Flight.objects.filter(aircraft__in=aircraft).delete()
+            Flight.objects.filter(pilot__in=users).delete()
+            StudentProgression.objects.filter(student__in=users).delete()
+            aircraft.delete()
+            users.delete()
+            rebuild_ledger_totals()
+        self.stdout.write(self.style.SUCCESS("[OK] Donnees synthetiques supprimees"))
+
+    # ============================================================
+    # GENERATEURS
+    # ============================================================
+
+    def create_aircraft(self, count):
+        rng = self.rng
+        objects = []
+        for i in range(count):
+            model_name, manufacturer, rate = AIRCRAFT_MODELS[i % len(AIRCRAFT_MODELS)]
+            objects.append(Aircraft(
+                registration=f"{REGISTRATION_PREFIX}{i + 1:04d}",
+                model_name=model_name,
+                manufacturer=manufacturer,
+                hourly_rate=rate,
+                hourly_rate_instruction=rate + Decimal('10.00'),
+                current_hours=Decimal(rng.randint(500, 6000)),
+                engine_tbo=2000,
+                engine_tsoh=Decimal(rng.randint(0, 1500)),
+                status='AVAILABLE' if rng.random() > 0.1 else 'MAINTENANCE',
+                cdn_expiry_date=self.today + timedelta(days=rng.randint(-30, 700)),
+                insurance_expiry=self.today + timedelta(days=rng.randint(-10, 365)),
+            ))
+        self.bulk(Aircraft, objects)
+
+        self.aircraft = list(
+            Aircraft.objects.filter(registration__startswith=REGISTRATION_PREFIX).order_by('registration')
+        )
+        return len(self.aircraft)
+
+    def create_deadlines(self):
+        """Visites 50h et annuelles, calees sur les compteurs apres les vols."""
+        rng = self.rng
+        deadlines = []
+        for aircraft in self.aircraft:
+            deadlines.append(MaintenanceDeadline(
+                aircraft=aircraft, deadline_type='50H', title='Visite 50h',
+                due_at_hours=aircraft.current_hours + rng.randint(-5, 50),
+            ))
+            deadlines.append(MaintenanceDeadline(
+                aircraft=aircraft, deadline_type='ANNUAL', title='Visite annuelle',
+                due_at_date=self.today + timedelta(days=rng.randint(-10, 365)),
+            ))
+        return self.bulk(MaintenanceDeadline, deadlines)
+
+    def create_members(self, count):
+        rng = self.rng
+        password = make_password('password123')  # Un seul hachage pour tous
+        users = (
+            User(
+                username=f"{USERNAME_PREFIX}{i + 1:05d}",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                email=f"{USERNAME_PREFIX}{i + 1:05d}@example.com",
+                password=password,
+            )
+            for i in range(count)
+        )
+        self.bulk(User, users)
+        user_ids = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('username').values_list('id', flat=True)
+        )
+
+        members = []
+        for i, user_id in enumerate(user_ids):
+            is_instructor = rng.random() < 0.08
+            is_student = not is_instructor and rng.random() < 0.2
+            license_type = 'NONE' if is_student else weighted_choice(rng, [('PPL', 80), ('LAPL', 10), ('CPL', 10)])
+            members.append(Member(
+                user_id=user_id,
+                member_number=f"SYN{i + 1:05d}",
+                license_type=license_type,
+                has_sep=license_type != 'NONE',
+                sep_validity=self.today + timedelta(days=rng.randint(-60, 730)) if license_type != 'NONE' else None,
+                has_fi=is_instructor,
+                medical_class='CLASS2',
+                medical_validity=self.today + timedelta(days=rng.randint(-90, 1800)),
+                club_subscription_validity=self.today + timedelta(days=rng.randint(-30, 365)),
+                ffa_subscription_validity=self.today + timedelta(days=rng.randint(-30, 365)),
+                insurance_validity=self.today + timedelta(days=rng.randint(-30, 365)),
+                is_instructor=is_instructor,
+                is_student=is_student,
+                join_date=self.random_day(),
+            ))
+        self.bulk(Member, members)
+
+        self.user_ids = user_ids
+        self.instructor_ids = [m.user_id for m in members if m.is_instructor] or user_ids[:1]
+        self.student_ids = [m.user_id for m in members if m.is_student]
+        self.balances = {user_id: Decimal('0.00') for user_id in user_ids}
+        return len(members)
+
+    def create_flights(self, count):
+        """Vols par avion, compteurs continus, debit associe a chaque vol."""
+        rng = self.rng
+        self.aircraft_totals = {}
+        per_aircraft = [count // len(self.aircraft)] * len(self.aircraft)
+        for i in range(count % len(self.aircraft)):
+            per_aircraft[i] += 1
+
+        flights = []
+        debits = []
+        created = 0
+        for aircraft, n in zip(self.aircraft, per_aircraft):
+            meter = aircraft.current_hours
+            cycles = 0
+            span = (self.today - self.start_date).days
+            days = sorted(rng.randint(0, span) for _ in range(n))
+            for offset in days:
+                day = self.start_date + timedelta(days=offset)
+                flight_type = weighted_choice(rng, FLIGHT_TYPES)
+                if flight_type == 'INSTRUCTION' and self.student_ids:
+                    pilot_id = rng.choice(self.student_ids)
+                    copilot_id = rng.choice(self.instructor_ids)
+                    rate = aircraft.hourly_rate_instruction
+                else:
+                    pilot_id = rng.choice(self.user_ids)
+                    copilot_id = None
+                    rate = aircraft.hourly_rate
+                duration = Decimal(rng.randint(30, 250)) / 100
+                landings = rng.randint(1, 8) if flight_type in ('INSTRUCTION', 'LOCAL') else rng.randint(1, 3)
+                start_hour = rng.randint(7, 18)
+                cost = (duration * rate).quantize(Decimal('0.01'))
+                departure = 'LFNE'
+                arrival = rng.choice(AIRPORTS) if flight_type == 'NAV' else 'LFNE'
+
+                flights.append(Flight(
+                    aircraft_id=aircraft.id,
+                    pilot_id=pilot_id,
+                    copilot_id=copilot_id,
+                    date=day,
+                    flight_type=flight_type,
+                    departure_airport=departure,
+                    arrival_airport=arrival,
+                    hour_meter_start=meter,
+                    hour_meter_end=meter + duration,
+                    block_off=dtime(start_hour, rng.choice([0, 15, 30, 45])),
+                    block_on=dtime(min(start_hour + 1 + int(duration), 23), rng.choice([0, 15, 30, 45])),
+                    landings_count=landings,
+                    landings_day=landings,
+                    passengers_count=rng.randint(0, 2) if flight_type in ('LOCAL', 'NAV') else 0,
+                    fuel_added=Decimal(rng.choice([0, 0, 20, 40, 60])),
+                    duration=duration,
+                    cost=cost,
+                ))
+                debits.append(Transaction(
+                    user_id=pilot_id,
+                    aircraft_id=aircraft.id,
+                    amount=cost,
+                    type='DEBIT',
+                    description=f"Vol {aircraft.registration} ({duration}h) - {dict(Flight.FLIGHT_TYPES)[flight_type]}",
+                    date=self.aware(day, start_hour),
+                ))
+                self.balances[pilot_id] -= cost
+                meter += duration
+                cycles += landings
+
+                if len(flights) >= self.batch_size:
+                    created += self.bulk(Flight, flights)
+                    self.bulk(Transaction, debits)
+                    flights, debits = [], []
+
+            self.aircraft_totals[aircraft.id] = (meter, cycles)
+
+        created += self.bulk(Flight, flights)
+        self.bulk(Transaction, debits)
+        return created
+
+    def create_credits(self, count):
+        """
+        Versements repartis au prorata des debits de chaque membre, de sorte
+        que les soldes finaux soient realistes (environ 10% negatifs).
+        """
+        rng = self.rng
+        debits = {user_id: -balance for user_id, balance in self.balances.items()}
+        total_debits = sum(debits.values()) or Decimal('1')
+
+        def credits():
+            for user_id in self.user_ids:
+                target = Decimal(rng.randint(-200, 1500) if rng.random() < 0.1 else rng.randint(50, 1500))
+                total = max(debits[user_id] + target, Decimal('50'))
+                n = max(1, round(count * debits[user_id] / total_debits))
+                part = (total / n).quantize(Decimal('0.01'))
+                for k in range(n):
+                    amount = part if k < n - 1 else total - part * (n - 1)
+                    self.balances[user_id] += amount
+                    yield Transaction(
+                        user_id=user_id,
+                        amount=amount,
+                        type='CREDIT',
+                        description=rng.choice(['Versement cheque', 'Virement', 'Carte bancaire']),
+                        date=self.aware(self.random_day(), rng.randint(8, 19)),
+                    )
+
+        return self.bulk(Transaction, credits())
+
+    def update_totals(self):
+        """Reporte en masse ce que Flight.save / Transaction.save font ligne a ligne."""
+        members = list(Member.objects.filter(user_id__in=self.user_ids))
+        for member in members:
+            member.account_balance = self.balances[member.user_id]
+        Member.objects.bulk_update(members, ['account_balance'], batch_size=self.batch_size)
+
+        for aircraft in self.aircraft:
+            meter, cycles = self.aircraft_totals.get(aircraft.id, (aircraft.current_hours, 0))
+            flown = meter - aircraft.current_hours
+            aircraft.current_hours = meter
+            aircraft.engine_hours = meter
+            aircraft.propeller_hours = meter
+            aircraft.engine_tsoh += flown
+            aircraft.cycles_count += cycles
+        Aircraft.objects.bulk_update(
+            self.aircraft,
+            ['current_hours', 'engine_hours', 'propeller_hours', 'engine_tsoh', 'cycles_count'],
+        )
+        return len(members) + len(self.aircraft)
+
+    def create_reservations(self, count):
+        """Creneaux sans chevauchement par avion, passes et a venir."""
+        rng = self.rng
+        per_aircraft = max(count // len(self.aircraft), 1)
+        window_start = self.aware(self.start_date, 8)
+        window_end = self.aware(self.today + timedelta(days=60), 20)
+        window_hours = (window_end - window_start).total_seconds() / 3600
+        mean_step = max(window_hours / per_aircraft, 2.0)
+        now = self.aware(self.today, 12)
+
+        def reservations():
+            produced = 0
+            for aircraft in self.aircraft:
+                cursor = window_start
+                for _ in range(per_aircraft):
+                    if produced >= count:
+                        return
+                    duration = timedelta(hours=rng.choice([1, 1.5, 2, 2, 3]))
+                    gap = timedelta(hours=rng.uniform(0, 2 * mean_step - duration.total_seconds() / 3600))
+                    start = cursor + gap
+                    end = start + duration
+                    cursor = end
+                    if start >= now:
+                        status = 'CANCELLED' if rng.random() < 0.05 else weighted_choice(rng, [('CONFIRMED', 90), ('PENDING', 10)])
+                    else:
+                        status = 'CANCELLED' if rng.random() < 0.08 else 'COMPLETED'
+                    is_instruction = bool(self.student_ids) and rng.random() < 0.3
+                    user_id = rng.choice(self.student_ids) if is_instruction else rng.choice(self.user_ids)
+                    produced += 1
+                    yield Reservation(
+                        user_id=user_id,
+                        aircraft_id=aircraft.id,
+                        start_time=start,
+                        end_time=end,
+                        title='Instruction' if is_instruction else 'Vol local',
+                        is_instruction=is_instruction,
+                        instructor_id=rng.choice(self.instructor_ids) if is_instruction else None,
+                        status=status,
+                        eligibility_checked=True,
+                    )
+
+        return self.bulk(Reservation, reservations())
+
+    def create_instruction(self, count):
+        rng = self.rng
+        if not TrainingExercise.objects.filter(phase__program__code='PPL').exists():
+            sync_training_program(read_training_program('ppl'))
+        program = TrainingProgram.objects.get(code='PPL')
+        exercise_ids = list(TrainingExercise.objects.filter(phase__program=program).order_by(
+            'phase__order', 'order',
+        ).values_list('id', flat=True))
+        if not self.student_ids:
+            return 0
+
+        self.bulk(StudentProgression, (
+            StudentProgression(
+                student_id=student_id,
+                program=program,
+                primary_instructor_id=rng.choice(self.instructor_ids),
+                enrollment_date=self.random_day(),
+                total_instruction_hours=Decimal(rng.randint(0, 450)) / 10,
+            )
+            for student_id in self.student_ids
+        ))
+
+        progress_ids = StudentProgression.objects.filter(
+            student_id__in=self.student_ids
+        ).values_list('id', flat=True)
+
+        def progress():
+            for progression_id in progress_ids:
+                reached = rng.randint(0, len(exercise_ids))
+                for exercise_id in exercise_ids[:reached]:
+                    yield ExerciseProgress(
+                        student_progression_id=progression_id,
+                        exercise_id=exercise_id,
+                        level=rng.choice(['P', 'E', 'A', 'A', '+']),
+                        last_practiced=self.random_day(),
+                    )
+
+        self.bulk(ExerciseProgress, progress())
+
+        lessons = (
+            Lesson(
+                student_id=rng.choice(self.student_ids),
+                instructor_id=rng.choice(self.instructor_ids),
+                date=self.aware(self.random_day(), rng.randint(8, 18)),
+                lesson_type=weighted_choice(rng, [('INSTRUCTION', 80), ('SOLO_SUP', 10), ('BRIEFING', 10)]),
+                title=rng.choice(LESSON_TITLES),
+                comments='Seance synthetique',
+                grade=rng.randint(1, 5),
+            )
+            for _ in range(count)
+        )
+        return self.bulk(Lesson, lessons)
+
+    def create_alerts(self, count):
+        rng = self.rng
+
+        def alerts():
+            for i in range(count):
+                alert_type = rng.choice(ALERT_TYPES)
+                is_aircraft = alert_type == 'MAINTENANCE'
+                yield Alert(
+                    user_id=None if is_aircraft else rng.choice(self.user_ids),
+                    related_aircraft_id=rng.choice(self.aircraft).id if is_aircraft else None,
+                    alert_type=alert_type,
+                    severity=rng.choice(SEVERITIES),
+                    status=weighted_choice(rng, [('ACTIVE', 60), ('ACKNOWLEDGED', 15), ('RESOLVED', 25)]),
+                    title=f"Alerte synthetique {alert_type}",
+                    message='Alerte generee pour les benchmarks.',
+                    expires_at=self.today + timedelta(days=rng.randint(-30, 60)),
+                    unique_key=f"{USERNAME_PREFIX}{i + 1:07d}",
+                )
+
+        return self.bulk(Alert, alerts())
@@ -0,0 +1,131 @@
+"""
+Commande de benchmark des endpoints critiques.
+
+Mesure temps de reponse (percentiles) et nombre de requetes SQL par endpoint,
+enregistre les resultats en JSON pour comparaison entre commits et echoue
+si un budget de requetes est depasse.
+
+Usage:
+    python manage.py generate_synthetic_data --preset medium
+    python manage.py run_benchmarks
+    python manage.py run_benchmarks --only events_api scan_member --iterations 50
+    python manage.py run_benchmarks --compare benchmark_results/abc1234.json
+"""
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import (
+    SCENARIOS, dataset_summary, failed_statuses, get_query_budgets, run_benchmarks,
+)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark des endpoints critiques (temps de reponse et budgets de requetes SQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=[s.name for s in SCENARIOS],
+            help='Limiter aux scenarios indiques',
+        )
+        parser.add_argument('--iterations', type=int, default=20, help='Iterations mesurees (defaut: 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Iterations de chauffe (defaut: 2)')
+        parser.add_argument('--output', help='Fichier JSON de resultats (defaut: benchmark_results/<commit>.json)')
+        parser.add_argument('--compare', help='Fichier JSON de reference a comparer')
+        parser.add_argument('--budgets', help='Fichier JSON de budgets {scenario: nb_requetes_max}')
+        parser.add_argument(
+            '--no-fail',
+            action='store_true',
+            help='Ne pas echouer en cas de depassement de budget',
+        )
+
+    def handle(self, *args, **options):
+        budgets = get_query_budgets(options['budgets'])
+        revision = git_revision()
+
+        self.stdout.write("[*] Benchmark en cours...")
+        try:
+            results = run_benchmarks(options['only'], options['iterations'], options['warmup'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'git_revision': revision,
+                'database': settings.DATABASES['default']['ENGINE'],
+                'iterations': options['iterations'],
+                'dataset': dataset_summary(),
+            },
+            'budgets': budgets,
+            'results': results,
+        }
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmark_results' / f"{revision or 'latest'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f).get('results', {})
+
+        self.stdout.write(
+            f"\n{'Scenario':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL':>6}{'Budget':>8}  Statut"
+        )
+        over_budget = []
+        failed = []
+        for name, res in results.items():
+            budget = budgets.get(name)
+            exceeded = budget is not None and res['queries'] > budget
+            if exceeded:
+                over_budget.append(name)
+            errored = bool(failed_statuses(res))
+            if errored:
+                failed.append(name)
+            line = (
+                f"{name:<26}{res['p50_ms']:>10.1f}{res['p95_ms']:>10.1f}{res['p99_ms']:>10.1f}"
+                f"{res['queries']:>6}{budget if budget is not None else '-':>8}  "
+                f"{','.join(str(s) for s in res['status_codes'])}"
+            )
+            ref = baseline.get(name)
+            if ref:
+                delta = (res['p50_ms'] - ref['p50_ms']) / ref['p50_ms'] * 100 if ref['p50_ms'] else 0
+                line += f"  (ref p50 {ref['p50_ms']:.1f} ms {delta:+.0f}%, SQL {ref['queries']})"
+            if exceeded or errored:
+                self.stdout.write(self.style.ERROR(line))
+                for error in res.get('errors', []):
+                    self.stdout.write(self.style.ERROR(f"    [!] {error}"))
+            else:
+                self.stdout.write(line)
+
+        self.stdout.write(f"\nResultats enregistres dans {output}")
+
+        # Une reponse en erreur ne mesure rien : echec meme avec --no-fail
+        if failed:
+            raise CommandError(f"Reponses en erreur (hors 2xx/3xx ou refus) : {', '.join(failed)}")
+
+        if over_budget:
+            message = f"Budget de requetes depasse : {', '.join(over_budget)}"
+            if options['no_fail']:
+                self.stdout.write(self.style.WARNING(message))
+            else:
+                raise CommandError(message)
+        else:
+            self.stdout.write(self.style.SUCCESS("[OK] Tous les budgets de requetes sont respectes"))
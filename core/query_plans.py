@@ -0,0 +1,108 @@
+"""
+Plans d'execution des requetes critiques de l'application.
+
+Chaque requete est construite avec l'ORM (la meme forme que dans les vues et
+services), expliquee par la base (EXPLAIN QUERY PLAN sous SQLite, EXPLAIN
+sous PostgreSQL) puis analysee : un parcours complet d'une table (SCAN sans
+index, Seq Scan) est signale. Utilise par la commande explain_queries.
+"""
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+
+# Valeurs de parametres : le plan ne depend pas de l'existence des lignes
+SAMPLE_ID = 1
+
+
+def _queries():
+    from fleet.models import Flight
+    from finance.models import Transaction
+    from instruction.models import ExerciseProgress
+    from members.models import Member, MemberDocument
+    from members.services import member_status_queryset
+    from planning.models import Reservation
+
+    today = date.today()
+    now = timezone.now()
+
+    return {
+        'landings_90_days': lambda: Flight.objects.filter(
+            pilot_id=SAMPLE_ID, date__gte=today - timedelta(days=90),
+        ),
+        'member_status': lambda: member_status_queryset(today).filter(pk=SAMPLE_ID),
+        'aircraft_flight_log': lambda: Flight.objects.filter(aircraft_id=SAMPLE_ID)[:50],
+        'meter_neighbour': lambda: Flight.objects.filter(
+            aircraft_id=SAMPLE_ID, hour_meter_start__lte=100,
+        ).order_by('-hour_meter_start').values('id', 'hour_meter_start', 'hour_meter_end')[:1],
+        'reservation_overlap': lambda: Reservation.objects.filter(
+            aircraft_id=SAMPLE_ID,
+            status__in=['PENDING', 'CONFIRMED'],
+            start_time__lt=now + timedelta(hours=2),
+            end_time__gt=now,
+        ),
+        'ledger_statement': lambda: Transaction.objects.filter(
+            user_id=SAMPLE_ID,
+        ).order_by('-date', '-id')[:50],
+        'current_document': lambda: MemberDocument.objects.filter(
+            member_id=SAMPLE_ID, document_type='MEDICAL', is_current=True,
+        ),
+        'progression_levels': lambda: ExerciseProgress.objects.filter(
+            student_progression_id=SAMPLE_ID,
+        ).values('level').annotate(n=Count('id')).order_by(),
+        'medical_expiry': lambda: Member.objects.filter(
+            medical_validity__isnull=False,
+            medical_validity__lte=today + timedelta(days=60),
+        ).select_related('user'),
+    }
+
+
+def query_names():
+    return list(_queries())
+
+
+# ============================================================
+# ANALYSE DES PLANS
+# ============================================================
+
+# SQLite : "SCAN fleet_flight" (sans index) ; "SCAN t USING INDEX ..." est un
+# parcours d'index, pas de la table
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(.*)$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)()')
+
+
+def full_scans(plan, vendor=None):
+    """Tables parcourues entierement d'apres le texte d'un plan."""
+    vendor = vendor or connection.vendor
+    pattern = POSTGRES_SCAN if vendor == 'postgresql' else SQLITE_SCAN
+    tables = []
+    for line in plan.splitlines():
+        match = pattern.search(line)
+        if match and 'USING' not in match.group(2):
+            tables.append(match.group(1))
+    return tables
+
+
+def explain_queries(only=None):
+    """
+    Plan de chaque requete critique.
+
+    Returns:
+        Liste de dict (name, sql, plan, full_scans)
+    """
+    results = []
+    for name, build in _queries().items():
+        if only and name not in only:
+            continue
+        queryset = build()
+        plan = queryset.explain()
+        results.append({
+            'name': name,
+            'sql': str(queryset.query),
+            'plan': plan,
+            'full_scans': full_scans(plan),
+        })
+    return results
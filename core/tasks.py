@@ -0,0 +1,53 @@
+"""
+Outils communs aux taches Celery des applications.
+
+single_instance empeche deux executions simultanees d'une meme tache (beat
+qui relance une tache encore en cours, double clic, reprise apres perte du
+worker) : la seconde execution s'arrete sans rien traiter.
+
+    @shared_task
+    @single_instance('alerts:checks', timeout=30 * 60)
+    def run_alert_checks(): ...
+"""
+import functools
+import inspect
+import logging
+
+from .cache import CacheNamespace
+
+
+logger = logging.getLogger(__name__)
+
+TASK_LOCKS = CacheNamespace('tasks')
+DEFAULT_LOCK_TIMEOUT = 10 * 60
+
+# Resultat d'une execution ecartee (une autre est en cours)
+SKIPPED = {'skipped': True}
+
+
+def single_instance(key, timeout=DEFAULT_LOCK_TIMEOUT):
+    """
+    Une seule execution a la fois par cle.
+
+    Args:
+        key: nom du verrou, ou gabarit formate avec les arguments de la
+             tache ('exports:{job_id}')
+        timeout: duree maximale d'une execution en secondes (le verrou
+                 expire ensuite)
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            lock_key = key.format(**bound.arguments)
+
+            with TASK_LOCKS.lock(lock_key, timeout) as acquired:
+                if not acquired:
+                    logger.info("Tache %s deja en cours, execution ignoree", lock_key)
+                    return SKIPPED
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,3 +1,249 @@
-from django.test import TestCase
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from aeroclub_project.celery import refuse_unshared_cache
+from alerts.models import Alert
+from fleet.models import Aircraft, MaintenanceDeadline
+from members.models import Member, MemberDocument
+from planning.models import Reservation
+from .benchmarks import SCENARIOS, BenchmarkContext, failed_statuses, run_scenario
+from .cache import CacheNamespace
+from .checks import check_celery_cache
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FILE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+
+
+# ============================================================
+# CONFIGURATION CELERY / CACHE
+# ============================================================
+
+class CeleryCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM, CELERY_TASK_ALWAYS_EAGER=False)
+    def test_workers_with_process_local_cache_are_refused(self):
+        self.assertEqual([error.id for error in check_celery_cache(None)], ['core.E001'])
+        with self.assertRaises(ImproperlyConfigured):
+            refuse_unshared_cache()
+
+    @override_settings(CACHES=LOCMEM, CELERY_TASK_ALWAYS_EAGER=True)
+    def test_eager_tasks_accept_locmem(self):
+        self.assertEqual(check_celery_cache(None), [])
+
+    @override_settings(CACHES=FILE, CELERY_TASK_ALWAYS_EAGER=False)
+    def test_shared_cache_is_accepted(self):
+        self.assertEqual(check_celery_cache(None), [])
+        refuse_unshared_cache()
+
+
+# ============================================================
+# CACHE : UN SEUL CALCUL PAR CLE
+# ============================================================
+
+@override_settings(CACHES=LOCMEM)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.namespace = CacheNamespace(f"tests.{self._testMethodName}")
+
+    def run_threads(self, *targets):
+        threads = [threading.Thread(target=target) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+    def test_concurrent_callers_compute_once(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 42
+
+        def call():
+            results.append(self.namespace.get_or_set('key', compute))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        release.set()
+        leader.join(5)
+        waiter.join(5)
+        self.assertEqual((calls, results), ([1], [42, 42]))
+
+    def test_other_keys_are_not_blocked_by_a_slow_computation(self):
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def slow():
+            started.set()
+            return release.wait(5) and 1
+
+        slow_thread = threading.Thread(target=lambda: self.namespace.get_or_set('slow', slow))
+        slow_thread.start()
+        started.wait(5)
+        # Assez de cles pour qu'un verrou reparti par hachage soit partage
+        self.run_threads(*[
+            (lambda n=n: results.append(self.namespace.get_or_set(f"key:{n}", lambda: n)))
+            for n in range(200)
+        ])
+        release.set()
+        slow_thread.join(5)
+        self.assertEqual(sorted(results), list(range(200)))
+
+    @override_settings(CACHES={'default': {**LOCMEM['default'], 'TIMEOUT': 0}})
+    def test_default_ttl_is_the_backend_timeout(self):
+        # TIMEOUT=0 : rien n'est conserve si la duree du backend s'applique
+        self.namespace.set('key', 1)
+        self.assertIsNone(self.namespace.get('key'))
+        calls = []
+        for _ in range(2):
+            self.namespace.get_or_set('computed', lambda: calls.append(1) or 1)
+        self.assertEqual(len(calls), 2)
+
+        self.namespace.set('forever', 1, None)
+        self.assertEqual(self.namespace.get('forever'), 1)
+
+    def test_nested_calls_do_not_deadlock(self):
+        def outer():
+            inner = self.namespace.get_or_set('inner', lambda: 1)
+            same = self.namespace.get_or_set('outer', lambda: 10)
+            return inner + same
+
+        results = []
+        self.run_threads(lambda: results.append(self.namespace.get_or_set('outer', outer)))
+        self.assertEqual(results, [11])
+
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+
+@override_settings(REQUEST_STATS_SLOW_MS=60 * 1000)
+class CreateReservationScenarioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        valid = date.today() + timedelta(days=365)
+        cls.user = User.objects.create_user('pilote', last_name='Martin')
+        cls.member = Member.objects.create(
+            user=cls.user, license_type='PPL', medical_validity=valid, has_sep=True, sep_validity=valid,
+            club_subscription_validity=valid, account_balance=Decimal('500'),
+        )
+        cls.plane = Aircraft.objects.create(
+            registration='F-GABC', model_name='DR400', hourly_rate=150,
+            cdn_expiry_date=valid, insurance_expiry=valid,
+        )
+        start = timezone.make_aware(datetime.combine(date.today() + timedelta(days=2), time(10)))
+        Reservation.objects.create(
+            user=cls.user, aircraft=cls.plane, start_time=start, end_time=start + timedelta(hours=2),
+        )
+
+    def run_create_reservation(self):
+        scenario = next(scenario for scenario in SCENARIOS if scenario.name == 'create_reservation')
+        return run_scenario(scenario, BenchmarkContext(), iterations=2, warmup=0)
+
+    def test_booked_slot_is_free_and_rolled_back(self):
+        result = self.run_create_reservation()
+        self.assertEqual(failed_statuses(result), [])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_refused_reservation_fails_the_scenario(self):
+        Member.objects.filter(pk=self.member.pk).update(medical_validity=date.today() - timedelta(days=1))
+        result = self.run_create_reservation()
+        self.assertEqual(result['status_codes'], [200])
+        self.assertTrue(failed_statuses(result))
+
+
+# ============================================================
+# LISTES DE L'ADMIN (NOMBRE DE REQUETES CONSTANT)
+# ============================================================
+
+@override_settings(REQUEST_STATS_SLOW_MS=60 * 1000)
+class AdminChangelistQueriesTests(TestCase):
+    """
+    Le nombre de requetes d'une liste de l'admin ne depend pas du nombre de
+    lignes affichees (memes listes que les scenarios admin_* de run_benchmarks).
+    """
+    CHANGELISTS = {
+        'members_member': Member,
+        'auth_user': User,
+        'fleet_aircraft': Aircraft,
+        'alerts_alert': Alert,
+        'members_memberdocument': MemberDocument,
+    }
+    PAGE_SIZE = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password=None)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        # Toutes les lignes sur une seule page
+        for model in self.CHANGELISTS.values():
+            patcher = mock.patch.object(admin.site._registry[model], 'list_per_page', self.PAGE_SIZE)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def populate(self, start, end):
+        today = date.today()
+        users = User.objects.bulk_create(
+            User(username=f"pilote{n}", last_name=f"Pilote {n}") for n in range(start, end)
+        )
+        members = Member.objects.bulk_create(
+            Member(user=user, medical_validity=today + timedelta(days=n % 60 - 30), has_sep=True)
+            for n, user in enumerate(users)
+        )
+        MemberDocument.objects.bulk_create(
+            MemberDocument(member=member, document_type='MEDICAL', title='Certificat', file='doc.pdf')
+            for member in members
+        )
+        Alert.objects.bulk_create(
+            Alert(user=user, alert_type='MEDICAL', title='Medical', message='-', unique_key=f"test_{user.pk}")
+            for user in users
+        )
+        aircraft = Aircraft.objects.bulk_create(
+            Aircraft(registration=f"F-{n:04d}", model_name='DR400', hourly_rate=150) for n in range(start, end)
+        )
+        MaintenanceDeadline.objects.bulk_create(
+            MaintenanceDeadline(aircraft=plane, title='Visite 50h', due_at_date=today - timedelta(days=1))
+            for plane in aircraft[::2]
+        )
+
+    def get_changelist(self, name):
+        response = self.client.get(reverse(f'admin:{name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.populate(0, 5)
+        baseline = {}
+        for name in self.CHANGELISTS:
+            with CaptureQueriesContext(connection) as queries:
+                self.get_changelist(name)
+            baseline[name] = len(queries)
+
+        self.populate(5, self.PAGE_SIZE)
+        for name in self.CHANGELISTS:
+            with self.subTest(changelist=name), self.assertNumQueries(baseline[name]):
+                response = self.get_changelist(name)
+            self.assertGreaterEqual(len(response.context['cl'].result_list), self.PAGE_SIZE - 5)
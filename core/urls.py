@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('stats/requests/', views.request_stats_view, name='request_stats'),
 ]
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from members.models import Member
+from .cache import cache_metrics
+from .instrumentation import request_stats, render_prometheus
 from .weather_service import WeatherService
 
 def home(request):
@@ -17,3 +21,23 @@ def home(request):
         'instructors': instructors,
         'weather': weather
     })
+
+
+@staff_member_required
+def request_stats_view(request):
+    """
+    Statistiques de performance par nom d'URL (processus courant).
+    ?format=prometheus pour le format texte Prometheus, POST pour remettre a zero.
+    """
+    if request.method == 'POST':
+        request_stats.reset()
+        cache_metrics.reset()
+        return JsonResponse({'reset': True})
+
+    snapshot = request_stats.snapshot()
+    cache_snapshot = cache_metrics.snapshot()
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(
+            render_prometheus(snapshot, cache_snapshot), content_type='text/plain; version=0.0.4'
+        )
+    return JsonResponse({'views': snapshot, 'cache': cache_snapshot})
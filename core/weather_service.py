@@ -2,6 +2,12 @@ import requests
 import re
 from datetime import datetime
 
+from .cache import CacheNamespace
+
+
+WEATHER_CACHE = CacheNamespace('weather')
+RAW_METAR_CACHE_DURATION = 300  # 5 minutes
+
 class WeatherService:
     """
     Service pour récupérer les informations météo aéronautiques (METAR).
@@ -21,14 +27,22 @@ class WeatherService:
         """
         station = station.upper()
         try:
-            response = requests.get(cls.BASE_URL.format(station=station), timeout=5)
-            if response.status_code == 200:
-                lines = response.text.splitlines()
-                if len(lines) >= 2:
-                    return lines[1] # Le METAR est sur la 2ème ligne
-            return f"Indisponible pour {station}"
+            raw = WEATHER_CACHE.get_or_set(
+                f"metar:{station}", lambda: cls._fetch_metar(station), RAW_METAR_CACHE_DURATION
+            )
         except Exception as e:
             return f"Erreur météo: {str(e)}"
+        return raw or f"Indisponible pour {station}"
+
+    @classmethod
+    def _fetch_metar(cls, station):
+        """Appel NOAA (None si indisponible, non mis en cache)."""
+        response = requests.get(cls.BASE_URL.format(station=station), timeout=5)
+        if response.status_code == 200:
+            lines = response.text.splitlines()
+            if len(lines) >= 2:
+                return lines[1] # Le METAR est sur la 2ème ligne
+        return None
 
     @classmethod
     def parse_metar(cls, raw_metar):
@@ -0,0 +1,197 @@
+"""
+Exports PDF generes en arriere-plan (tache Celery generate_pdf_export).
+
+La vue enregistre une demande (job) dans le cache et rend la main
+immediatement ; le worker genere le PDF, l'enregistre dans le stockage
+(exports/<job>/<fichier>) et met a jour le job. Le navigateur interroge
+l'etat du job puis telecharge le fichier.
+
+L'identifiant d'un job est derive de la demande (utilisateur, document,
+periode) et d'une empreinte des donnees sources (nombre, dernier id et
+somme des ecritures ou des vols), signe avec la SECRET_KEY : une demande
+identique reutilise le meme job tant que les donnees n'ont pas change, et
+toute nouvelle ecriture ou vol donne un nouveau document.
+
+Les jobs et les verrous des taches sont dans le cache : il doit etre
+partage avec les workers (voir core.checks).
+"""
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from django.utils.dateparse import parse_date
+
+from core.cache import CacheNamespace
+from .pdf_generator import render_account_statement, render_flight_log
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_JOBS = CacheNamespace('exports.jobs')
+EXPORT_JOB_TTL = 60 * 60 * 24
+
+EXPORTS_DIR = 'exports'
+EXPORT_RETENTION = timedelta(days=1)
+
+PENDING, DONE, FAILED = 'pending', 'done', 'failed'
+
+EXPORT_KINDS = ['account_statement', 'flight_log']
+
+
+def _render(kind, object_id, start_date, end_date):
+    from fleet.models import Aircraft
+    from members.models import Member
+
+    if kind == 'account_statement':
+        member = Member.objects.select_related('user').get(pk=object_id)
+        return render_account_statement(member, start_date, end_date)
+    if kind == 'flight_log':
+        return render_flight_log(Aircraft.objects.get(pk=object_id), start_date, end_date)
+    raise ValueError(f"Export inconnu : {kind}")
+
+
+def source_fingerprint(kind, object_id):
+    """
+    Empreinte des donnees d'un document (une requete d'agregation) :
+    ecritures du membre (solde compris) ou vols de l'avion.
+    """
+    from finance.models import Transaction
+    from fleet.models import Flight
+
+    if kind == 'account_statement':
+        rows = Transaction.objects.filter(user__member_profile__pk=object_id)
+        total = 'amount'
+    elif kind == 'flight_log':
+        rows = Flight.objects.filter(aircraft_id=object_id)
+        total = 'duration'
+    else:
+        raise ValueError(f"Export inconnu : {kind}")
+    values = rows.aggregate(count=Count('id'), last=Max('id'), total=Sum(total))
+    return f"{values['count']}:{values['last']}:{values['total']}"
+
+
+def export_job_id(user_id, kind, object_id, start_date=None, end_date=None, fingerprint=''):
+    request = f"{user_id}:{kind}:{object_id}:{start_date}:{end_date}:{fingerprint}"
+    return salted_hmac('exports.jobs', request, algorithm='sha256').hexdigest()[:32]
+
+
+# ============================================================
+# DEMANDE ET SUIVI
+# ============================================================
+
+def request_pdf_export(user, kind, object_id, start_date=None, end_date=None):
+    """
+    Enregistre une demande d'export et lance sa generation si elle n'est pas
+    deja en cours ou terminee (document encore disponible). Si la tache ne
+    peut pas etre mise en file (broker indisponible), le job est marque en
+    echec : une nouvelle demande le relancera.
+
+    Returns:
+        dict du job (id, status, ...)
+    """
+    from .tasks import generate_pdf_export
+
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Export inconnu : {kind}")
+
+    fingerprint = source_fingerprint(kind, object_id)
+    job_id = export_job_id(user.pk, kind, object_id, start_date, end_date, fingerprint)
+    job = EXPORT_JOBS.get(job_id)
+    if job and job['status'] == PENDING:
+        return job
+    if job and job['status'] == DONE and default_storage.exists(job['file']):
+        return job
+
+    job = {
+        'id': job_id,
+        'status': PENDING,
+        'user_id': user.pk,
+        'kind': kind,
+        'object_id': object_id,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'requested_at': timezone.now().isoformat(),
+    }
+    EXPORT_JOBS.set(job_id, job, EXPORT_JOB_TTL)
+    try:
+        generate_pdf_export.delay(job_id)
+    except Exception as e:
+        # Broker injoignable, ou generation en erreur en mode eager (job
+        # deja marque en echec par build_pdf_export)
+        logger.exception("Export %s non lance", job_id)
+        job = EXPORT_JOBS.get(job_id, job)
+        if job['status'] != FAILED:
+            job.update(status=FAILED, error=str(e))
+            EXPORT_JOBS.set(job_id, job, EXPORT_JOB_TTL)
+        return job
+    # En mode eager, la generation est deja terminee
+    return EXPORT_JOBS.get(job_id, job)
+
+
+def get_export_job(job_id, user):
+    """Job d'export de l'utilisateur (None si inconnu, expire ou d'un autre utilisateur)."""
+    job = EXPORT_JOBS.get(job_id)
+    if not job or job['user_id'] != user.pk:
+        return None
+    return job
+
+
+# ============================================================
+# GENERATION (WORKER)
+# ============================================================
+
+def build_pdf_export(job_id):
+    """
+    Genere le PDF d'un job et l'enregistre dans le stockage.
+
+    Returns:
+        dict du job mis a jour (None si le job a expire)
+    """
+    job = EXPORT_JOBS.get(job_id)
+    if job is None:
+        return None
+    if job['status'] == DONE and default_storage.exists(job['file']):
+        return job
+
+    try:
+        filename, content = _render(
+            job['kind'], job['object_id'],
+            parse_date(job['start_date']) if job['start_date'] else None,
+            parse_date(job['end_date']) if job['end_date'] else None,
+        )
+    except Exception as e:
+        job.update(status=FAILED, error=str(e))
+        EXPORT_JOBS.set(job_id, job, EXPORT_JOB_TTL)
+        raise
+
+    path = default_storage.save(f"{EXPORTS_DIR}/{job_id}/{filename}", ContentFile(content))
+    job.update(status=DONE, file=path, filename=filename, size=len(content))
+    EXPORT_JOBS.set(job_id, job, EXPORT_JOB_TTL)
+    return job
+
+
+def purge_exports(now=None):
+    """
+    Supprime les fichiers d'export plus anciens que EXPORT_RETENTION.
+
+    Returns:
+        Nombre de fichiers supprimes
+    """
+    limit = (now or timezone.now()) - EXPORT_RETENTION
+    if not default_storage.exists(EXPORTS_DIR):
+        return 0
+
+    deleted = 0
+    job_dirs, _ = default_storage.listdir(EXPORTS_DIR)
+    for job_dir in job_dirs:
+        _, files = default_storage.listdir(f"{EXPORTS_DIR}/{job_dir}")
+        for name in files:
+            path = f"{EXPORTS_DIR}/{job_dir}/{name}"
+            if default_storage.get_modified_time(path) < limit:
+                default_storage.delete(path)
+                deleted += 1
+    return deleted
@@ -0,0 +1,207 @@
+"""
+Exports comptables en flux (CSV / XLSX) du grand livre et des vols.
+
+Les lignes sont lues par paquets (QuerySet.iterator) et ecrites au fil de
+l'eau : la memoire reste constante quelle que soit la periode exportee.
+- CSV : StreamingHttpResponse, separateur ';' et virgule decimale (Excel FR).
+- XLSX : openpyxl en mode write-only, classeur ecrit dans un fichier
+  temporaire puis envoye par FileResponse.
+"""
+import csv
+import tempfile
+from decimal import Decimal
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from openpyxl import Workbook
+
+from fleet.models import Flight
+
+
+ITERATOR_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+# ============================================================
+# LIGNES EXPORTEES
+# ============================================================
+
+LEDGER_HEADER = [
+    'Date', 'Reference', 'Compte', 'Nom', 'Type', 'Libelle', 'Avion', 'Debit', 'Credit',
+]
+
+FLIGHTS_HEADER = [
+    'Date', 'Avion', 'Pilote', 'Instructeur / 2nd pilote', 'Type de vol', 'Depart', 'Arrivee',
+    'Compteur depart', 'Compteur arrivee', 'Duree (h)', 'Taux horaire', 'Cout', 'Essence (L)',
+]
+
+
+def _person(username, first_name, last_name):
+    full_name = f"{first_name or ''} {last_name or ''}".strip()
+    return full_name or username or ''
+
+
+def iter_ledger_rows(transactions):
+    """
+    Lignes du grand livre (une par transaction), du plus ancien au plus recent.
+
+    Args:
+        transactions: QuerySet de Transaction (deja filtre)
+    """
+    rows = transactions.order_by('date', 'pk').values_list(
+        'date', 'pk', 'user__username', 'user__first_name', 'user__last_name',
+        'type', 'description', 'aircraft__registration', 'amount',
+    )
+    for tx_date, pk, username, first_name, last_name, tx_type, description, registration, amount in rows.iterator(
+        chunk_size=ITERATOR_CHUNK_SIZE
+    ):
+        yield [
+            timezone.localtime(tx_date).replace(tzinfo=None),
+            f"TX-{pk:06d}",
+            username,
+            _person(None, first_name, last_name),
+            tx_type,
+            description,
+            registration or '',
+            amount if tx_type == 'DEBIT' else None,
+            amount if tx_type == 'CREDIT' else None,
+        ]
+
+
+def iter_flight_rows(flights):
+    """
+    Lignes des vols avec decomposition du cout (duree x taux horaire).
+
+    Args:
+        flights: QuerySet de Flight (deja filtre)
+    """
+    flight_types = dict(Flight.FLIGHT_TYPES)
+    rows = flights.order_by('date', 'pk').values_list(
+        'date', 'aircraft__registration',
+        'pilot__username', 'pilot__first_name', 'pilot__last_name',
+        'copilot__username', 'copilot__first_name', 'copilot__last_name',
+        'flight_type', 'departure_airport', 'arrival_airport',
+        'hour_meter_start', 'hour_meter_end', 'duration', 'cost', 'fuel_added',
+    )
+    for row in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        (flight_date, registration, p_user, p_first, p_last, c_user, c_first, c_last,
+         flight_type, departure, arrival, meter_start, meter_end, duration, cost, fuel) = row
+        yield [
+            flight_date,
+            registration,
+            _person(p_user, p_first, p_last),
+            _person(c_user, c_first, c_last),
+            flight_types.get(flight_type, flight_type),
+            departure,
+            arrival,
+            meter_start,
+            meter_end,
+            duration,
+            (cost / duration).quantize(Decimal('0.01')) if duration else None,
+            cost,
+            fuel,
+        ]
+
+
+def filter_flights(flights, start_date=None, end_date=None, user_id=None, aircraft_id=None):
+    if start_date:
+        flights = flights.filter(date__gte=start_date)
+    if end_date:
+        flights = flights.filter(date__lte=end_date)
+    if user_id:
+        flights = flights.filter(pilot_id=user_id)
+    if aircraft_id:
+        flights = flights.filter(aircraft_id=aircraft_id)
+    return flights
+
+
+# ============================================================
+# CSV EN FLUX
+# ============================================================
+
+class _Echo:
+    """Pseudo-fichier : csv.writer retourne directement la ligne ecrite."""
+
+    def write(self, value):
+        return value
+
+
+# Premiers caracteres interpretes comme une formule par Excel / LibreOffice
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _escape_formula(value):
+    """Texte saisi (libelle, trajet) : neutralise l'injection de formule."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, Decimal):
+        return str(value).replace('.', ',')
+    if hasattr(value, 'strftime'):
+        return value.strftime('%d/%m/%Y %H:%M') if hasattr(value, 'hour') else value.strftime('%d/%m/%Y')
+    return _escape_formula(value)
+
+
+def stream_csv(filename, header, rows):
+    """Reponse CSV generee ligne a ligne."""
+    writer = csv.writer(_Echo(), delimiter=';')
+
+    def content():
+        yield '\ufeff'  # BOM : accents lisibles dans Excel
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_csv_value(value) for value in row])
+
+    response = StreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+# ============================================================
+# XLSX (WRITE-ONLY)
+# ============================================================
+
+def stream_xlsx(filename, sheet_title, header, rows):
+    """
+    Classeur XLSX ecrit ligne a ligne (openpyxl write-only) dans un fichier
+    temporaire, puis envoye par morceaux.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_escape_formula(value) for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def export_rows(export_format, filename, sheet_title, header, rows):
+    """Reponse CSV (defaut) ou XLSX selon export_format."""
+    if export_format == 'xlsx':
+        return stream_xlsx(filename, sheet_title, header, rows)
+    return stream_csv(filename, header, rows)
+
+
+def export_ledger(transactions, export_format='csv', filename='grand_livre'):
+    return export_rows(export_format, filename, 'Grand livre', LEDGER_HEADER, iter_ledger_rows(transactions))
+
+
+def export_flights(flights, export_format='csv', filename='vols'):
+    return export_rows(export_format, filename, 'Vols', FLIGHTS_HEADER, iter_flight_rows(flights))
+
@@ -107,11 +107,18 @@ def get_table_style():
     ])
 
 
+def pdf_response(filename, content):
+    """Reponse HTTP de telechargement d'un PDF."""
+    response = HttpResponse(content, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # ============================================================
 # RELEVE DE COMPTE PILOTE
 # ============================================================
 
-def generate_account_statement(member, start_date=None, end_date=None):
+def render_account_statement(member, start_date=None, end_date=None):
     """
     Genere un releve de compte PDF pour un membre.
 
@@ -121,7 +128,7 @@ def generate_account_statement(member, start_date=None, end_date=None):
         end_date: Date de fin (optionnel)
 
     Returns:
-        HttpResponse avec le PDF
+        (nom de fichier, contenu PDF)
     """
     from finance.models import Transaction
 
@@ -262,21 +269,16 @@ def generate_account_statement(member, start_date=None, end_date=None):
 
     doc.build(elements)
 
-    # Creer la reponse HTTP
-    buffer.seek(0)
     filename = f"releve_compte_{member.user.username}_{date.today().strftime('%Y%m%d')}.pdf"
 
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    return response
+    return filename, buffer.getvalue()
 
 
 # ============================================================
 # CARNET DE ROUTE (TECH LOG)
 # ============================================================
 
-def generate_flight_log(aircraft, start_date=None, end_date=None):
+def render_flight_log(aircraft, start_date=None, end_date=None):
     """
     Genere un carnet de route PDF pour un aeronef.
 
@@ -286,7 +288,7 @@ def generate_flight_log(aircraft, start_date=None, end_date=None):
         end_date: Date de fin (optionnel)
 
     Returns:
-        HttpResponse avec le PDF
+        (nom de fichier, contenu PDF)
     """
     from fleet.models import Flight
 
@@ -303,12 +305,13 @@ def generate_flight_log(aircraft, start_date=None, end_date=None):
     styles = get_styles()
     elements = []
 
-    # Filtrer les vols
-    flights = Flight.objects.filter(aircraft=aircraft).order_by('-date')
+    # Filtrer les vols (pilote charge avec le vol : une seule requete)
+    flights = Flight.objects.filter(aircraft=aircraft).select_related('pilot').order_by('date')
     if start_date:
         flights = flights.filter(date__gte=start_date)
     if end_date:
         flights = flights.filter(date__lte=end_date)
+    flights = list(flights)
 
     # En-tete
     elements.append(Paragraph("CARNET DE ROUTE", styles['TitleMain']))
@@ -337,14 +340,14 @@ def generate_flight_log(aircraft, start_date=None, end_date=None):
     # Tableau des vols
     elements.append(Paragraph("Historique des vols", styles['SectionTitle']))
 
-    if flights.exists():
+    if flights:
         table_data = [[
             'Date', 'Pilote', 'Dep', 'Arr',
             'Cpt Dep', 'Cpt Arr', 'Duree',
             'Att.', 'Ess.', 'Observations'
         ]]
 
-        for flight in flights.order_by('date'):
+        for flight in flights:
             pilot_name = f"{flight.pilot.last_name[:10]}"
 
             table_data.append([
@@ -371,12 +374,12 @@ def generate_flight_log(aircraft, start_date=None, end_date=None):
 
         # Statistiques
         elements.append(Spacer(1, 8*mm))
-        total_hours = flights.aggregate(Sum('duration'))['duration__sum'] or 0
-        total_landings = flights.aggregate(Sum('landings_count'))['landings_count__sum'] or 0
-        total_fuel = flights.aggregate(Sum('fuel_added'))['fuel_added__sum'] or 0
+        total_hours = sum(flight.duration for flight in flights)
+        total_landings = sum(flight.landings_count for flight in flights)
+        total_fuel = sum(flight.fuel_added or 0 for flight in flights)
 
         stats_data = [
-            ['Nombre de vols:', str(flights.count()), 'Heures totales:', f"{total_hours:.2f}h"],
+            ['Nombre de vols:', str(len(flights)), 'Heures totales:', f"{total_hours:.2f}h"],
             ['Atterrissages:', str(total_landings), 'Carburant:', f"{total_fuel:.0f}L"],
         ]
 
@@ -403,20 +406,16 @@ def generate_flight_log(aircraft, start_date=None, end_date=None):
 
     doc.build(elements)
 
-    buffer.seek(0)
     filename = f"carnet_route_{aircraft.registration}_{date.today().strftime('%Y%m%d')}.pdf"
 
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    return response
+    return filename, buffer.getvalue()
 
 
 # ============================================================
 # FACTURE / RECU
 # ============================================================
 
-def generate_invoice(transaction):
+def render_invoice(transaction):
     """
     Genere une facture/recu PDF pour une transaction.
 
@@ -424,7 +423,7 @@ def generate_invoice(transaction):
         transaction: Instance de Transaction
 
     Returns:
-        HttpResponse avec le PDF
+        (nom de fichier, contenu PDF)
     """
     buffer = BytesIO()
     doc = SimpleDocTemplate(
@@ -517,11 +516,26 @@ def generate_invoice(transaction):
 
     doc.build(elements)
 
-    buffer.seek(0)
     doc_prefix = "recu" if transaction.type == 'CREDIT' else "facture"
     filename = f"{doc_prefix}_{transaction.id:06d}.pdf"
 
-    response = HttpResponse(buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return filename, buffer.getvalue()
 
-    return response
+
+# ============================================================
+# REPONSES HTTP
+# ============================================================
+
+def generate_account_statement(member, start_date=None, end_date=None):
+    """Releve de compte PDF en telechargement."""
+    return pdf_response(*render_account_statement(member, start_date, end_date))
+
+
+def generate_flight_log(aircraft, start_date=None, end_date=None):
+    """Carnet de route PDF en telechargement."""
+    return pdf_response(*render_flight_log(aircraft, start_date, end_date))
+
+
+def generate_invoice(transaction):
+    """Facture/recu PDF en telechargement."""
+    return pdf_response(*render_invoice(transaction))
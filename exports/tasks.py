@@ -0,0 +1,20 @@
+"""
+Taches Celery des exports (voir exports.jobs).
+"""
+from celery import shared_task
+
+from core.tasks import single_instance
+from . import jobs
+
+
+@shared_task
+@single_instance('exports:{job_id}', timeout=10 * 60)
+def generate_pdf_export(job_id):
+    job = jobs.build_pdf_export(job_id)
+    return job and job['status']
+
+
+@shared_task
+@single_instance('exports:purge', timeout=10 * 60)
+def purge_pdf_exports():
+    return {'deleted': jobs.purge_exports()}
@@ -0,0 +1,77 @@
+import io
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from openpyxl import load_workbook
+from django.test import TestCase, override_settings
+
+from finance.models import Transaction
+from members.models import Member
+from .jobs import DONE, EXPORT_JOBS, FAILED, request_pdf_export
+from .ledger import _csv_value, stream_xlsx
+
+
+# ============================================================
+# EXPORTS PDF EN ARRIERE-PLAN
+# ============================================================
+
+class PdfExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pilote', last_name='Durand')
+        cls.member = Member.objects.create(user=cls.user, account_balance=Decimal('0'))
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def export(self):
+        return request_pdf_export(self.user, 'account_statement', self.member.pk)
+
+    def test_enqueue_failure_marks_the_job_failed(self):
+        with mock.patch('exports.tasks.generate_pdf_export.delay', side_effect=ConnectionError('broker')), \
+                self.assertLogs('exports.jobs', 'ERROR'):
+            job = self.export()
+        self.assertEqual(job['status'], FAILED)
+        self.assertEqual(EXPORT_JOBS.get(job['id'])['status'], FAILED)
+
+        # Nouvelle demande : relancee
+        self.assertEqual(self.export()['status'], DONE)
+
+    def test_new_entries_give_a_new_document(self):
+        first = self.export()
+        self.assertEqual(first['status'], DONE)
+        self.assertEqual(self.export()['id'], first['id'])
+
+        Transaction.objects.create(user=self.user, amount=Decimal('50'), type='CREDIT', description='Versement')
+        second = self.export()
+        self.assertNotEqual(second['id'], first['id'])
+        self.assertEqual(second['status'], DONE)
+
+
+# ============================================================
+# CSV
+# ============================================================
+
+class CsvValueTests(TestCase):
+    def test_formula_like_text_is_escaped(self):
+        for text in ('=HYPERLINK("http://x")', '+33 6', '-1+1', '@SUM(A1)'):
+            self.assertEqual(_csv_value(text), "'" + text)
+
+    def test_plain_values_are_unchanged(self):
+        self.assertEqual(_csv_value('Vol LFPN-LFOB'), 'Vol LFPN-LFOB')
+        self.assertEqual(_csv_value(Decimal('-12.50')), '-12,50')
+        self.assertEqual(_csv_value(None), '')
+
+    def test_xlsx_text_is_not_written_as_a_formula(self):
+        response = stream_xlsx('test', 'Feuille', ['Libelle'], [['=1+1']])
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        cell = sheet['A2']
+        self.assertEqual(cell.data_type, 's')
+        self.assertEqual(cell.value, "'=1+1")
@@ -11,6 +11,15 @@ urlpatterns = [
     # Carnet de route
     path('flight-log/<int:aircraft_id>/', views.aircraft_flight_log, name='aircraft_flight_log'),
 
+    # Exports comptables (CSV / XLSX)
+    path('ledger/', views.ledger_export, name='ledger_export'),
+    path('flights/', views.flights_export, name='flights_export'),
+
+    # Exports PDF en arriere-plan (releve, carnet de route)
+    path('pdf/<str:kind>/<int:object_id>/', views.request_export, name='request_export'),
+    path('jobs/<str:job_id>/', views.export_status, name='export_status'),
+    path('jobs/<str:job_id>/download/', views.export_download, name='export_download'),
+
     # Factures / Recus
     path('invoice/<int:transaction_id>/', views.transaction_invoice, name='transaction_invoice'),
 ]
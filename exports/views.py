@@ -1,15 +1,21 @@
 """
-Vues pour l'export de documents PDF.
+Vues pour l'export de documents PDF et des exports comptables (CSV / XLSX).
 """
 from datetime import date, timedelta
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import Http404
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_POST
 
 from members.models import Member
-from fleet.models import Aircraft
+from fleet.models import Aircraft, Flight
 from finance.models import Transaction
+from finance.services import filter_transactions
+from .jobs import DONE, FAILED, get_export_job, request_pdf_export
+from .ledger import export_ledger, export_flights, filter_flights
 from .pdf_generator import (
     generate_account_statement,
     generate_flight_log,
@@ -17,6 +23,23 @@ from .pdf_generator import (
 )
 
 
+def get_period_dates(period, today=None):
+    """
+    Bornes (debut, fin) d'une periode : month, quarter, year ou all.
+    (None, None) pour all ou une periode inconnue.
+    """
+    today = today or date.today()
+
+    if period == 'month':
+        return today.replace(day=1), today
+    if period == 'quarter':
+        quarter_start_month = ((today.month - 1) // 3) * 3 + 1
+        return today.replace(month=quarter_start_month, day=1), today
+    if period == 'year':
+        return today.replace(month=1, day=1), today
+    return None, None
+
+
 @login_required
 def my_account_statement(request):
     """
@@ -28,23 +51,7 @@ def my_account_statement(request):
     except Member.DoesNotExist:
         raise Http404("Profil membre non trouve")
 
-    # Gerer la periode
-    period = request.GET.get('period', 'month')
-    today = date.today()
-
-    if period == 'month':
-        start_date = today.replace(day=1)
-        end_date = today
-    elif period == 'quarter':
-        quarter_start_month = ((today.month - 1) // 3) * 3 + 1
-        start_date = today.replace(month=quarter_start_month, day=1)
-        end_date = today
-    elif period == 'year':
-        start_date = today.replace(month=1, day=1)
-        end_date = today
-    else:  # all
-        start_date = None
-        end_date = None
+    start_date, end_date = get_period_dates(request.GET.get('period', 'month'))
 
     return generate_account_statement(member, start_date, end_date)
 
@@ -56,22 +63,7 @@ def member_account_statement(request, member_id):
     """
     member = get_object_or_404(Member, id=member_id)
 
-    period = request.GET.get('period', 'all')
-    today = date.today()
-
-    if period == 'month':
-        start_date = today.replace(day=1)
-        end_date = today
-    elif period == 'quarter':
-        quarter_start_month = ((today.month - 1) // 3) * 3 + 1
-        start_date = today.replace(month=quarter_start_month, day=1)
-        end_date = today
-    elif period == 'year':
-        start_date = today.replace(month=1, day=1)
-        end_date = today
-    else:
-        start_date = None
-        end_date = None
+    start_date, end_date = get_period_dates(request.GET.get('period', 'all'))
 
     return generate_account_statement(member, start_date, end_date)
 
@@ -84,22 +76,7 @@ def aircraft_flight_log(request, aircraft_id):
     """
     aircraft = get_object_or_404(Aircraft, id=aircraft_id)
 
-    period = request.GET.get('period', 'month')
-    today = date.today()
-
-    if period == 'month':
-        start_date = today.replace(day=1)
-        end_date = today
-    elif period == 'quarter':
-        quarter_start_month = ((today.month - 1) // 3) * 3 + 1
-        start_date = today.replace(month=quarter_start_month, day=1)
-        end_date = today
-    elif period == 'year':
-        start_date = today.replace(month=1, day=1)
-        end_date = today
-    else:
-        start_date = None
-        end_date = None
+    start_date, end_date = get_period_dates(request.GET.get('period', 'month'))
 
     return generate_flight_log(aircraft, start_date, end_date)
 
@@ -126,3 +103,108 @@ def all_transactions_pdf(request):
     """
     # TODO: Implementer si besoin
     raise Http404("Non implemente")
+
+
+# ============================================================
+# EXPORTS COMPTABLES (CSV / XLSX EN FLUX)
+# ============================================================
+
+@staff_member_required
+def ledger_export(request):
+    """
+    Export du grand livre pour le logiciel comptable.
+    Parametres : ?format=csv|xlsx, ?period=month|quarter|year|all, ou les
+    filtres de la liste des transactions (user, type, date_from, date_to...).
+    """
+    params = request.GET.copy()
+    start_date, end_date = get_period_dates(params.get('period'))
+    if start_date:
+        params.setdefault('date_from', start_date.isoformat())
+        params.setdefault('date_to', end_date.isoformat())
+
+    transactions, filters = filter_transactions(Transaction.objects.all(), params)
+    filename = '_'.join(['grand_livre'] + [filters[key] for key in ('date_from', 'date_to') if key in filters])
+    return export_ledger(transactions, request.GET.get('format', 'csv'), filename)
+
+
+@staff_member_required
+def flights_export(request):
+    """
+    Export des vols avec decomposition du cout (duree x taux horaire).
+    Parametres : ?format=csv|xlsx, ?period=..., ?user=<id pilote>, ?aircraft=<id>
+    """
+    start_date, end_date = get_period_dates(request.GET.get('period', 'year'))
+    user_id = request.GET.get('user')
+    aircraft_id = request.GET.get('aircraft')
+
+    flights = filter_flights(
+        Flight.objects.all(),
+        start_date=start_date,
+        end_date=end_date,
+        user_id=int(user_id) if user_id and user_id.isdigit() else None,
+        aircraft_id=int(aircraft_id) if aircraft_id and aircraft_id.isdigit() else None,
+    )
+    filename = '_'.join(['vols'] + [d.isoformat() for d in (start_date, end_date) if d])
+    return export_flights(flights, request.GET.get('format', 'csv'), filename)
+
+
+# ============================================================
+# EXPORTS PDF EN ARRIERE-PLAN
+# ============================================================
+
+def _job_payload(job):
+    payload = {
+        'id': job['id'],
+        'status': job['status'],
+        'status_url': reverse('exports:export_status', args=[job['id']]),
+    }
+    if job['status'] == DONE:
+        payload['download_url'] = reverse('exports:export_download', args=[job['id']])
+        payload['filename'] = job['filename']
+    elif job['status'] == FAILED:
+        payload['error'] = "La generation du document a echoue"
+    return payload
+
+
+@login_required
+@require_POST
+def request_export(request, kind, object_id):
+    """
+    Demande la generation d'un PDF en arriere-plan (releve de compte ou
+    carnet de route). Parametre optionnel: period=month|quarter|year|all
+
+    Retourne le job en JSON ; l'etat est ensuite suivi via status_url.
+    """
+    if kind == 'account_statement':
+        member = get_object_or_404(Member, id=object_id)
+        own = member.user_id == request.user.id
+        if not own and not request.user.is_staff:
+            raise Http404("Profil membre non trouve")
+        default_period = 'month' if own else 'all'
+    elif kind == 'flight_log' and request.user.is_staff:
+        get_object_or_404(Aircraft, id=object_id)
+        default_period = 'month'
+    else:
+        raise Http404("Export inconnu")
+
+    start_date, end_date = get_period_dates(request.POST.get('period', default_period))
+    job = request_pdf_export(request.user, kind, object_id, start_date, end_date)
+    return JsonResponse(_job_payload(job), status=202 if job['status'] != DONE else 200)
+
+
+@login_required
+def export_status(request, job_id):
+    """Etat d'un export PDF demande par l'utilisateur."""
+    job = get_export_job(job_id, request.user)
+    if job is None:
+        raise Http404("Export inconnu ou expire")
+    return JsonResponse(_job_payload(job))
+
+
+@login_required
+def export_download(request, job_id):
+    """Telecharge le PDF genere d'un export."""
+    job = get_export_job(job_id, request.user)
+    if job is None or job['status'] != DONE or not default_storage.exists(job['file']):
+        raise Http404("Export inconnu ou expire")
+    return FileResponse(default_storage.open(job['file'], 'rb'), as_attachment=True, filename=job['filename'])
@@ -1,8 +1,17 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import Transaction, MonthlyLedgerTotal
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ('date', 'user', 'amount', 'type', 'description')
+    list_select_related = ('user',)
+    show_full_result_count = False
     list_filter = ('type', 'date', 'user')
     search_fields = ('user__username', 'description')
+
+@admin.register(MonthlyLedgerTotal)
+class MonthlyLedgerTotalAdmin(admin.ModelAdmin):
+    list_display = ('month', 'aircraft', 'credits', 'debits', 'credits_count', 'debits_count')
+    list_select_related = ('aircraft',)
+    list_filter = ('aircraft',)
+    date_hierarchy = 'month'
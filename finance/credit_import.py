@@ -0,0 +1,403 @@
+"""
+Import en masse de versements (cotisations, approvisionnements de compte).
+
+Le fichier (CSV libre ou relevé bancaire OFX) est analysé puis chaque ligne
+est rapprochée d'un membre à partir de sa référence ou de son libellé
+(n° adhérent, n° FFA, identifiant, e-mail, nom). Le trésorier valide un
+aperçu, puis tous les crédits sont passés dans une seule transaction :
+insertion en masse des écritures, mise à jour ensembliste des soldes
+(une requête UPDATE ... CASE) et des cumuls mensuels.
+"""
+import csv
+import io
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from members.models import Member
+from members.services import invalidate_member_status
+from .models import Transaction, MonthlyLedgerTotal
+
+
+# En-têtes reconnus dans les exports bancaires / tableurs
+COLUMN_ALIASES = {
+    'date': ['date', 'date operation', 'date valeur', 'date de valeur', 'date comptable'],
+    'amount': ['montant', 'amount', 'credit', 'montant credit', 'somme'],
+    'reference': ['reference', 'ref', 'payeur', 'adherent', 'n adherent', 'membre', 'nom'],
+    'label': ['libelle', 'description', 'label', 'motif', 'intitule', 'libelle operation'],
+}
+
+DATE_FORMATS = ['%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y', '%d.%m.%Y']
+
+DEFAULT_DESCRIPTION = "Versement"
+
+MAX_IMPORT_LINES = 5000
+# Taille maximale du fichier envoyé (vérifiée avant lecture)
+MAX_IMPORT_SIZE = 5 * 1024 * 1024
+
+# Longueur minimale d'un mot du libellé comparé aux identifiants
+# (évite qu'un montant ou une année soit pris pour un n° d'adhérent)
+MIN_TOKEN_LENGTH = 4
+
+
+# ============================================================
+# LECTURE DU FICHIER
+# ============================================================
+
+def _normalize(text):
+    """Minuscules sans accents ni ponctuation (comparaison de noms / en-têtes)."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9@._-]+', ' ', text.lower()).strip()
+
+
+AMOUNT_PATTERN = re.compile(r'([+-]?)(\d+|\d{1,3}(?:[.,]\d{3})+)(?:([.,])(\d{1,2}))?')
+
+
+def parse_amount(value):
+    """
+    '1 234,56 €' / '1,234.56' / '+50.00' -> Decimal, None si illisible.
+
+    Le dernier séparateur (',' ou '.'), suivi d'au plus deux chiffres, est
+    le séparateur décimal ; l'autre sépare les milliers (groupes de trois
+    chiffres). Les montants ambigus ('1.234' : milliers ou décimales ?) ou
+    à plus de deux décimales sont refusés plutôt que tronqués.
+    """
+    cleaned = re.sub(r'[^\d,.\-+]', '', value or '')
+    match = AMOUNT_PATTERN.fullmatch(cleaned)
+    if not match:
+        return None
+    sign, integer, decimal_separator, decimals = match.groups()
+
+    thousands = set(re.sub(r'\d', '', integer))
+    if len(thousands) > 1:
+        return None
+    if thousands:
+        separator = thousands.pop()
+        if decimal_separator == separator:
+            return None
+        if decimal_separator is None and integer.count(separator) == 1:
+            return None
+    return Decimal(f"{sign}{re.sub(r'[.,]', '', integer)}.{decimals or '0'}").quantize(Decimal('0.01'))
+
+
+def parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _decode(content):
+    if isinstance(content, str):
+        return content
+    for encoding in ('utf-8-sig', 'cp1252'):
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return content.decode('latin-1')
+
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ';'
+
+
+def _read_csv(text):
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=';,\t')
+    except csv.Error:
+        dialect = _SemicolonDialect
+    reader = csv.reader(io.StringIO(text), dialect)
+
+    rows = [row for row in reader if any(cell.strip() for cell in row)]
+    if not rows:
+        raise ValueError("Fichier vide")
+
+    header = [_normalize(cell) for cell in rows[0]]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(header):
+            if name in aliases and index not in columns.values():
+                columns[field] = index
+                break
+    if 'date' not in columns or 'amount' not in columns:
+        raise ValueError("Colonnes 'date' et 'montant' introuvables dans l'en-tête du fichier")
+
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    for number, row in enumerate(rows[1:], start=2):
+        yield {
+            'line': number,
+            'date': cell(row, 'date'),
+            'amount': cell(row, 'amount'),
+            'reference': cell(row, 'reference'),
+            'label': cell(row, 'label'),
+        }
+
+
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|</BANKTRANLIST>)', re.S | re.I)
+OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def _read_ofx(text):
+    """Relevé OFX/QFX (SGML ou XML) : une ligne par <STMTTRN>."""
+    for number, match in enumerate(OFX_TRANSACTION.finditer(text), start=1):
+        fields = {name.upper(): value.strip() for name, value in OFX_FIELD.findall(match.group(1))}
+        posted = fields.get('DTPOSTED', '')[:8]
+        yield {
+            'line': number,
+            'date': f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) == 8 else posted,
+            'amount': fields.get('TRNAMT', ''),
+            'reference': fields.get('NAME', ''),
+            'label': fields.get('MEMO', '') or fields.get('NAME', ''),
+        }
+
+
+def read_credit_file(content, filename=''):
+    """
+    Lit un fichier de versements (CSV ou OFX).
+
+    Returns:
+        Liste de lignes brutes {'line', 'date', 'amount', 'reference', 'label'}
+    """
+    text = _decode(content)
+    if filename.lower().endswith(('.ofx', '.qfx')) or '<OFX>' in text[:2000].upper():
+        rows = list(_read_ofx(text))
+    else:
+        rows = list(_read_csv(text))
+    if len(rows) > MAX_IMPORT_LINES:
+        raise ValueError(f"Fichier trop volumineux (maximum {MAX_IMPORT_LINES} lignes)")
+    return rows
+
+
+# ============================================================
+# RAPPROCHEMENT AVEC LES MEMBRES
+# ============================================================
+
+class MemberMatcher:
+    """
+    Index des membres (une requête) pour rapprocher une référence de paiement.
+    Identifiants exacts d'abord (n° adhérent, n° FFA, licence, identifiant,
+    e-mail), puis nom complet trouvé dans la référence ou le libellé.
+    """
+
+    def __init__(self):
+        self.by_key = {}
+        self.by_name = {}
+        members = Member.objects.values_list(
+            'user_id', 'member_number', 'ffa_number', 'license_number',
+            'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        )
+        for user_id, member_number, ffa_number, license_number, username, email, first, last in members:
+            for key in (member_number, ffa_number, license_number, username, email):
+                key = _normalize(key)
+                if key:
+                    self.by_key.setdefault(key, set()).add(user_id)
+            first, last = _normalize(first), _normalize(last)
+            if first and last:
+                for name in (f"{last} {first}", f"{first} {last}"):
+                    self.by_name.setdefault(name, set()).add(user_id)
+
+    def match(self, reference, label=''):
+        """
+        Returns:
+            (user_id, None) ou (None, motif)
+        """
+        for text in (reference, label):
+            text = _normalize(text)
+            if not text:
+                continue
+            candidates = set(self.by_key.get(text, ()))
+            if not candidates:
+                for token in set(text.split()):
+                    if len(token) >= MIN_TOKEN_LENGTH:
+                        candidates |= self.by_key.get(token, set())
+            if not candidates:
+                padded = f" {text} "
+                for name, user_ids in self.by_name.items():
+                    if f" {name} " in padded:
+                        candidates |= user_ids
+            if len(candidates) == 1:
+                return next(iter(candidates)), None
+            if len(candidates) > 1:
+                return None, "Plusieurs membres correspondent"
+        return None, "Aucun membre correspondant"
+
+
+# ============================================================
+# PRÉPARATION DU LOT (APERÇU)
+# ============================================================
+
+def prepare_credit_batch(rows, default_description=DEFAULT_DESCRIPTION):
+    """
+    Valide et rapproche les lignes lues.
+
+    Returns:
+        dict {'credits': [...], 'rejected': [...], 'total': str}
+        Les valeurs sont sérialisables en JSON (stockage en session).
+    """
+    matcher = MemberMatcher()
+    credits, rejected = [], []
+
+    for row in rows:
+        day = parse_date(row['date'])
+        amount = parse_amount(row['amount'])
+        if day is None:
+            rejected.append({**row, 'reason': "Date illisible"})
+            continue
+        if amount is None or amount <= 0:
+            rejected.append({**row, 'reason': "Montant illisible, ambigu ou débit"})
+            continue
+
+        user_id, reason = matcher.match(row['reference'], row['label'])
+        if user_id is None:
+            rejected.append({**row, 'reason': reason})
+            continue
+
+        description = ' - '.join(part for part in (default_description, row['label']) if part)
+        credits.append({
+            'line': row['line'],
+            'user_id': user_id,
+            'date': day.isoformat(),
+            'amount': str(amount),
+            'description': description[:200],
+        })
+
+    _reject_already_imported(credits, rejected)
+
+    if credits:
+        names = {
+            user_id: f"{first} {last}".strip() or username
+            for user_id, username, first, last in Member.objects.filter(
+                user_id__in={c['user_id'] for c in credits}
+            ).values_list('user_id', 'user__username', 'user__first_name', 'user__last_name')
+        }
+        for credit in credits:
+            credit['member'] = names.get(credit['user_id'], '')
+
+    return {
+        'credits': credits,
+        'rejected': rejected,
+        'total': str(sum((Decimal(c['amount']) for c in credits), Decimal('0'))),
+    }
+
+
+def _reject_already_imported(credits, rejected):
+    """
+    Écarte les versements déjà présents en base (même membre, jour, montant,
+    libellé). Chaque écriture existante n'écarte qu'une ligne : deux
+    versements identiques dans le fichier sont tous deux importés la première
+    fois, et tous deux écartés à la réimportation. Les répétitions internes
+    au fichier sont seulement signalées (champ 'warning').
+    """
+    if not credits:
+        return
+    days = [c['date'] for c in credits]
+    existing = Counter(
+        (user_id, timezone.localtime(tx_date).date().isoformat(), str(amount), description)
+        for user_id, tx_date, amount, description in Transaction.objects.filter(
+            type='CREDIT',
+            user_id__in={c['user_id'] for c in credits},
+            date__gte=_credit_datetime(min(days)).replace(hour=0),
+            date__lte=_credit_datetime(max(days)).replace(hour=23, minute=59),
+        ).values_list('user_id', 'date', 'amount', 'description')
+    )
+
+    kept, first_line = [], {}
+    for credit in credits:
+        key = (credit['user_id'], credit['date'], credit['amount'], credit['description'])
+        if existing[key]:
+            existing[key] -= 1
+            rejected.append({
+                'line': credit['line'], 'date': credit['date'], 'amount': credit['amount'],
+                'reference': '', 'label': credit['description'], 'reason': "Déjà importé",
+            })
+            continue
+        if key in first_line:
+            credit['warning'] = f"Identique à la ligne {first_line[key]} : à vérifier"
+        else:
+            first_line[key] = credit['line']
+        kept.append(credit)
+    credits[:] = kept
+
+
+def _credit_datetime(day):
+    """Les versements importés sont datés à midi (heure locale)."""
+    return timezone.make_aware(datetime.combine(datetime.fromisoformat(day).date(), time(12, 0)))
+
+
+# ============================================================
+# COMPTABILISATION
+# ============================================================
+
+def post_credit_batch(credits):
+    """
+    Passe tous les crédits du lot en une transaction :
+    insertion en masse, soldes mis à jour par une seule requête ensembliste,
+    cumuls mensuels mis à jour par mois.
+
+    Les doublons sont recherchés à nouveau dans la transaction, après
+    verrouillage des comptes concernés : un lot validé deux fois (double
+    clic, second onglet) n'est passé qu'une fois.
+
+    Args:
+        credits: lignes 'credits' retournées par prepare_credit_batch
+
+    Returns:
+        (nombre de crédits, montant total, nombre de doublons écartés)
+    """
+    if not credits:
+        return 0, Decimal('0'), 0
+
+    with db_transaction.atomic():
+        # Verrou des comptes : un second passage attend la fin du premier
+        list(Member.objects.select_for_update().filter(
+            user_id__in={c['user_id'] for c in credits}
+        ).values_list('id', flat=True))
+
+        duplicates = []
+        credits = list(credits)
+        _reject_already_imported(credits, duplicates)
+
+        transactions = [
+            Transaction(
+                user_id=credit['user_id'],
+                amount=Decimal(credit['amount']),
+                type='CREDIT',
+                description=credit['description'],
+                date=_credit_datetime(credit['date']),
+            )
+            for credit in credits
+        ]
+        per_user = {}
+        for tx in transactions:
+            per_user[tx.user_id] = per_user.get(tx.user_id, Decimal('0')) + tx.amount
+
+        if transactions:
+            # bulk_create n'appelle pas Transaction.save : soldes et cumuls ci-dessous
+            Transaction.objects.bulk_create(transactions, batch_size=500)
+            Member.objects.filter(user_id__in=per_user).update(
+                account_balance=F('account_balance') + Case(
+                    *[When(user_id=user_id, then=Value(total)) for user_id, total in per_user.items()],
+                    default=Value(Decimal('0')),
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                )
+            )
+            MonthlyLedgerTotal.add_many(transactions)
+
+    if per_user:
+        # update() n'emet pas post_save : statut scanner (solde) a rafraichir
+        invalidate_member_status(*Member.objects.filter(user_id__in=per_user).values_list('id', flat=True))
+
+    return len(transactions), sum(per_user.values(), Decimal('0')), len(duplicates)
@@ -0,0 +1,20 @@
+"""
+Commande Django pour reconstruire les cumuls mensuels du grand livre.
+Utilisation : python manage.py rebuild_ledger_totals
+
+Les cumuls sont tenus a jour par Transaction.save() et la suppression
+(creation, modification, suppression). La commande n'est utile qu'apres
+des ecritures qui contournent save() : bulk_create, update()
+ensembliste, SQL direct.
+"""
+from django.core.management.base import BaseCommand
+from finance.services import rebuild_ledger_totals
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les cumuls mensuels du grand livre (tableau de bord finance)'
+
+    def handle(self, *args, **options):
+        self.stdout.write("[*] Reconstruction des cumuls mensuels...")
+        count = rebuild_ledger_totals()
+        self.stdout.write(self.style.SUCCESS(f"[OK] {count} cumul(s) mensuel(s) recalcule(s)"))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_ledger_totals(apps, schema_editor):
+    """Rattache les débits de vol existants à leur avion puis calcule les cumuls."""
+    Aircraft = apps.get_model('fleet', 'Aircraft')
+    Transaction = apps.get_model('finance', 'Transaction')
+    MonthlyLedgerTotal = apps.get_model('finance', 'MonthlyLedgerTotal')
+
+    # Libellé posé par Flight.save : "Vol <immatriculation> (<durée>h) - <type>"
+    for aircraft_id, registration in Aircraft.objects.values_list('id', 'registration'):
+        Transaction.objects.filter(
+            type='DEBIT', aircraft__isnull=True, description__startswith=f"Vol {registration} ("
+        ).update(aircraft_id=aircraft_id)
+
+    rows = Transaction.objects.annotate(month=TruncMonth('date')).values('month', 'aircraft_id').annotate(
+        credits=Sum('amount', filter=Q(type='CREDIT'), default=0),
+        debits=Sum('amount', filter=Q(type='DEBIT'), default=0),
+        credits_count=Count('id', filter=Q(type='CREDIT')),
+        debits_count=Count('id', filter=Q(type='DEBIT')),
+    ).order_by()
+    MonthlyLedgerTotal.objects.bulk_create(
+        [MonthlyLedgerTotal(**{**row, 'month': row['month'].date()}) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_transaction_keyset_indexes'),
+        ('fleet', '0004_alter_aircraft_options_alter_flight_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='aircraft',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='fleet.aircraft', verbose_name='Avion'),
+        ),
+        migrations.CreateModel(
+            name='MonthlyLedgerTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Mois')),
+                ('credits', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Crédits (€)')),
+                ('debits', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Débits (€)')),
+                ('credits_count', models.PositiveIntegerField(default=0, verbose_name='Nb crédits')),
+                ('debits_count', models.PositiveIntegerField(default=0, verbose_name='Nb débits')),
+                ('aircraft', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_totals', to='fleet.aircraft', verbose_name='Avion')),
+            ],
+            options={
+                'verbose_name': 'Cumul mensuel',
+                'verbose_name_plural': 'Cumuls mensuels',
+                'ordering': ['-month'],
+                'unique_together': {('month', 'aircraft')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:19
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_totals(apps, schema_editor):
+    """Fusionne les cumuls "hors vol" en double d'un même mois."""
+    MonthlyLedgerTotal = apps.get_model('finance', 'MonthlyLedgerTotal')
+    duplicated = MonthlyLedgerTotal.objects.filter(aircraft__isnull=True).values('month').annotate(
+        rows=Count('id'),
+        total_credits=Sum('credits'),
+        total_debits=Sum('debits'),
+        total_credits_count=Sum('credits_count'),
+        total_debits_count=Sum('debits_count'),
+    ).filter(rows__gt=1).order_by()
+
+    for row in duplicated:
+        totals = MonthlyLedgerTotal.objects.filter(aircraft__isnull=True, month=row['month']).order_by('id')
+        kept = totals.first()
+        totals.exclude(pk=kept.pk).delete()
+        totals.update(
+            credits=row['total_credits'],
+            debits=row['total_debits'],
+            credits_count=row['total_credits_count'],
+            debits_count=row['total_debits_count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_ledger_monthly_totals'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlyledgertotal',
+            unique_together=set(),
+        ),
+        migrations.RunPython(merge_duplicate_totals, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monthlyledgertotal',
+            constraint=models.UniqueConstraint(condition=models.Q(('aircraft__isnull', False)), fields=('month', 'aircraft'), name='finance_ledger_month_aircraft_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyledgertotal',
+            constraint=models.UniqueConstraint(condition=models.Q(('aircraft__isnull', True)), fields=('month',), name='finance_ledger_month_no_aircraft_uniq'),
+        ),
+    ]
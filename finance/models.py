@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction as db_transaction
+from django.db.models import F, Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -16,10 +17,29 @@ class Transaction(models.Model):
     
     # Lien optionnel vers un vol ou un avion (pour traçabilité)
     # flight = models.ForeignKey('fleet.Flight', ...) # À venir
+    aircraft = models.ForeignKey(
+        'fleet.Aircraft',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions',
+        verbose_name="Avion"
+    )
 
     def save(self, *args, **kwargs):
-        # Mise à jour automatique du solde du membre
+        previous = None
+        if self.pk is not None:
+            previous = Transaction.objects.filter(pk=self.pk).only('amount', 'type', 'date', 'aircraft').first()
         super().save(*args, **kwargs)
+
+        # Cumul mensuel du grand livre (tableau de bord) : l'ancienne version
+        # d'une écriture modifiée est retirée avant d'ajouter la nouvelle.
+        # La suppression est retirée par le signal post_delete.
+        if previous is not None:
+            MonthlyLedgerTotal.remove(previous)
+        MonthlyLedgerTotal.add(self)
+
+        # Mise à jour automatique du solde du membre
         member = self.user.member_profile
         if self.type == 'CREDIT':
             member.account_balance += self.amount
@@ -35,3 +55,93 @@ class Transaction(models.Model):
         verbose_name = "Écriture Comptable"
         verbose_name_plural = "Écritures Comptables"
         ordering = ['-date']
+        indexes = [
+            # Pagination par clé (date, id) du grand livre, globale et par pilote
+            models.Index(fields=['-date', '-id'], name='finance_tx_date_id_idx'),
+            models.Index(fields=['user', '-date', '-id'], name='finance_tx_user_date_id_idx'),
+        ]
+
+
+class MonthlyLedgerTotal(models.Model):
+    """
+    Cumul mensuel du grand livre, par avion (aircraft vide = hors vol).
+    Tenu à jour à chaque création, modification ou suppression
+    d'écriture, reconstruit par
+    finance.services.rebuild_ledger_totals (commande rebuild_ledger_totals).
+    """
+    month = models.DateField("Mois")  # Premier jour du mois
+    aircraft = models.ForeignKey(
+        'fleet.Aircraft',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='ledger_totals',
+        verbose_name="Avion"
+    )
+    credits = models.DecimalField("Crédits (€)", max_digits=12, decimal_places=2, default=0)
+    debits = models.DecimalField("Débits (€)", max_digits=12, decimal_places=2, default=0)
+    credits_count = models.PositiveIntegerField("Nb crédits", default=0)
+    debits_count = models.PositiveIntegerField("Nb débits", default=0)
+
+    @classmethod
+    def add(cls, transaction):
+        """Ajoute une transaction au cumul de son mois."""
+        cls.add_many([transaction])
+
+    @classmethod
+    def remove(cls, transaction):
+        """Retire une transaction (modifiée ou supprimée) du cumul de son mois."""
+        cls.add_many([transaction], sign=-1)
+
+    @classmethod
+    def add_many(cls, transactions, sign=1):
+        """
+        Ajoute (sign=1) ou retire (sign=-1) un lot de transactions : une
+        mise à jour par mois et avion.
+        """
+        groups = {}
+        for tx in transactions:
+            key = (timezone.localtime(tx.date).date().replace(day=1), tx.aircraft_id)
+            group = groups.setdefault(key, {'credits': 0, 'credits_count': 0, 'debits': 0, 'debits_count': 0})
+            if tx.type == 'CREDIT':
+                group['credits'] += sign * tx.amount
+                group['credits_count'] += sign
+            else:
+                group['debits'] += sign * tx.amount
+                group['debits_count'] += sign
+
+        for (month, aircraft_id), values in groups.items():
+            rows = cls.objects.filter(month=month, aircraft_id=aircraft_id)
+            changes = {field: F(field) + value for field, value in values.items()}
+            if rows.update(**changes) or sign < 0:
+                # Retrait sans cumul existant : rebuild_ledger_totals
+                continue
+            try:
+                with db_transaction.atomic():
+                    cls.objects.create(month=month, aircraft_id=aircraft_id, **values)
+            except IntegrityError:
+                # Cumul du mois créé entre-temps par une autre transaction
+                rows.update(**changes)
+
+    def __str__(self):
+        label = self.aircraft.registration if self.aircraft_id else "Hors vol"
+        return f"{self.month.strftime('%m/%Y')} - {label}"
+
+    class Meta:
+        verbose_name = "Cumul mensuel"
+        verbose_name_plural = "Cumuls mensuels"
+        ordering = ['-month']
+        # Un seul cumul par mois et avion, et un seul cumul "hors vol" par
+        # mois (NULL n'est jamais égal à NULL dans un index unique simple)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'aircraft'],
+                condition=Q(aircraft__isnull=False),
+                name='finance_ledger_month_aircraft_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['month'],
+                condition=Q(aircraft__isnull=True),
+                name='finance_ledger_month_no_aircraft_uniq',
+            ),
+        ]
@@ -0,0 +1,274 @@
+"""
+Services du module finance.
+
+Le grand livre (Transaction) grossit sans limite : les listes sont paginées
+par clé (keyset / seek) sur (date, id) plutôt que par OFFSET, afin que chaque
+page coûte le même prix quelle que soit sa profondeur. Les index
+correspondants sont déclarés sur le modèle Transaction.
+
+Le tableau de bord lit les cumuls mensuels (MonthlyLedgerTotal) et non le
+grand livre : son coût dépend du nombre de mois et d'avions, pas du nombre
+de transactions.
+"""
+import base64
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from members.models import Member
+from .models import Transaction, MonthlyLedgerTotal
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# ============================================================
+# FILTRES
+# ============================================================
+
+def _parse_decimal(value):
+    try:
+        return Decimal(value.replace(',', '.'))
+    except (InvalidOperation, AttributeError):
+        return None
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_transactions(queryset, params):
+    """
+    Applique les filtres serveur (utilisateur, type, période, montant).
+
+    Args:
+        queryset: QuerySet de Transaction
+        params: QueryDict / dict (user, type, date_from, date_to, amount_min, amount_max)
+
+    Returns:
+        (queryset filtré, dict des filtres retenus)
+    """
+    filters = {}
+
+    user_id = params.get('user')
+    if user_id and str(user_id).isdigit():
+        queryset = queryset.filter(user_id=int(user_id))
+        filters['user'] = user_id
+
+    tx_type = params.get('type')
+    if tx_type in dict(Transaction.TRANSACTION_TYPES):
+        queryset = queryset.filter(type=tx_type)
+        filters['type'] = tx_type
+
+    # Bornes de dates en datetime (et non date__date) pour rester sur l'index
+    date_from = parse_date(params.get('date_from') or '')
+    if date_from:
+        queryset = queryset.filter(date__gte=_start_of_day(date_from))
+        filters['date_from'] = date_from.isoformat()
+
+    date_to = parse_date(params.get('date_to') or '')
+    if date_to:
+        queryset = queryset.filter(date__lt=_start_of_day(date_to + timedelta(days=1)))
+        filters['date_to'] = date_to.isoformat()
+
+    amount_min = _parse_decimal(params.get('amount_min'))
+    if amount_min is not None:
+        queryset = queryset.filter(amount__gte=amount_min)
+        filters['amount_min'] = str(amount_min)
+
+    amount_max = _parse_decimal(params.get('amount_max'))
+    if amount_max is not None:
+        queryset = queryset.filter(amount__lte=amount_max)
+        filters['amount_max'] = str(amount_max)
+
+    return queryset, filters
+
+
+# ============================================================
+# PAGINATION PAR CLÉ (date, id)
+# ============================================================
+
+def encode_cursor(transaction):
+    """Curseur opaque pointant sur une transaction (date, id)."""
+    raw = f"{transaction.date.isoformat()}|{transaction.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Décode un curseur en (date, id).
+    Lève ValueError si le curseur est invalide.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_str, pk = raw.rsplit('|', 1)
+        date = datetime.fromisoformat(date_str)
+        pk = int(pk)
+    except ValueError:
+        raise ValueError("Curseur de pagination invalide")
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date, pk
+
+
+class TransactionPage:
+    """Une page du grand livre, du plus récent au plus ancien."""
+
+    def __init__(self, items, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.items[-1]) if self.has_next and self.items else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.items[0]) if self.has_previous and self.items else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def paginate_transactions(queryset, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Pagination par clé sur (date, id), ordre décroissant.
+
+    Args:
+        queryset: QuerySet de Transaction (déjà filtré)
+        after: curseur de la dernière ligne de la page précédente (page suivante)
+        before: curseur de la première ligne de la page suivante (page précédente)
+        page_size: taille de page (plafonnée à MAX_PAGE_SIZE)
+
+    Returns:
+        TransactionPage (une seule requête, page_size + 1 lignes lues)
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+    if before:
+        date, pk = decode_cursor(before)
+        rows = list(
+            queryset.filter(Q(date__gt=date) | Q(date=date, pk__gt=pk))
+            .order_by('date', 'pk')[:page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        return TransactionPage(items, has_next=True, has_previous=has_previous)
+
+    if after:
+        date, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk))
+
+    rows = list(queryset.order_by('-date', '-pk')[:page_size + 1])
+    return TransactionPage(
+        rows[:page_size],
+        has_next=len(rows) > page_size,
+        has_previous=bool(after),
+    )
+
+
+def serialize_transaction(transaction):
+    """Représentation JSON d'une transaction (liste à défilement infini)."""
+    user = transaction.user
+    return {
+        'id': transaction.pk,
+        'date': transaction.date.isoformat(),
+        'user_id': transaction.user_id,
+        'user': user.get_full_name() or user.username,
+        'type': transaction.type,
+        'amount': str(transaction.amount),
+        'description': transaction.description,
+    }
+
+
+# ============================================================
+# SYNTHÈSE FINANCIÈRE (TABLEAU DE BORD)
+# ============================================================
+
+def rebuild_ledger_totals():
+    """
+    Recalcule entièrement les cumuls mensuels depuis le grand livre
+    (une requête d'agrégation conditionnelle). Utile seulement après des
+    écritures qui contournent Transaction.save() (bulk_create, update()
+    ensembliste, SQL direct).
+
+    Returns:
+        Nombre de lignes de cumul créées
+    """
+    rows = Transaction.objects.annotate(month=TruncMonth('date')).values('month', 'aircraft_id').annotate(
+        credits=Sum('amount', filter=Q(type='CREDIT'), default=0),
+        debits=Sum('amount', filter=Q(type='DEBIT'), default=0),
+        credits_count=Count('id', filter=Q(type='CREDIT')),
+        debits_count=Count('id', filter=Q(type='DEBIT')),
+    ).order_by()
+
+    totals = [MonthlyLedgerTotal(**{**row, 'month': row['month'].date()}) for row in rows]
+    with db_transaction.atomic():
+        MonthlyLedgerTotal.objects.all().delete()
+        MonthlyLedgerTotal.objects.bulk_create(totals, batch_size=1000)
+    return len(totals)
+
+
+def get_finance_summary(months=12):
+    """
+    Synthèse du tableau de bord financier, en deux requêtes :
+    - les cumuls mensuels (totaux, chiffre d'affaires par mois et par avion),
+    - une agrégation conditionnelle sur les soldes des membres.
+
+    Args:
+        months: Nombre de mois affichés dans l'historique mensuel
+
+    Returns:
+        dict (total_credits, total_debits, balance, monthly, aircraft_revenue,
+              members_count, negative_count, negative_total)
+    """
+    total_credits = Decimal('0')
+    total_debits = Decimal('0')
+    monthly = {}
+    aircraft_revenue = {}
+
+    rows = MonthlyLedgerTotal.objects.values(
+        'month', 'aircraft_id', 'aircraft__registration', 'credits', 'debits', 'debits_count'
+    )
+    for row in rows:
+        total_credits += row['credits']
+        total_debits += row['debits']
+
+        month = monthly.setdefault(row['month'], {'month': row['month'], 'credits': Decimal('0'), 'debits': Decimal('0')})
+        month['credits'] += row['credits']
+        month['debits'] += row['debits']
+
+        if row['aircraft_id']:
+            revenue = aircraft_revenue.setdefault(row['aircraft_id'], {
+                'registration': row['aircraft__registration'],
+                'revenue': Decimal('0'),
+                'flights': 0,
+            })
+            revenue['revenue'] += row['debits']
+            revenue['flights'] += row['debits_count']
+
+    members = Member.objects.aggregate(
+        members_count=Count('id'),
+        negative_count=Count('id', filter=Q(account_balance__lt=0)),
+        negative_total=Sum('account_balance', filter=Q(account_balance__lt=0), default=0),
+    )
+
+    return {
+        'total_credits': total_credits,
+        'total_debits': total_debits,
+        'balance': total_credits - total_debits,
+        'monthly': sorted(monthly.values(), key=lambda m: m['month'], reverse=True)[:months],
+        'aircraft_revenue': sorted(aircraft_revenue.values(), key=lambda a: a['revenue'], reverse=True),
+        **members,
+    }
@@ -0,0 +1,13 @@
+"""
+Cumuls mensuels du grand livre : retrait des écritures supprimées (y
+compris en cascade, à la suppression d'un utilisateur).
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import MonthlyLedgerTotal, Transaction
+
+
+@receiver(post_delete, sender=Transaction)
+def transaction_deleted(sender, instance, **kwargs):
+    MonthlyLedgerTotal.remove(instance)
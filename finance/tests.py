@@ -1,3 +1,141 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from members.models import Member
+from .credit_import import MAX_IMPORT_SIZE, parse_amount
+from .models import MonthlyLedgerTotal, Transaction
+from .services import rebuild_ledger_totals
+
+
+# ============================================================
+# CUMULS MENSUELS
+# ============================================================
+
+class MonthlyLedgerTotalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pilote')
+        Member.objects.create(user=cls.user, account_balance=Decimal('0'))
+
+    def totals(self):
+        # Cumuls non vides (un mois vidé par une modification reste à zéro)
+        return list(MonthlyLedgerTotal.objects.exclude(credits_count=0, debits_count=0).order_by(
+            'month', 'aircraft_id',
+        ).values_list('month', 'aircraft_id', 'credits', 'credits_count', 'debits', 'debits_count'))
+
+    def rebuilt(self):
+        current = self.totals()
+        rebuild_ledger_totals()
+        return current, self.totals()
+
+    def test_update_applies_the_difference(self):
+        tx = Transaction.objects.create(user=self.user, amount=Decimal('100'), type='CREDIT', description='Versement')
+        tx.amount = Decimal('80')
+        tx.save()
+        tx.type = 'DEBIT'
+        tx.date = tx.date - timedelta(days=62)
+        tx.save()
+
+        current, expected = self.rebuilt()
+        self.assertEqual(current, expected)
+        self.assertEqual(MonthlyLedgerTotal.objects.get(debits_count=1).debits, Decimal('80'))
+
+    def test_delete_subtracts(self):
+        kept = Transaction.objects.create(user=self.user, amount=Decimal('50'), type='CREDIT', description='A')
+        Transaction.objects.create(user=self.user, amount=Decimal('30'), type='CREDIT', description='B').delete()
+        Transaction.objects.filter(pk=kept.pk).delete()
+
+        total = MonthlyLedgerTotal.objects.get()
+        self.assertEqual((total.credits, total.credits_count), (Decimal('0'), 0))
+
+    def test_one_total_without_aircraft_per_month(self):
+        month = timezone.localdate().replace(day=1)
+        MonthlyLedgerTotal.objects.create(month=month)
+        with self.assertRaises(IntegrityError):
+            MonthlyLedgerTotal.objects.create(month=month)
+
+
+# ============================================================
+# IMPORT DE VERSEMENTS
+# ============================================================
+
+class ParseAmountTests(TestCase):
+    def test_decimal_separator_is_the_last_one(self):
+        self.assertEqual(parse_amount('1 234,56 €'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('1,234.56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('1,234,567.8'), Decimal('1234567.80'))
+        self.assertEqual(parse_amount('+50.00'), Decimal('50.00'))
+        self.assertEqual(parse_amount('-12,5'), Decimal('-12.50'))
+
+    def test_ambiguous_or_truncated_amounts_are_rejected(self):
+        for value in ('1.234', '1,234', '12.3456', '1.234.56', '1.234,567.00', 'abc', ''):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_amount(value))
+
+
+class CreditImportViewTests(TestCase):
+    CSV = "date;montant;reference\n15/03/2025;120,00;dupont.pierre\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('tresorier', is_staff=True)
+        cls.pilot = User.objects.create_user('dupont.pierre', first_name='Pierre', last_name='Dupont')
+        cls.member = Member.objects.create(user=cls.pilot)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.url = reverse('finance_credit_import')
+
+    def upload(self, content):
+        return self.client.post(self.url, {'file': SimpleUploadedFile('releve.csv', content)})
+
+    def test_double_confirm_posts_once(self):
+        self.upload(self.CSV.encode())
+        self.client.post(self.url, {'action': 'confirm'})
+        self.client.post(self.url, {'action': 'confirm'})
+
+        self.assertEqual(Transaction.objects.filter(user=self.pilot).count(), 1)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.account_balance, Decimal('120.00'))
+
+    def test_batch_confirmed_from_a_second_preview_is_not_posted_again(self):
+        self.upload(self.CSV.encode())
+        batch = self.client.session['finance_credit_import']
+        self.client.post(self.url, {'action': 'confirm'})
+
+        # Second onglet : aperçu préparé avant la première validation
+        session = self.client.session
+        session['finance_credit_import'] = batch
+        session.save()
+        self.client.post(self.url, {'action': 'confirm'})
+
+        self.assertEqual(Transaction.objects.filter(user=self.pilot).count(), 1)
+
+    def test_identical_lines_in_one_file_are_both_imported(self):
+        content = (self.CSV + "15/03/2025;120,00;dupont.pierre\n").encode()
+        self.upload(content)
+        batch = self.client.session['finance_credit_import']
+        self.assertEqual(len(batch['credits']), 2)
+        self.assertEqual(batch['rejected'], [])
+        self.assertIn('ligne 2', batch['credits'][1]['warning'])
+
+        self.client.post(self.url, {'action': 'confirm'})
+        self.assertEqual(Transaction.objects.filter(user=self.pilot).count(), 2)
+
+        # Réimport du même relevé : les deux lignes sont déjà passées
+        self.upload(content)
+        batch = self.client.session['finance_credit_import']
+        self.assertEqual(batch['credits'], [])
+        self.assertEqual([r['reason'] for r in batch['rejected']], ["Déjà importé"] * 2)
 
-# Create your tests here.
+    def test_oversized_upload_is_refused_before_reading(self):
+        self.upload(b'x' * (MAX_IMPORT_SIZE + 1))
+        self.assertNotIn('finance_credit_import', self.client.session)
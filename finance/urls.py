@@ -4,7 +4,9 @@ from . import views
 urlpatterns = [
     path('admin/', views.finance_dashboard, name='finance_dashboard'),
     path('admin/transactions/', views.finance_transactions, name='finance_transactions'),
+    path('admin/transactions/api/', views.finance_transactions_api, name='finance_transactions_api'),
     path('admin/credit/', views.finance_credit_account, name='finance_credit_account'),
+    path('admin/credit/import/', views.finance_credit_import, name='finance_credit_import'),
     path('admin/credit/<int:user_id>/', views.finance_credit_account, name='finance_credit_account_user'),
     path('admin/pilot/<int:user_id>/', views.finance_pilot_detail, name='finance_pilot_detail'),
 ]
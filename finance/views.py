@@ -2,11 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db.models import Q
+from django.http import JsonResponse
 from decimal import Decimal
+from urllib.parse import urlencode
 from .models import Transaction
+from .credit_import import MAX_IMPORT_SIZE, read_credit_file, prepare_credit_batch, post_credit_batch
+from .services import (
+    DEFAULT_PAGE_SIZE, filter_transactions, paginate_transactions, serialize_transaction,
+    get_finance_summary,
+)
 from members.models import Member
 
+# Comptes pilotes affichés sur le dashboard
+PILOTS_PER_PAGE = 25
+
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
@@ -14,51 +24,92 @@ def is_admin(user):
 @user_passes_test(is_admin)
 def finance_dashboard(request):
     """Dashboard financier principal"""
-    # Stats globales
-    total_credits = Transaction.objects.filter(type='CREDIT').aggregate(Sum('amount'))['amount__sum'] or 0
-    total_debits = Transaction.objects.filter(type='DEBIT').aggregate(Sum('amount'))['amount__sum'] or 0
+    # Stats globales (cumuls mensuels, indépendants de la taille du grand livre)
+    summary = get_finance_summary()
     
-    # Liste des pilotes avec leur solde
-    pilots = Member.objects.select_related('user').order_by('user__last_name')
+    # Comptes pilotes : les plus débiteurs d'abord, ou recherche par nom
+    pilots = Member.objects.select_related('user')
+    search = request.GET.get('q', '').strip()
+    if search:
+        pilots = pilots.filter(
+            Q(user__last_name__icontains=search) |
+            Q(user__first_name__icontains=search) |
+            Q(user__username__icontains=search)
+        ).order_by('user__last_name')
+    else:
+        pilots = pilots.order_by('account_balance', 'user__last_name')
     
     # Dernières transactions
     recent_transactions = Transaction.objects.select_related('user').order_by('-date')[:20]
     
     context = {
-        'total_credits': total_credits,
-        'total_debits': total_debits,
-        'balance': total_credits - total_debits,
-        'pilots': pilots,
+        'total_credits': summary['total_credits'],
+        'total_debits': summary['total_debits'],
+        'balance': summary['balance'],
+        'summary': summary,
+        'pilots': pilots[:PILOTS_PER_PAGE],
+        'search': search,
         'recent_transactions': recent_transactions,
-        'pilots_count': pilots.count(),
+        'pilots_count': summary['members_count'],
     }
     return render(request, 'finance/admin/dashboard.html', context)
 
+def _transactions_page(request, queryset, use_cursor=True):
+    """Filtres + page demandée (curseurs after / before)."""
+    queryset, filters = filter_transactions(queryset, request.GET)
+    try:
+        page_size = int(request.GET.get('size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    page = paginate_transactions(
+        queryset,
+        after=request.GET.get('after') if use_cursor else None,
+        before=request.GET.get('before') if use_cursor else None,
+        page_size=page_size,
+    )
+    return page, filters
+
 @login_required
 @user_passes_test(is_admin)
 def finance_transactions(request):
-    """Liste complète des transactions"""
-    transactions = Transaction.objects.select_related('user').order_by('-date')
-    
-    # Filtres optionnels
-    user_filter = request.GET.get('user')
-    type_filter = request.GET.get('type')
-    
-    if user_filter:
-        transactions = transactions.filter(user_id=user_filter)
-    if type_filter:
-        transactions = transactions.filter(type=type_filter)
+    """Liste des transactions, paginée par curseur"""
+    transactions = Transaction.objects.select_related('user')
+    try:
+        page, filters = _transactions_page(request, transactions)
+    except ValueError:
+        # Curseur invalide : retour à la première page
+        page, filters = _transactions_page(request, transactions, use_cursor=False)
     
     users = User.objects.filter(member_profile__isnull=False).order_by('last_name')
     
     context = {
-        'transactions': transactions,
+        'transactions': page,
+        'page': page,
         'users': users,
-        'current_user_filter': user_filter,
-        'current_type_filter': type_filter,
+        'filters': filters,
+        'filters_query': urlencode(filters),
+        'current_user_filter': filters.get('user'),
+        'current_type_filter': filters.get('type'),
     }
     return render(request, 'finance/admin/transactions.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+def finance_transactions_api(request):
+    """Variante JSON de la liste des transactions (défilement infini)"""
+    try:
+        page, filters = _transactions_page(request, Transaction.objects.select_related('user'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'results': [serialize_transaction(t) for t in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'has_next': page.has_next,
+        'filters': filters,
+    })
+
 @login_required
 @user_passes_test(is_admin)
 def finance_credit_account(request, user_id=None):
@@ -98,14 +149,67 @@ def finance_credit_account(request, user_id=None):
         'pilots': pilots,
     })
 
+CREDIT_IMPORT_SESSION_KEY = 'finance_credit_import'
+
+@login_required
+@user_passes_test(is_admin)
+def finance_credit_import(request):
+    """Import en masse de versements : fichier -> aperçu -> validation"""
+    batch = request.session.get(CREDIT_IMPORT_SESSION_KEY)
+    
+    if request.method == 'POST' and request.POST.get('action') == 'confirm':
+        # Lot retiré de la session avant comptabilisation : une seconde
+        # validation (double clic, autre onglet) ne le retrouve plus
+        batch = request.session.pop(CREDIT_IMPORT_SESSION_KEY, None)
+        if not batch:
+            messages.error(request, "Aucun import en attente.")
+            return redirect('finance_credit_import')
+        count, total, duplicates = post_credit_batch(batch['credits'])
+        messages.success(request, f"{count} versement(s) importé(s) pour un total de {total}€")
+        if duplicates:
+            messages.warning(request, f"{duplicates} versement(s) déjà importé(s) entre-temps, ignoré(s)")
+        return redirect('finance_dashboard')
+    
+    if request.method == 'POST' and request.POST.get('action') == 'cancel':
+        request.session.pop(CREDIT_IMPORT_SESSION_KEY, None)
+        return redirect('finance_credit_import')
+    
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, "Sélectionnez un fichier CSV ou OFX.")
+            return redirect('finance_credit_import')
+        if upload.size > MAX_IMPORT_SIZE:
+            messages.error(request, f"Fichier trop volumineux (maximum {MAX_IMPORT_SIZE // (1024 * 1024)} Mo)")
+            return redirect('finance_credit_import')
+        try:
+            rows = read_credit_file(upload.read(), upload.name)
+            batch = prepare_credit_batch(rows, request.POST.get('description') or 'Versement')
+        except ValueError as e:
+            messages.error(request, f"Erreur : {e}")
+            return redirect('finance_credit_import')
+        batch['filename'] = upload.name
+        request.session[CREDIT_IMPORT_SESSION_KEY] = batch
+        return redirect('finance_credit_import')
+    
+    return render(request, 'finance/admin/credit_import.html', {
+        'batch': batch,
+    })
+
 @login_required
 @user_passes_test(is_admin)
 def finance_pilot_detail(request, user_id):
     """Détail du compte d'un pilote"""
-    pilot = get_object_or_404(Member, user_id=user_id)
-    transactions = Transaction.objects.filter(user_id=user_id).order_by('-date')
+    pilot = get_object_or_404(Member.objects.select_related('user'), user_id=user_id)
+    transactions = Transaction.objects.filter(user_id=user_id)
+    try:
+        page, filters = _transactions_page(request, transactions)
+    except ValueError:
+        page, filters = _transactions_page(request, transactions, use_cursor=False)
     
     return render(request, 'finance/admin/pilot_detail.html', {
         'pilot': pilot,
-        'transactions': transactions,
+        'transactions': page,
+        'page': page,
+        'filters_query': urlencode(filters),
     })
@@ -21,13 +21,17 @@ class MaintenanceLogInline(admin.TabularInline):
 class AircraftAdmin(admin.ModelAdmin):
     list_display = [
         'registration', 'model_name', 'status_badge', 'current_hours',
-        'engine_hours_remaining_display', 'hourly_rate', 'cdn_status', 'insurance_status'
+        'engine_hours_remaining_display', 'hourly_rate', 'cdn_status', 'insurance_status', 'airworthy'
     ]
     list_filter = ['status', 'category', 'fuel_type', 'has_gps', 'has_autopilot']
     search_fields = ['registration', 'model_name', 'manufacturer', 'serial_number']
     inlines = [MaintenanceDeadlineInline, MaintenanceLogInline]
     readonly_fields = ['engine_hours_remaining', 'engine_life_percentage', 'is_airworthy', 'has_overdue_maintenance']
 
+    def get_queryset(self, request):
+        # Echeances depassees annotees : pas de requete par avion (liste et fiche)
+        return super().get_queryset(request).with_maintenance_status()
+
     fieldsets = (
         ('Identification', {
             'fields': ('registration', 'model_name', 'manufacturer', 'serial_number', 'year_of_manufacture', 'category', 'image')
@@ -107,7 +111,7 @@ class AircraftAdmin(admin.ModelAdmin):
             color = 'orange'
         else:
             color = 'green'
-        return format_html('<span style="color: {};">{:.0f}h</span>', color, remaining)
+        return format_html('<span style="color: {};">{}h</span>', color, f"{remaining:.0f}")
     engine_hours_remaining_display.short_description = 'Avant TBO'
 
     def cdn_status(self, obj):
@@ -122,6 +126,11 @@ class AircraftAdmin(admin.ModelAdmin):
         return format_html('<span style="color: red;">EXPIRE</span>')
     insurance_status.short_description = 'Assur.'
 
+    def airworthy(self, obj):
+        return obj.is_airworthy
+    airworthy.short_description = 'Navigable'
+    airworthy.boolean = True
+
 
 @admin.register(MaintenanceDeadline)
 class MaintenanceDeadlineAdmin(admin.ModelAdmin):
@@ -130,6 +139,7 @@ class MaintenanceDeadlineAdmin(admin.ModelAdmin):
         'priority_badge', 'status_display', 'days_remaining', 'hours_remaining'
     ]
     list_filter = ['aircraft', 'deadline_type', 'priority', 'is_completed']
+    list_select_related = ['aircraft']
     search_fields = ['title', 'aircraft__registration', 'reference']
 
     fieldsets = (
@@ -178,6 +188,8 @@ class FlightAdmin(admin.ModelAdmin):
         'date', 'aircraft', 'pilot', 'flight_type', 'departure_airport',
         'arrival_airport', 'duration', 'landings_count', 'cost'
     ]
+    list_select_related = ['aircraft', 'pilot']
+    show_full_result_count = False
     list_filter = ['aircraft', 'flight_type', 'date', 'pilot']
     search_fields = ['aircraft__registration', 'pilot__username', 'pilot__last_name', 'departure_airport', 'arrival_airport']
     date_hierarchy = 'date'
@@ -218,6 +230,7 @@ class FlightAdmin(admin.ModelAdmin):
 @admin.register(MaintenanceLog)
 class MaintenanceLogAdmin(admin.ModelAdmin):
     list_display = ['date', 'aircraft', 'work_type', 'workshop', 'cost', 'approved_by']
+    list_select_related = ['aircraft']
     list_filter = ['aircraft', 'work_type', 'date']
     search_fields = ['aircraft__registration', 'workshop', 'description']
     date_hierarchy = 'date'
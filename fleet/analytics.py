@@ -0,0 +1,293 @@
+"""
+Statistiques d'utilisation de la flotte (tableau de bord staff).
+
+Les vols et les reservations d'une periode sont charges en une requete
+chacun (values_list -> colonnes NumPy / DataFrame pandas), puis tous les
+indicateurs sont calcules par operations vectorisees (groupby, isin,
+histogrammes) : le cout depend du nombre de lignes lues, pas d'une requete
+par avion ou par jour, et reste raisonnable sur plusieurs annees.
+
+Indicateurs par avion :
+- heures volees / reservees / disponibles (jours x plage d'ouverture) ;
+- taux de non-presentation : reservation passee sans vol du pilote (ou du
+  second pilote) sur cet avion le meme jour ;
+- rapport bloc / vol (bloc depart-arrivee sur decollage-atterrissage) ;
+- chiffre d'affaires par heure de vol.
+
+Et deux cartes de chaleur jour de semaine x heure : heures reservees
+(demande) et departs effectifs (bloc depart).
+
+Les resultats sont mis en cache par periode : longtemps pour une periode
+terminee, quelques minutes pour une periode qui inclut aujourd'hui.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from core.cache import CacheNamespace
+from planning.models import Reservation
+from .models import Aircraft, Flight
+
+
+ANALYTICS_CACHE = CacheNamespace('fleet.analytics')
+CLOSED_PERIOD_TTL = 60 * 60 * 24
+OPEN_PERIOD_TTL = 60 * 15
+
+# Plage quotidienne ouverte a la location (heures locales), surchargeable
+# par FLEET_OPERATING_HOURS
+DEFAULT_OPERATING_HOURS = (8, 20)
+
+BOOKED_STATUSES = ['PENDING', 'CONFIRMED', 'COMPLETED']
+WEEKDAYS = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
+HEAT_LEVELS = 4
+
+
+def operating_hours():
+    return getattr(settings, 'FLEET_OPERATING_HOURS', DEFAULT_OPERATING_HOURS)
+
+
+def _period_bounds(start, end):
+    """Dates incluses -> [debut, fin[ en datetimes conscients (fuseau local)."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+# ============================================================
+# CHARGEMENT EN COLONNES
+# ============================================================
+
+def _minutes(times):
+    """TimeField -> minutes depuis minuit (NaN si non renseigne)."""
+    return np.array([t.hour * 60 + t.minute if t else np.nan for t in times], dtype=float)
+
+
+def load_flights(start, end):
+    """
+    Vols de la periode, une requete.
+
+    Returns:
+        DataFrame (aircraft_id, pilot_id, copilot_id [-1 si aucun], date,
+        duration, cost, block_off, block_on, takeoff, landing [minutes])
+    """
+    rows = Flight.objects.filter(date__range=(start, end)).order_by().values_list(
+        'aircraft_id', 'pilot_id', 'copilot_id', 'date', 'duration', 'cost',
+        'block_off', 'block_on', 'takeoff_time', 'landing_time',
+    )
+    columns = list(zip(*rows)) or [()] * 10
+    aircraft, pilot, copilot, day, duration, cost, block_off, block_on, takeoff, landing = columns
+
+    return pd.DataFrame({
+        'aircraft_id': np.array(aircraft, dtype=np.int64),
+        'pilot_id': np.array(pilot, dtype=np.int64),
+        'copilot_id': np.array([pk or -1 for pk in copilot], dtype=np.int64),
+        'date': pd.to_datetime(np.array(day, dtype='datetime64[D]')),
+        'duration': np.array(duration, dtype=float),
+        'cost': np.array(cost, dtype=float),
+        'block_off': _minutes(block_off),
+        'block_on': _minutes(block_on),
+        'takeoff': _minutes(takeoff),
+        'landing': _minutes(landing),
+    })
+
+
+def load_reservations(start, end):
+    """
+    Reservations non annulees qui recouvrent la periode, une requete.
+
+    Returns:
+        DataFrame (aircraft_id, user_id, start, end [UTC])
+    """
+    period_start, period_end = _period_bounds(start, end)
+    rows = Reservation.objects.filter(
+        status__in=BOOKED_STATUSES,
+        start_time__lt=period_end,
+        end_time__gt=period_start,
+    ).order_by().values_list('aircraft_id', 'user_id', 'start_time', 'end_time')
+    columns = list(zip(*rows)) or [()] * 4
+    aircraft, user, starts, ends = columns
+
+    return pd.DataFrame({
+        'aircraft_id': np.array(aircraft, dtype=np.int64),
+        'user_id': np.array(user, dtype=np.int64),
+        'start': pd.to_datetime(list(starts), utc=True),
+        'end': pd.to_datetime(list(ends), utc=True),
+    })
+
+
+# ============================================================
+# INDICATEURS
+# ============================================================
+
+def _block_ratios(flights):
+    """Rapport bloc / vol de chaque vol (NaN si horaires incomplets)."""
+    block = (flights['block_on'] - flights['block_off']) % 1440
+    airborne = (flights['landing'] - flights['takeoff']) % 1440
+    return (block / airborne).where((block > 0) & (airborne > 0))
+
+
+def _no_shows(flights, reservations, now):
+    """Masque des reservations passees sans vol correspondant."""
+    local_day = reservations['start'].dt.tz_convert(timezone.get_current_timezone()).dt.normalize().dt.tz_localize(None)
+    booked = pd.MultiIndex.from_arrays([reservations['aircraft_id'], reservations['user_id'], local_day])
+    flown = pd.MultiIndex.from_arrays([
+        np.concatenate([flights['aircraft_id'], flights['aircraft_id']]),
+        np.concatenate([flights['pilot_id'], flights['copilot_id']]),
+        np.concatenate([flights['date'], flights['date']]),
+    ])
+    past = (reservations['end'] <= pd.Timestamp(now)).to_numpy()
+    return past, past & ~booked.isin(flown)
+
+
+def _heatmap(weekdays, hours, weights=None):
+    """Matrice 7 x 24 et niveaux de couleur (0 a HEAT_LEVELS)."""
+    matrix = np.zeros((7, 24))
+    np.add.at(matrix, (np.asarray(weekdays, dtype=int), np.asarray(hours, dtype=int)), 1 if weights is None else weights)
+    peak = matrix.max()
+    levels = np.ceil(matrix / peak * HEAT_LEVELS).astype(int) if peak else np.zeros((7, 24), dtype=int)
+    return [
+        {'day': WEEKDAYS[day], 'cells': [
+            {'value': round(float(matrix[day, hour]), 1), 'level': int(levels[day, hour])} for hour in range(24)
+        ]}
+        for day in range(7)
+    ]
+
+
+def _demand_heatmap(reservations, period_start, period_end):
+    """Heures reservees par jour de semaine et heure locale."""
+    if reservations.empty:
+        return _heatmap([], [])
+    starts = reservations['start'].clip(lower=pd.Timestamp(period_start)).dt.floor('h')
+    ends = reservations['end'].clip(upper=pd.Timestamp(period_end))
+    slots = np.ceil((ends - starts) / pd.Timedelta(hours=1)).clip(lower=0).astype(int).to_numpy()
+
+    # Une ligne par tranche horaire touchee par une reservation
+    owner = np.repeat(np.arange(len(slots)), slots)
+    offsets = np.arange(slots.sum()) - np.repeat(np.cumsum(slots) - slots, slots)
+    utc_starts = starts.dt.tz_localize(None).to_numpy()
+    hours = pd.DatetimeIndex(utc_starts[owner] + offsets * np.timedelta64(1, 'h')).tz_localize('UTC')
+    hours = hours.tz_convert(timezone.get_current_timezone())
+    return _heatmap(hours.weekday, hours.hour)
+
+
+def _departures_heatmap(flights):
+    """Departs (bloc depart) par jour de semaine et heure."""
+    departures = flights[flights['block_off'].notna()]
+    return _heatmap(departures['date'].dt.weekday, departures['block_off'] // 60)
+
+
+def _ratio(numerator, denominator, digits=3):
+    return round(float(numerator) / float(denominator), digits) if denominator else None
+
+
+def compute_fleet_analytics(start, end, now=None):
+    """
+    Indicateurs d'utilisation de la flotte entre deux dates incluses.
+
+    Returns:
+        dict (start, end, days, available_hours, aircraft [une ligne par
+        avion], fleet [totaux], demand_heatmap, departures_heatmap)
+    """
+    now = now or timezone.now()
+    period_start, period_end = _period_bounds(start, end)
+    flights = load_flights(start, end)
+    reservations = load_reservations(start, end)
+
+    days = (end - start).days + 1
+    opening, closing = operating_hours()
+    available = days * (closing - opening)
+
+    # Par avion : vols, heures, chiffre d'affaires, rapport bloc / vol
+    flights['block_ratio'] = _block_ratios(flights)
+    flown = flights.groupby('aircraft_id').agg(
+        flights=('duration', 'size'),
+        flown_hours=('duration', 'sum'),
+        revenue=('cost', 'sum'),
+        block_ratio=('block_ratio', 'mean'),
+    )
+
+    # Par avion : heures reservees (bornees a la periode), non-presentations
+    booked_hours = (
+        reservations['end'].clip(upper=pd.Timestamp(period_end))
+        - reservations['start'].clip(lower=pd.Timestamp(period_start))
+    ) / pd.Timedelta(hours=1)
+    past, no_show = _no_shows(flights, reservations, now)
+    booked = pd.DataFrame({
+        'aircraft_id': reservations['aircraft_id'],
+        'booked_hours': booked_hours,
+        'past': past,
+        'no_show': no_show,
+    }).groupby('aircraft_id').agg(
+        reservations=('past', 'size'),
+        past_reservations=('past', 'sum'),
+        no_shows=('no_show', 'sum'),
+        booked_hours=('booked_hours', 'sum'),
+    )
+
+    registrations = dict(Aircraft.objects.values_list('id', 'registration'))
+    stats = flown.join(booked, how='outer').reindex(list(registrations)).fillna({
+        'flights': 0, 'flown_hours': 0, 'revenue': 0, 'reservations': 0,
+        'past_reservations': 0, 'no_shows': 0, 'booked_hours': 0,
+    })
+
+    rows = []
+    for aircraft_id, row in stats.iterrows():
+        rows.append({
+            'id': int(aircraft_id),
+            'registration': registrations[aircraft_id],
+            'flights': int(row['flights']),
+            'flown_hours': round(float(row['flown_hours']), 2),
+            'booked_hours': round(float(row['booked_hours']), 2),
+            'available_hours': available,
+            'utilization': _ratio(row['flown_hours'], available),
+            'booking_rate': _ratio(row['booked_hours'], available),
+            'reservations': int(row['reservations']),
+            'no_shows': int(row['no_shows']),
+            'no_show_rate': _ratio(row['no_shows'], row['past_reservations']),
+            'block_ratio': None if pd.isna(row['block_ratio']) else round(float(row['block_ratio']), 3),
+            'revenue': round(float(row['revenue']), 2),
+            'revenue_per_hour': _ratio(row['revenue'], row['flown_hours'], 2),
+        })
+    rows.sort(key=lambda row: row['registration'])
+
+    fleet_available = available * len(rows)
+    fleet = {
+        'flights': int(flights.shape[0]),
+        'flown_hours': round(float(flights['duration'].sum()), 2),
+        'booked_hours': round(float(booked_hours.sum()), 2),
+        'available_hours': fleet_available,
+        'utilization': _ratio(flights['duration'].sum(), fleet_available),
+        'booking_rate': _ratio(booked_hours.sum(), fleet_available),
+        'reservations': int(reservations.shape[0]),
+        'no_shows': int(no_show.sum()),
+        'no_show_rate': _ratio(no_show.sum(), past.sum()),
+        'block_ratio': None if flights['block_ratio'].isna().all() else round(float(flights['block_ratio'].mean()), 3),
+        'revenue': round(float(flights['cost'].sum()), 2),
+        'revenue_per_hour': _ratio(flights['cost'].sum(), flights['duration'].sum(), 2),
+    }
+
+    return {
+        'start': start,
+        'end': end,
+        'days': days,
+        'available_hours': available,
+        'aircraft': rows,
+        'fleet': fleet,
+        'demand_heatmap': _demand_heatmap(reservations, period_start, period_end),
+        'departures_heatmap': _departures_heatmap(flights),
+    }
+
+
+def get_fleet_analytics(start, end):
+    """Indicateurs de la periode, depuis le cache si possible."""
+    ttl = CLOSED_PERIOD_TTL if end < timezone.localdate() else OPEN_PERIOD_TTL
+    return ANALYTICS_CACHE.get_or_set(
+        f"{start.isoformat()}:{end.isoformat()}",
+        lambda: compute_fleet_analytics(start, end),
+        ttl,
+    )
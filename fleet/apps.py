@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FleetConfig(AppConfig):
     name = "fleet"
+
+    def ready(self):
+        from . import signals  # noqa: F401
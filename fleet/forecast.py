@@ -0,0 +1,270 @@
+"""
+Prevision des dates d'echeance de maintenance.
+
+Une butee horaire (visite 50h, revision moteur...) n'a pas de date : elle
+tombe quand l'horametre l'atteint. On l'estime a partir de l'usage :
+
+- taux d'usage quotidien de chaque avion : moyenne glissante ponderee
+  (demi-vie USAGE_HALFLIFE jours) des heures d'horametre par jour sur
+  FORECAST_WINDOW jours : une requete, une matrice jours x avions, une
+  moyenne exponentielle pandas pour toute la flotte ;
+- reservations confirmees a venir : un jour reserve compte pour le plus
+  grand du taux habituel et des heures reservees x RESERVATION_USAGE
+  (part d'un creneau reserve qui passe a l'horametre) ;
+- les heures cumulees jour apres jour donnent le premier jour ou la butee
+  est atteinte ; au-dela de l'horizon des reservations, extrapolation au
+  taux habituel.
+
+La date retenue (due_date) est la plus proche de la butee calendaire et de
+la date estimee. Utilise par les alertes maintenance, le planning et le
+tableau de bord flotte.
+
+Le cache est tenu par avion (la prevision d'un avion ne depend que de ses
+vols, reservations et echeances) : une modification n'efface que l'entree
+de l'avion concerne (signals.py), les autres restent servies depuis le
+cache.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from core.cache import CacheNamespace
+from planning.models import Reservation
+from .models import Flight, MaintenanceDeadline
+
+
+FORECAST_CACHE = CacheNamespace('fleet.forecast', version=2)
+FORECAST_TTL = 60 * 15
+
+# Historique du taux d'usage (jours), poids divise par deux tous les
+# USAGE_HALFLIFE jours (l'usage recent compte plus : saison, avion neuf)
+FORECAST_WINDOW = 90
+USAGE_HALFLIFE = 21
+# Horizon des reservations prises en compte (jours)
+RESERVATION_HORIZON = 180
+RESERVATION_USAGE = 0.7
+
+
+# ============================================================
+# TAUX D'USAGE
+# ============================================================
+
+def usage_rates(aircraft_ids, today=None, window=FORECAST_WINDOW):
+    """
+    Heures d'horametre par jour de chaque avion (moyenne glissante ponderee).
+
+    Returns:
+        pandas.Series aircraft_id -> heures / jour (0 si aucun vol)
+    """
+    today = today or timezone.localdate()
+    first_day = today - timedelta(days=window)
+    rows = list(Flight.objects.filter(
+        aircraft_id__in=aircraft_ids, date__gte=first_day, date__lt=today,
+    ).order_by().values_list('aircraft_id', 'date', 'duration'))
+    if not rows:
+        return pd.Series(0.0, index=list(aircraft_ids))
+
+    aircraft, day, duration = zip(*rows)
+    flights = pd.DataFrame({
+        'aircraft_id': np.array(aircraft, dtype=np.int64),
+        'date': pd.to_datetime(np.array(day, dtype='datetime64[D]')),
+        'duration': np.array(duration, dtype=float),
+    })
+
+    # Matrice jours x avions, jours sans vol a 0
+    days = pd.date_range(first_day, today - timedelta(days=1), freq='D')
+    daily = flights.pivot_table(
+        index='date', columns='aircraft_id', values='duration', aggfunc='sum',
+    ).reindex(index=days, columns=list(aircraft_ids)).fillna(0)
+
+    return daily.ewm(halflife=USAGE_HALFLIFE).mean().iloc[-1]
+
+
+def reserved_hours(aircraft_ids, today=None, horizon=RESERVATION_HORIZON):
+    """
+    Heures reservees (confirmees) par jour a venir et par avion.
+
+    Returns:
+        numpy array (horizon jours x avions), jour 0 = aujourd'hui
+    """
+    today = today or timezone.localdate()
+    columns = {aircraft_id: index for index, aircraft_id in enumerate(aircraft_ids)}
+    matrix = np.zeros((horizon, len(columns)))
+
+    rows = list(Reservation.objects.filter(
+        aircraft_id__in=aircraft_ids,
+        status='CONFIRMED',
+        start_time__gte=timezone.now(),
+        start_time__date__lt=today + timedelta(days=horizon),
+    ).order_by().values_list('aircraft_id', 'start_time', 'end_time'))
+    if not rows:
+        return matrix
+
+    aircraft, starts, ends = zip(*rows)
+    starts = pd.to_datetime(list(starts), utc=True)
+    hours = (pd.to_datetime(list(ends), utc=True) - starts) / pd.Timedelta(hours=1)
+    local_days = starts.tz_convert(timezone.get_current_timezone()).normalize().tz_localize(None)
+    day_index = ((local_days - pd.Timestamp(today)) // pd.Timedelta(days=1)).to_numpy()
+    np.add.at(matrix, (day_index, [columns[pk] for pk in aircraft]), hours.to_numpy())
+    return matrix
+
+
+# ============================================================
+# PROJECTION DES ECHEANCES
+# ============================================================
+
+def forecast_deadlines(deadlines=None, today=None):
+    """
+    Date estimee de chaque echeance non realisee.
+
+    Args:
+        deadlines: MaintenanceDeadline (avec aircraft), toutes les echeances
+                   en cours si None
+
+    Returns:
+        dict deadline_id -> {'hours_remaining', 'daily_rate', 'projected_date'
+        (butee horaire, None si aucun usage), 'due_date' (plus proche de la
+        butee calendaire et de la date estimee), 'days_remaining'}
+    """
+    today = today or timezone.localdate()
+    if deadlines is None:
+        deadlines = MaintenanceDeadline.objects.filter(is_completed=False).select_related('aircraft')
+    deadlines = [deadline for deadline in deadlines if not deadline.is_completed]
+    if not deadlines:
+        return {}
+
+    aircraft_ids = sorted({deadline.aircraft_id for deadline in deadlines})
+    rates = usage_rates(aircraft_ids, today)
+    booked = reserved_hours(aircraft_ids, today)
+
+    # Usage attendu jour par jour, cumule (horizon x avions)
+    expected = np.maximum(rates.to_numpy(), booked * RESERVATION_USAGE)
+    cumulative = np.cumsum(expected, axis=0)
+    horizon = cumulative.shape[0]
+
+    forecasts = {}
+    for deadline in deadlines:
+        column = aircraft_ids.index(deadline.aircraft_id)
+        rate = float(rates.iloc[column])
+        hours_remaining = None
+        projected = None
+
+        if deadline.due_at_hours:
+            hours_remaining = float(deadline.due_at_hours - deadline.aircraft.current_hours)
+            if hours_remaining <= 0:
+                projected = today
+            else:
+                day = int(np.searchsorted(cumulative[:, column], hours_remaining))
+                if day < horizon:
+                    projected = today + timedelta(days=day)
+                elif rate > 0:
+                    extra = (hours_remaining - cumulative[-1, column]) / rate
+                    projected = today + timedelta(days=horizon + int(np.ceil(extra)))
+
+        dates = [value for value in (deadline.due_at_date, projected) if value]
+        due_date = min(dates) if dates else None
+        forecasts[deadline.id] = {
+            'hours_remaining': hours_remaining,
+            'daily_rate': round(rate, 2),
+            'projected_date': projected,
+            'due_date': due_date,
+            'days_remaining': (due_date - today).days if due_date else None,
+        }
+    return forecasts
+
+
+def upcoming_deadlines(aircraft_ids=None, today=None):
+    """
+    Echeances en cours avec leur prevision, les plus proches d'abord.
+
+    Returns:
+        Liste de dicts {'deadline', **prevision} (sans date en dernier)
+    """
+    deadlines = MaintenanceDeadline.objects.filter(is_completed=False).select_related('aircraft')
+    if aircraft_ids is not None:
+        deadlines = deadlines.filter(aircraft_id__in=aircraft_ids)
+    deadlines = list(deadlines)
+    forecasts = forecast_deadlines(deadlines, today)
+
+    upcoming = [{'deadline': deadline, **forecasts[deadline.id]} for deadline in deadlines]
+    upcoming.sort(key=lambda item: (item['due_date'] is None, item['due_date']))
+    return upcoming
+
+
+def _first_per_aircraft(upcoming):
+    first = {}
+    for item in upcoming:
+        if item['due_date'] is not None:
+            first.setdefault(item['deadline'].aircraft_id, item)
+    return first
+
+
+def next_deadlines(aircraft_ids=None, today=None):
+    """
+    Prochaine echeance datee (butee calendaire ou estimee) de chaque avion.
+
+    Returns:
+        dict aircraft_id -> {'deadline', **prevision}
+    """
+    return _first_per_aircraft(upcoming_deadlines(aircraft_ids, today))
+
+
+# ============================================================
+# CACHE PAR AVION
+# ============================================================
+
+def _aircraft_key(aircraft_id, today):
+    return f"aircraft:{aircraft_id}:{today.isoformat()}"
+
+
+def _index_key(today):
+    return f"aircraft_ids:{today.isoformat()}"
+
+
+def invalidate_forecast(aircraft_id, deadlines_changed=False):
+    """
+    Efface la prevision d'un avion (et la liste des avions a echeance si
+    une echeance a change).
+    """
+    today = timezone.localdate()
+    keys = [_aircraft_key(aircraft_id, today)]
+    if deadlines_changed:
+        keys.append(_index_key(today))
+    FORECAST_CACHE.delete_many(keys)
+
+
+def get_upcoming_deadlines():
+    """
+    Echeances en cours avec prevision, depuis le cache si possible : seuls
+    les avions absents du cache sont recalcules (en un seul lot).
+    """
+    today = timezone.localdate()
+    aircraft_ids = FORECAST_CACHE.get_or_set(
+        _index_key(today),
+        lambda: sorted(set(
+            MaintenanceDeadline.objects.filter(is_completed=False).values_list('aircraft_id', flat=True)
+        )),
+        FORECAST_TTL,
+    )
+
+    keys = {_aircraft_key(aircraft_id, today): aircraft_id for aircraft_id in aircraft_ids}
+    cached = FORECAST_CACHE.get_many(list(keys))
+    missing = [aircraft_id for key, aircraft_id in keys.items() if key not in cached]
+    if missing:
+        computed = {aircraft_id: [] for aircraft_id in missing}
+        for item in upcoming_deadlines(missing, today):
+            computed[item['deadline'].aircraft_id].append(item)
+        for aircraft_id, items in computed.items():
+            FORECAST_CACHE.set(_aircraft_key(aircraft_id, today), items, FORECAST_TTL)
+            cached[_aircraft_key(aircraft_id, today)] = items
+
+    upcoming = [item for items in cached.values() for item in items]
+    upcoming.sort(key=lambda item: (item['due_date'] is None, item['due_date']))
+    return upcoming
+
+
+def get_next_deadlines():
+    """Prochaine echeance de chaque avion, depuis le cache si possible."""
+    return _first_per_aircraft(get_upcoming_deadlines())
@@ -0,0 +1,53 @@
+"""
+Rapport de continuite de l'horametre de la flotte.
+
+Liste, avion par avion, les vols dont le compteur de depart differe du
+compteur d'arrivee du vol precedent (trou : heures non saisies,
+chevauchement : heures saisies deux fois). Code de sortie en erreur si un
+chevauchement est detecte.
+
+Usage:
+    python manage.py meter_gaps
+    python manage.py meter_gaps --aircraft F-GABC F-HDEF
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from fleet.meters import OVERLAP, meter_gap_report
+from fleet.models import Aircraft
+
+
+class Command(BaseCommand):
+    help = "Trous et chevauchements de l'horametre sur toute la flotte"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aircraft', nargs='+', metavar='IMMAT', help='Immatriculations a controler')
+
+    def handle(self, *args, **options):
+        aircraft_ids = None
+        if options['aircraft']:
+            aircraft_ids = list(
+                Aircraft.objects.filter(registration__in=options['aircraft']).values_list('pk', flat=True)
+            )
+            if not aircraft_ids:
+                raise CommandError("Aucun avion trouve")
+
+        self.stdout.write("[*] Controle de l'horametre...")
+        report = meter_gap_report(aircraft_ids)
+
+        for row in report:
+            line = (
+                f"{row['aircraft__registration']} vol #{row['id']} du {row['date']} : "
+                f"depart {row['hour_meter_start']} / arrivee precedente {row['previous_end']}"
+            )
+            if row['kind'] == OVERLAP:
+                self.stdout.write(self.style.ERROR(f"[!] {line} (chevauchement {row['hours']}h)"))
+            else:
+                self.stdout.write(self.style.WARNING(f"[!] {line} (trou {row['hours']}h)"))
+
+        overlaps = sum(1 for row in report if row['kind'] == OVERLAP)
+        if overlaps:
+            raise CommandError(f"{overlaps} chevauchement(s) d'horametre")
+        if report:
+            self.stdout.write(self.style.WARNING(f"[!] {len(report)} trou(s) d'horametre"))
+        else:
+            self.stdout.write(self.style.SUCCESS("[OK] Horametre continu sur toute la flotte"))
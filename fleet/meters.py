@@ -0,0 +1,175 @@
+"""
+Continuite de l'horametre par avion.
+
+Les vols d'un avion, tries par compteur de depart, forment une chaine :
+le compteur de depart d'un vol est le compteur d'arrivee du precedent.
+L'index (aircraft, hour_meter_start) permet de retrouver les deux voisins
+d'un nouveau vol par deux recherches d'index (O(log n)), sans parcourir le
+carnet de route :
+
+- chevauchement (depart avant l'arrivee du vol precedent, arrivee apres le
+  depart du vol suivant) : toujours refuse, les heures seraient facturees
+  deux fois ;
+- trou (heures non saisies entre deux vols : vol oublie, point fixe) :
+  signale, ou refuse si FLIGHT_METER_REJECT_GAPS est active.
+
+Un vol saisi en retard peut s'inserer dans un trou existant.
+
+meter_gap_report() liste les trous et chevauchements de toute la flotte en
+une requete (fenetre LAG sur le compteur d'arrivee du vol precedent).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+
+from .models import Flight
+
+
+GAP, OVERLAP = 'gap', 'overlap'
+METER_STEP = Decimal('0.01')
+
+
+class MeterConflict(ValueError):
+    """Vol refuse : chevauchement (ou trou si FLIGHT_METER_REJECT_GAPS)."""
+
+    def __init__(self, issues):
+        super().__init__(' ; '.join(issue['message'] for issue in issues))
+        self.issues = issues
+
+
+def reject_gaps():
+    return getattr(settings, 'FLIGHT_METER_REJECT_GAPS', False)
+
+
+# ============================================================
+# VOISINS D'UN VOL
+# ============================================================
+
+def meter_neighbours(aircraft_id, start, exclude_pk=None):
+    """
+    Vols precedent et suivant sur l'horametre de l'avion.
+
+    Returns:
+        (precedent, suivant) : dicts (id, hour_meter_start, hour_meter_end)
+        ou None
+    """
+    flights = Flight.objects.filter(aircraft_id=aircraft_id)
+    if exclude_pk is not None:
+        flights = flights.exclude(pk=exclude_pk)
+    fields = ('id', 'hour_meter_start', 'hour_meter_end')
+
+    previous = flights.filter(hour_meter_start__lte=start).order_by('-hour_meter_start').values(*fields).first()
+    following = flights.filter(hour_meter_start__gt=start).order_by('hour_meter_start').values(*fields).first()
+    return previous, following
+
+
+def meter_issues(aircraft_id, start, end, exclude_pk=None):
+    """
+    Trous et chevauchements d'un vol avec ses voisins.
+
+    Returns:
+        Liste de dicts {'kind': GAP|OVERLAP, 'flight_id', 'hours', 'message'}
+    """
+    start, end = Decimal(str(start)), Decimal(str(end))
+    previous, following = meter_neighbours(aircraft_id, start, exclude_pk)
+
+    issues = []
+    if previous:
+        delta = start - previous['hour_meter_end']
+        if delta < 0:
+            issues.append({
+                'kind': OVERLAP, 'flight_id': previous['id'], 'hours': -delta,
+                'message': (
+                    f"Le compteur depart {start} chevauche le vol precedent "
+                    f"({previous['hour_meter_start']} - {previous['hour_meter_end']})"
+                ),
+            })
+        elif delta > 0:
+            issues.append({
+                'kind': GAP, 'flight_id': previous['id'], 'hours': delta,
+                'message': f"{delta}h non saisies depuis le vol precedent (arrivee {previous['hour_meter_end']})",
+            })
+    if following:
+        delta = following['hour_meter_start'] - end
+        if delta < 0:
+            issues.append({
+                'kind': OVERLAP, 'flight_id': following['id'], 'hours': -delta,
+                'message': (
+                    f"Le compteur arrivee {end} chevauche le vol suivant "
+                    f"({following['hour_meter_start']} - {following['hour_meter_end']})"
+                ),
+            })
+        elif delta > 0:
+            issues.append({
+                'kind': GAP, 'flight_id': following['id'], 'hours': delta,
+                'message': f"{delta}h non saisies avant le vol suivant (depart {following['hour_meter_start']})",
+            })
+    return issues
+
+
+def check_meter_continuity(aircraft_id, start, end, exclude_pk=None):
+    """
+    Verifie la place d'un vol sur l'horametre avant son enregistrement.
+
+    Returns:
+        Trous signales (liste de dicts, voir meter_issues)
+
+    Raises:
+        MeterConflict: chevauchement, ou trou si FLIGHT_METER_REJECT_GAPS
+    """
+    issues = meter_issues(aircraft_id, start, end, exclude_pk)
+    refused = [
+        issue for issue in issues
+        if issue['kind'] == OVERLAP or reject_gaps()
+    ]
+    if refused:
+        raise MeterConflict(refused)
+    return issues
+
+
+# ============================================================
+# RAPPORT FLOTTE
+# ============================================================
+
+def meter_gap_report(aircraft_ids=None):
+    """
+    Trous et chevauchements de l'horametre sur toute la flotte.
+
+    Une seule requete : LAG(hour_meter_end) OVER (PARTITION BY aircraft
+    ORDER BY hour_meter_start), filtre sur les vols dont le compteur de
+    depart differe de l'arrivee du vol precedent.
+
+    Returns:
+        Liste de dicts (id, aircraft_id, aircraft__registration, date,
+        previous_end, hour_meter_start, kind, hours) tries par avion et
+        compteur
+    """
+    flights = Flight.objects.all()
+    if aircraft_ids:
+        flights = flights.filter(aircraft_id__in=aircraft_ids)
+
+    rows = flights.annotate(
+        previous_end=Window(
+            Lag('hour_meter_end'),
+            partition_by=F('aircraft_id'),
+            order_by=F('hour_meter_start').asc(),
+        ),
+    ).filter(
+        previous_end__isnull=False,
+    ).exclude(
+        hour_meter_start=F('previous_end'),
+    ).order_by('aircraft__registration', 'hour_meter_start').values(
+        'id', 'aircraft_id', 'aircraft__registration', 'date', 'previous_end', 'hour_meter_start',
+    )
+
+    report = []
+    for row in rows:
+        # SQLite renvoie LAG() sans l'echelle du champ
+        row['previous_end'] = row['previous_end'].quantize(METER_STEP)
+        delta = row['hour_meter_start'] - row['previous_end']
+        row['kind'] = GAP if delta > 0 else OVERLAP
+        row['hours'] = abs(delta)
+        report.append(row)
+    return report
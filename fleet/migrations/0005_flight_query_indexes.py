@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0004_alter_aircraft_options_alter_flight_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['pilot', 'date'], name='fleet_flight_pilot_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['aircraft', 'date'], name='fleet_flight_aircraft_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0006_flight_client_uuid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['aircraft', 'hour_meter_start'], name='fleet_flight_meter_idx'),
+        ),
+    ]
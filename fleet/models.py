@@ -1,10 +1,29 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 from django.contrib.auth.models import User
 from decimal import Decimal
 from datetime import date
 
 
+class AircraftQuerySet(models.QuerySet):
+    def with_maintenance_status(self, today=None):
+        """
+        Annote overdue_maintenance (echeance non realisee depassee en date ou
+        en heures) : has_overdue_maintenance et is_airworthy ne lisent plus
+        les echeances avion par avion.
+        """
+        today = today or date.today()
+        overdue = MaintenanceDeadline.objects.filter(
+            aircraft=OuterRef('pk'),
+            is_completed=False,
+        ).filter(
+            Q(due_at_date__lt=today) |
+            Q(due_at_hours__gt=0, due_at_hours__lt=OuterRef('current_hours'))
+        )
+        return self.annotate(overdue_maintenance=Exists(overdue))
+
+
 class Aircraft(models.Model):
     """
     Fiche aeronef complete conforme EASA Part-M.
@@ -137,6 +156,8 @@ class Aircraft(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
 
+    objects = AircraftQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Aeronef"
         verbose_name_plural = "Aeronefs"
@@ -185,6 +206,8 @@ class Aircraft(models.Model):
     @property
     def has_overdue_maintenance(self):
         """Verifie si une echeance de maintenance est depassee."""
+        if hasattr(self, 'overdue_maintenance'):
+            return self.overdue_maintenance
         for deadline in self.deadlines.all():
             if deadline.is_overdue():
                 return True
@@ -192,24 +215,14 @@ class Aircraft(models.Model):
 
     @property
     def next_maintenance(self):
-        """Retourne la prochaine echeance de maintenance."""
-        upcoming = []
-        today = date.today()
-
-        for deadline in self.deadlines.all():
-            if deadline.due_at_date and deadline.due_at_date >= today:
-                upcoming.append((deadline.due_at_date, deadline))
-            if deadline.due_at_hours and deadline.due_at_hours >= self.current_hours:
-                # Estimer la date basee sur l'usage moyen
-                upcoming.append((None, deadline))
-
-        if upcoming:
-            # Retourner celle avec la date la plus proche
-            dated = [u for u in upcoming if u[0]]
-            if dated:
-                return min(dated, key=lambda x: x[0])[1]
-            return upcoming[0][1]
-        return None
+        """
+        Retourne la prochaine echeance de maintenance : butee calendaire ou
+        date estimee d'une butee horaire (usage et reservations, voir
+        fleet.forecast), la plus proche.
+        """
+        from .forecast import next_deadlines
+        upcoming = next_deadlines([self.pk]).get(self.pk)
+        return upcoming['deadline'] if upcoming else None
 
 
 class Flight(models.Model):
@@ -285,6 +298,10 @@ class Flight(models.Model):
     pilot_signature = models.BooleanField("Signe par pilote", default=True)
     signature_date = models.DateTimeField("Date signature", auto_now_add=True, null=True)
 
+    # Identifiant genere par la tablette (saisie hors ligne) : un vol renvoye
+    # deux fois par la synchronisation n'est enregistre qu'une fois
+    client_uuid = models.UUIDField("Identifiant client", null=True, blank=True, unique=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
 
@@ -310,16 +327,19 @@ class Flight(models.Model):
             from finance.models import Transaction
             Transaction.objects.create(
                 user=self.pilot,
+                aircraft=self.aircraft,
                 amount=self.cost,
                 type='DEBIT',
                 description=f"Vol {self.aircraft.registration} ({self.duration}h) - {self.get_flight_type_display()}"
             )
 
-            # 4. Mise a jour des compteurs avion
-            self.aircraft.current_hours = self.hour_meter_end
-            self.aircraft.engine_hours = self.hour_meter_end
+            # 4. Mise a jour des compteurs avion (un vol saisi en retard,
+            # insere avant le dernier vol, ne fait pas reculer l'horametre)
+            if end >= Decimal(str(self.aircraft.current_hours)):
+                self.aircraft.current_hours = self.hour_meter_end
+                self.aircraft.engine_hours = self.hour_meter_end
+                self.aircraft.propeller_hours = self.hour_meter_end
             self.aircraft.engine_tsoh = Decimal(str(self.aircraft.engine_tsoh)) + self.duration
-            self.aircraft.propeller_hours = self.hour_meter_end
             self.aircraft.cycles_count += self.landings_count
             self.aircraft.save()
 
@@ -330,6 +350,14 @@ class Flight(models.Model):
         verbose_name = "Vol Realise"
         verbose_name_plural = "Vols Realises"
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Experience recente (atterrissages 90 jours) et carnet de vol par pilote
+            models.Index(fields=['pilot', 'date'], name='fleet_flight_pilot_date_idx'),
+            # Carnet de route d'un aeronef
+            models.Index(fields=['aircraft', 'date'], name='fleet_flight_aircraft_date_idx'),
+            # Horametre d'un aeronef : voisins d'un vol et rapport des trous (fleet.meters)
+            models.Index(fields=['aircraft', 'hour_meter_start'], name='fleet_flight_meter_idx'),
+        ]
 
 
 class MaintenanceDeadline(models.Model):
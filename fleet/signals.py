@@ -0,0 +1,35 @@
+"""
+Invalidation des previsions d'echeances en cache.
+
+Seule l'entree de l'avion concerne est effacee : un vol, une reservation
+ou une echeance ne change pas la prevision des autres avions.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from planning.models import Reservation
+from .forecast import invalidate_forecast
+from .models import Aircraft, Flight, MaintenanceDeadline
+
+
+@receiver([post_save, post_delete], sender=Aircraft)
+def aircraft_changed(sender, instance, **kwargs):
+    # Horametre (heures restantes avant une butee horaire)
+    invalidate_forecast(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def flight_changed(sender, instance, created=False, **kwargs):
+    # Un nouveau vol enregistre aussi son avion (Flight.save) : deja efface
+    if not created:
+        invalidate_forecast(instance.aircraft_id)
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def reservation_changed(sender, instance, **kwargs):
+    invalidate_forecast(instance.aircraft_id)
+
+
+@receiver([post_save, post_delete], sender=MaintenanceDeadline)
+def deadline_changed(sender, instance, **kwargs):
+    invalidate_forecast(instance.aircraft_id, deadlines_changed=True)
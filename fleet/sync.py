@@ -0,0 +1,181 @@
+"""
+Synchronisation du carnet de route saisi hors ligne (tablette du hangar).
+
+La tablette enregistre les vols sans reseau, chacun avec un identifiant
+genere localement (client_uuid), puis envoie toute la journee en une
+requete :
+
+- les vols deja recus (meme client_uuid) sont ignores : un envoi repete
+  apres une coupure ne cree pas de doublon ;
+- les nouveaux vols sont tries par avion et par compteur de depart, puis
+  places sur l'horametre de l'avion (fleet.meters) : un chevauchement avec
+  un vol connu ou un autre vol du lot est refuse, un trou est signale ;
+- ils sont enregistres dans une seule transaction (debit pilote et
+  compteurs avion par Flight.save) : un seul vol invalide et rien n'est
+  enregistre, la tablette recoit la liste des erreurs.
+
+La reponse contient aussi les modifications du serveur depuis le dernier
+jeton de synchronisation (avions, vols du pilote, reservations a venir).
+Les suppressions ne sont pas transmises.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from planning.models import Reservation
+from .meters import MeterConflict, check_meter_continuity
+from .models import Aircraft, Flight
+
+
+SYNC_TOKEN_SALT = 'fleet.sync'
+MAX_SYNC_BATCH = 200
+
+# Premiere synchronisation (ou jeton invalide) : historique limite
+INITIAL_FLIGHTS_HISTORY = timedelta(days=30)
+# Reservations transmises : a partir d'hier
+RESERVATIONS_FROM = timedelta(days=1)
+# Recouvrement entre deux synchronisations : une modification validee juste
+# apres l'emission du jeton n'est pas perdue (le client fusionne par id)
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class SyncRejected(ValueError):
+    """Lot refuse : errors = [{'client_uuid', 'error'}]."""
+
+    def __init__(self, errors):
+        super().__init__("Lot de vols refuse")
+        self.errors = errors
+
+
+# ============================================================
+# JETON DE SYNCHRONISATION
+# ============================================================
+
+def make_sync_token(moment):
+    return signing.dumps({'ts': moment.isoformat()}, salt=SYNC_TOKEN_SALT)
+
+
+def read_sync_token(token):
+    """Date de la derniere synchronisation, None si jeton absent ou invalide."""
+    if not token:
+        return None
+    try:
+        return parse_datetime(signing.loads(token, salt=SYNC_TOKEN_SALT)['ts'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+# ============================================================
+# ENREGISTREMENT DU LOT
+# ============================================================
+
+def post_offline_flights(pilot, entries):
+    """
+    Enregistre un lot de vols saisis hors ligne.
+
+    Args:
+        pilot: User qui a saisi les vols
+        entries: dicts valides (champs de Flight, 'aircraft_id' et
+                 'client_uuid' obligatoires)
+
+    Returns:
+        (vols crees, client_uuid deja synchronises,
+         trous d'horametre signales [{'client_uuid', 'warning'}])
+
+    Raises:
+        SyncRejected: lot trop gros, avion ou second pilote inconnu,
+                      compteurs incoherents ou chevauchement d'horametre
+    """
+    if len(entries) > MAX_SYNC_BATCH:
+        raise SyncRejected([{'client_uuid': None, 'error': f"Lot limite a {MAX_SYNC_BATCH} vols"}])
+
+    uuids = [entry['client_uuid'] for entry in entries]
+    if len(set(uuids)) != len(uuids):
+        raise SyncRejected([{'client_uuid': None, 'error': "client_uuid en double dans le lot"}])
+
+    with transaction.atomic():
+        already = set(Flight.objects.filter(client_uuid__in=uuids).values_list('client_uuid', flat=True))
+        pending = [entry for entry in entries if entry['client_uuid'] not in already]
+
+        # Compteurs relus dans la transaction (verrou sur PostgreSQL)
+        aircraft_ids = {entry['aircraft_id'] for entry in pending}
+        aircraft_by_id = Aircraft.objects.select_for_update().in_bulk(aircraft_ids)
+        copilot_ids = {entry['copilot_id'] for entry in pending if entry.get('copilot_id')}
+        known_copilots = set(User.objects.filter(pk__in=copilot_ids).values_list('pk', flat=True))
+        pending.sort(key=lambda entry: (entry['aircraft_id'], entry['hour_meter_start']))
+
+        errors = []
+        for entry in pending:
+            aircraft_id = entry['aircraft_id']
+            if aircraft_id not in aircraft_by_id:
+                errors.append({'client_uuid': entry['client_uuid'], 'error': f"Avion {aircraft_id} inconnu"})
+                continue
+            if entry.get('copilot_id') and entry['copilot_id'] not in known_copilots:
+                errors.append({'client_uuid': entry['client_uuid'], 'error': "Second pilote inconnu"})
+            if entry['hour_meter_end'] <= entry['hour_meter_start']:
+                errors.append({
+                    'client_uuid': entry['client_uuid'],
+                    'error': "Le compteur arrivee doit etre superieur au depart",
+                })
+        if errors:
+            raise SyncRejected(errors)
+
+        created, warnings = [], []
+        for entry in pending:
+            # Controle a l'enregistrement : les vols precedents du lot sont
+            # deja en base et comptent comme voisins
+            try:
+                gaps = check_meter_continuity(entry['aircraft_id'], entry['hour_meter_start'], entry['hour_meter_end'])
+            except MeterConflict as e:
+                errors.append({'client_uuid': entry['client_uuid'], 'error': str(e)})
+                continue
+            warnings.extend({'client_uuid': str(entry['client_uuid']), 'warning': gap['message']} for gap in gaps)
+
+            # Meme instance d'avion pour les vols successifs : Flight.save
+            # avance ses compteurs en memoire puis en base
+            flight = Flight(**entry, pilot=pilot)
+            flight.aircraft = aircraft_by_id[entry['aircraft_id']]
+            flight.save()
+            created.append(flight)
+        if errors:
+            # Annule aussi les vols deja enregistres du lot
+            raise SyncRejected(errors)
+
+    return created, sorted(str(value) for value in already), warnings
+
+
+# ============================================================
+# MODIFICATIONS DU SERVEUR
+# ============================================================
+
+def server_changes(pilot, since=None, now=None):
+    """
+    Modifications depuis la derniere synchronisation (tout si since=None).
+
+    Returns:
+        dict {'aircraft', 'flights', 'reservations'} de querysets
+    """
+    now = now or timezone.now()
+    aircraft = Aircraft.objects.with_maintenance_status()
+    flights = Flight.objects.filter(pilot=pilot).select_related('aircraft', 'pilot', 'copilot')
+    reservations = Reservation.objects.filter(
+        end_time__gte=now - RESERVATIONS_FROM,
+    ).select_related('aircraft', 'user', 'instructor')
+
+    if since is None:
+        flights = flights.filter(date__gte=(now - INITIAL_FLIGHTS_HISTORY).date())
+    else:
+        since -= SYNC_OVERLAP
+        aircraft = aircraft.filter(updated_at__gt=since)
+        flights = flights.filter(updated_at__gt=since)
+        reservations = reservations.filter(updated_at__gt=since)
+
+    return {
+        'aircraft': aircraft.order_by('registration'),
+        'flights': flights.order_by('date', 'hour_meter_start'),
+        'reservations': reservations.order_by('start_time'),
+    }
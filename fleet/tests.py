@@ -1,3 +1,267 @@
-from django.test import TestCase
+import json
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from finance.models import Transaction
+from members.models import Member
+from planning.models import Reservation
+from . import forecast
+from .forecast import get_upcoming_deadlines
+from .meters import GAP, OVERLAP, MeterConflict, check_meter_continuity, meter_gap_report
+from .models import Aircraft, Flight, MaintenanceDeadline
+from .sync import SyncRejected, post_offline_flights
+from .views import ANALYTICS_MAX_DAYS, _analytics_period
+
+
+# ============================================================
+# ETAT DE MAINTENANCE (ANNOTATION)
+# ============================================================
+
+class MaintenanceStatusQueriesTests(TestCase):
+    ROWS = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        aircraft = Aircraft.objects.bulk_create(
+            Aircraft(registration=f"F-{n:04d}", model_name='DR400', hourly_rate=150, current_hours=Decimal('100'))
+            for n in range(cls.ROWS)
+        )
+        MaintenanceDeadline.objects.bulk_create(
+            [MaintenanceDeadline(aircraft=plane, title='CEN', due_at_date=today - timedelta(days=1))
+             for plane in aircraft[0::3]] +
+            [MaintenanceDeadline(aircraft=plane, title='50h', due_at_hours=Decimal('90'))
+             for plane in aircraft[1::3]] +
+            [MaintenanceDeadline(aircraft=plane, title='50h', due_at_hours=Decimal('150'), due_at_date=today)
+             for plane in aircraft[2::3]]
+        )
+
+    def test_one_query_for_the_whole_fleet(self):
+        with self.assertNumQueries(1):
+            fleet = list(Aircraft.objects.with_maintenance_status().order_by('registration'))
+            overdue = [plane.has_overdue_maintenance for plane in fleet]
+            [plane.is_airworthy for plane in fleet]
+
+        self.assertEqual(len(fleet), self.ROWS)
+        self.assertEqual(sum(overdue), len(range(0, self.ROWS, 3)) + len(range(1, self.ROWS, 3)))
+
+    def test_annotation_matches_the_deadlines(self):
+        for plane in Aircraft.objects.with_maintenance_status().order_by('registration')[:9]:
+            fresh = Aircraft.objects.get(pk=plane.pk)
+            self.assertEqual(plane.has_overdue_maintenance, fresh.has_overdue_maintenance)
+
+
+# ============================================================
+# PREVISION DES ECHEANCES (CACHE)
+# ============================================================
+
+class ForecastCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.plane = Aircraft.objects.create(
+            registration='F-GABC', model_name='DR400', hourly_rate=150, current_hours=Decimal('100'),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self):
+        return [item['deadline'].title for item in get_upcoming_deadlines()]
+
+    def test_deadline_changes_clear_the_cache(self):
+        self.assertEqual(self.titles(), [])
+        deadline = MaintenanceDeadline.objects.create(
+            aircraft=self.plane, title='CEN', due_at_date=date.today() + timedelta(days=30),
+        )
+        self.assertEqual(self.titles(), ['CEN'])
+
+        deadline.is_completed = True
+        deadline.save()
+        self.assertEqual(self.titles(), [])
+
+    def test_aircraft_hours_change_the_forecast(self):
+        MaintenanceDeadline.objects.create(aircraft=self.plane, title='50h', due_at_hours=Decimal('150'))
+        self.assertEqual(get_upcoming_deadlines()[0]['hours_remaining'], 50)
+
+        self.plane.current_hours = Decimal('140')
+        self.plane.save()
+        self.assertEqual(get_upcoming_deadlines()[0]['hours_remaining'], 10)
+
+    def test_reservation_recomputes_only_its_aircraft(self):
+        other = Aircraft.objects.create(
+            registration='F-GXYZ', model_name='DR400', hourly_rate=150, current_hours=Decimal('100'),
+        )
+        for plane in (self.plane, other):
+            MaintenanceDeadline.objects.create(aircraft=plane, title='50h', due_at_hours=Decimal('150'))
+        get_upcoming_deadlines()
+
+        start = timezone.now() + timedelta(days=1)
+        Reservation.objects.create(
+            user=User.objects.create_user('pilote'), aircraft=self.plane,
+            start_time=start, end_time=start + timedelta(hours=2), status='CONFIRMED', is_instruction=True,
+        )
+        with mock.patch.object(forecast, 'upcoming_deadlines', wraps=forecast.upcoming_deadlines) as compute:
+            self.assertEqual(len(get_upcoming_deadlines()), 2)
+            get_upcoming_deadlines()
+        self.assertEqual([call.args[0] for call in compute.call_args_list], [[self.plane.id]])
+
+
+# ============================================================
+# CONTINUITE DE L'HORAMETRE
+# ============================================================
+
+class MeterContinuityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote')
+        Member.objects.create(user=cls.pilot, account_balance=Decimal('0'))
+        cls.plane = Aircraft.objects.create(
+            registration='F-GABC', model_name='DR400', hourly_rate=150, current_hours=Decimal('100'),
+        )
+        for start, end in (('100.00', '101.00'), ('101.00', '102.50'), ('104.00', '105.00')):
+            Flight.objects.create(
+                aircraft=cls.plane, pilot=cls.pilot,
+                hour_meter_start=Decimal(start), hour_meter_end=Decimal(end),
+            )
+
+    def test_flight_filling_a_gap_is_accepted(self):
+        self.assertEqual(check_meter_continuity(self.plane.id, Decimal('102.50'), Decimal('104.00')), [])
+
+    def test_gap_is_reported(self):
+        gaps = check_meter_continuity(self.plane.id, Decimal('102.50'), Decimal('103.00'))
+        self.assertEqual([(gap['kind'], gap['hours']) for gap in gaps], [(GAP, Decimal('1.00'))])
+
+    @override_settings(FLIGHT_METER_REJECT_GAPS=True)
+    def test_gap_can_be_refused(self):
+        with self.assertRaises(MeterConflict):
+            check_meter_continuity(self.plane.id, Decimal('105.50'), Decimal('106.00'))
+
+    def test_overlaps_are_refused(self):
+        for start, end in (('102.00', '103.00'), ('103.00', '104.50'), ('100.50', '100.80')):
+            with self.subTest(start=start, end=end), self.assertRaises(MeterConflict) as raised:
+                check_meter_continuity(self.plane.id, Decimal(start), Decimal(end))
+            self.assertTrue(all(issue['kind'] == OVERLAP for issue in raised.exception.issues))
+
+    def test_edited_flight_is_not_its_own_neighbour(self):
+        flight = Flight.objects.get(aircraft=self.plane, hour_meter_start=Decimal('101.00'))
+        issues = check_meter_continuity(self.plane.id, Decimal('101.00'), Decimal('102.50'), exclude_pk=flight.pk)
+        self.assertEqual([issue['kind'] for issue in issues], [GAP])
+
+    def test_fleet_report(self):
+        report = meter_gap_report()
+        self.assertEqual(
+            [(row['previous_end'], row['hour_meter_start'], row['kind'], row['hours']) for row in report],
+            [(Decimal('102.50'), Decimal('104.00'), GAP, Decimal('1.50'))],
+        )
+
+
+# ============================================================
+# SYNCHRONISATION HORS LIGNE
+# ============================================================
+
+@override_settings(REQUEST_STATS_SLOW_MS=60 * 1000)
+class OfflineSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote')
+        Member.objects.create(user=cls.pilot, account_balance=Decimal('0'))
+        cls.plane = Aircraft.objects.create(
+            registration='F-GABC', model_name='DR400', hourly_rate=150, current_hours=Decimal('100'),
+        )
+
+    def entry(self, start, end, **extra):
+        return {
+            'client_uuid': uuid.uuid4(), 'aircraft_id': self.plane.id, 'date': date.today(),
+            'hour_meter_start': Decimal(start), 'hour_meter_end': Decimal(end), **extra,
+        }
+
+    def test_resent_batch_is_posted_once(self):
+        # Vols envoyes dans le desordre : places par compteur de depart
+        entries = [self.entry('101.00', '102.00'), self.entry('100.00', '101.00')]
+        created, duplicates, warnings = post_offline_flights(self.pilot, entries)
+        self.assertEqual((len(created), duplicates, warnings), (2, [], []))
+
+        created, duplicates, _ = post_offline_flights(self.pilot, entries)
+        self.assertEqual(created, [])
+        self.assertEqual(duplicates, sorted(str(entry['client_uuid']) for entry in entries))
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(Transaction.objects.filter(user=self.pilot).count(), 2)
+        self.plane.refresh_from_db()
+        self.assertEqual(self.plane.current_hours, Decimal('102.00'))
+
+    def test_overlap_rejects_the_whole_batch(self):
+        entries = [self.entry('100.00', '101.00'), self.entry('100.50', '101.50')]
+        with self.assertRaises(SyncRejected) as raised:
+            post_offline_flights(self.pilot, entries)
+        self.assertEqual([error['client_uuid'] for error in raised.exception.errors], [entries[1]['client_uuid']])
+        self.assertFalse(Flight.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_gap_is_reported_not_refused(self):
+        post_offline_flights(self.pilot, [self.entry('100.00', '101.00')])
+        entry = self.entry('102.00', '103.00')
+        _, _, warnings = post_offline_flights(self.pilot, [entry])
+        self.assertEqual([warning['client_uuid'] for warning in warnings], [str(entry['client_uuid'])])
+
+    def test_api_retry_returns_duplicates(self):
+        self.client.force_login(self.pilot)
+        body = json.dumps({'flights': [{
+            'client_uuid': str(uuid.uuid4()), 'aircraft_id': self.plane.id, 'date': date.today().isoformat(),
+            'hour_meter_start': '100.00', 'hour_meter_end': '101.00',
+        }]})
+        url = reverse('api:tech_log_sync')
+
+        first = self.client.post(url, body, content_type='application/json').json()
+        second = self.client.post(url, body, content_type='application/json').json()
+        self.assertEqual(len(first['posted']), 1)
+        self.assertEqual((second['posted'], second['duplicates']), ([], [first['posted'][0]['client_uuid']]))
+        self.assertEqual(Flight.objects.count(), 1)
+
+        response = self.client.post(url, json.dumps({'flights': [{
+            'client_uuid': str(uuid.uuid4()), 'aircraft_id': self.plane.id, 'date': date.today().isoformat(),
+            'hour_meter_start': '100.50', 'hour_meter_end': '101.50',
+        }]}), content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+
+
+# ============================================================
+# UTILISATION DE LA FLOTTE (PERIODE)
+# ============================================================
+
+class AnalyticsPeriodTests(SimpleTestCase):
+    today = date(2026, 3, 15)
+
+    def period(self, **params):
+        return _analytics_period(params, self.today)
+
+    def test_days_are_clamped(self):
+        start, end, days = self.period(days=str(10 ** 9))
+        self.assertEqual((end, days, (end - start).days + 1), (self.today, ANALYTICS_MAX_DAYS, ANALYTICS_MAX_DAYS))
+        self.assertEqual(self.period(days='-5')[2], 1)
+        self.assertEqual(self.period(days='abc')[2], 90)
+
+    def test_invalid_dates_fall_back_to_defaults(self):
+        for params in ({'end': '2026-02-30'}, {'start': '2026-13-01'}, {'end': '0001-01-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.period(**params), (self.today - timedelta(days=89), self.today, 90))
+
+    def test_explicit_range_is_bounded(self):
+        start, end, _ = self.period(start='1900-01-01', end='2026-03-01')
+        self.assertEqual((end, (end - start).days + 1), (date(2026, 3, 1), ANALYTICS_MAX_DAYS))
+
+
+@override_settings(REQUEST_STATS_SLOW_MS=60 * 1000)
+class AnalyticsViewTests(TestCase):
+    def test_bad_parameters_do_not_fail(self):
+        self.client.force_login(User.objects.create_user('chef', is_staff=True))
+        for params in ({'days': str(10 ** 9)}, {'end': '2026-02-30'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('admin_analytics'), params).status_code, 200)
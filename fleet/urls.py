@@ -7,6 +7,7 @@ urlpatterns = [
     
     # Admin Dashboard
     path('admin/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/analytics/', views.admin_analytics, name='admin_analytics'),
     path('admin/aircraft/add/', views.admin_aircraft_add, name='admin_aircraft_add'),
     path('admin/aircraft/<int:aircraft_id>/edit/', views.admin_aircraft_edit, name='admin_aircraft_edit'),
     path('admin/aircraft/<int:aircraft_id>/delete/', views.admin_aircraft_delete, name='admin_aircraft_delete'),
@@ -1,8 +1,15 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .analytics import get_fleet_analytics
+from .forecast import get_upcoming_deadlines
 from .models import Aircraft, Flight, MaintenanceDeadline
+from .meters import check_meter_continuity
 from decimal import Decimal
+from datetime import timedelta
 
 def is_admin(user):
     """Vérifie si l'utilisateur est staff ou superuser"""
@@ -37,21 +44,28 @@ def log_flight(request, aircraft_id):
             if hour_end <= hour_start:
                  raise ValueError("Le compteur arrivée doit être supérieur au départ.")
 
-            # Création du Vol
-            flight = Flight.objects.create(
-                aircraft=aircraft,
-                pilot=request.user,
-                hour_meter_start=hour_start,
-                hour_meter_end=hour_end,
-                block_off=block_off,
-                block_on=block_on,
-                takeoff_time=takeoff, # Si vide = None
-                landing_time=landing, # Si vide = None
-                landings_count=landings,
-                fuel_added=fuel,
-                oil_added=oil,
-                complaints=complaints
-            )
+            # Continuité de l'horamètre : chevauchement refusé, trou signalé.
+            # Avion verrouillé : deux saisies simultanées ne passent pas le
+            # contrôle avec les mêmes voisins.
+            with transaction.atomic():
+                aircraft = Aircraft.objects.select_for_update().get(pk=aircraft.pk)
+                meter_gaps = check_meter_continuity(aircraft.pk, hour_start, hour_end)
+
+                # Création du Vol
+                flight = Flight.objects.create(
+                    aircraft=aircraft,
+                    pilot=request.user,
+                    hour_meter_start=hour_start,
+                    hour_meter_end=hour_end,
+                    block_off=block_off,
+                    block_on=block_on,
+                    takeoff_time=takeoff, # Si vide = None
+                    landing_time=landing, # Si vide = None
+                    landings_count=landings,
+                    fuel_added=fuel,
+                    oil_added=oil,
+                    complaints=complaints
+                )
             
             # Gestion des pannes (Squawks)
             if complaints and len(complaints.strip()) > 3:
@@ -59,6 +73,8 @@ def log_flight(request, aircraft_id):
                 # aircraft.status = 'MAINTENANCE' 
                 # aircraft.save()
                 messages.warning(request, "Observation enregistrée. L'atelier a été notifié.")
+            for gap in meter_gaps:
+                messages.warning(request, f"Horamètre : {gap['message']}")
 
             messages.success(request, f"Vol enregistré ! Temps de vol: {flight.duration}h. Votre compte a été débité.")
             return redirect('profile') # Redirection vers profil
@@ -79,6 +95,9 @@ def log_flight(request, aircraft_id):
 # ADMIN DASHBOARD
 # =============================================================================
 
+# Échéances affichées dans la prévision du tableau de bord
+MAINTENANCE_FORECAST_ROWS = 8
+
 @login_required
 @user_passes_test(is_admin)
 def admin_dashboard(request):
@@ -92,11 +111,59 @@ def admin_dashboard(request):
     context = {
         'aircrafts': aircrafts,
         'maintenance_alerts': maintenance_alerts,
+        # Échéances à venir, butées horaires converties en date estimée
+        'maintenance_forecast': get_upcoming_deadlines()[:MAINTENANCE_FORECAST_ROWS],
         'total_aircrafts': aircrafts.count(),
         'active_aircrafts': aircrafts.filter(status='AVAILABLE').count(),
     }
     return render(request, 'fleet/admin/dashboard.html', context)
 
+# Périodes proposées sur le tableau d'utilisation (jours), la plus longue
+# sert aussi de borne aux périodes saisies
+ANALYTICS_PERIODS = [30, 90, 365, 1095]
+ANALYTICS_DEFAULT_DAYS = 90
+ANALYTICS_MAX_DAYS = max(ANALYTICS_PERIODS)
+
+
+def _analytics_period(params, today):
+    """
+    Période demandée (?days=, ?start=, ?end=), bornée à ANALYTICS_MAX_DAYS.
+    Valeurs invalides (date inexistante, nombre hors bornes) : valeurs par défaut.
+
+    Returns:
+        (start, end, days)
+    """
+    try:
+        days = min(max(int(params.get('days', ANALYTICS_DEFAULT_DAYS)), 1), ANALYTICS_MAX_DAYS)
+    except ValueError:
+        days = ANALYTICS_DEFAULT_DAYS
+    try:
+        end = parse_date(params.get('end', '')) or today
+        start = parse_date(params.get('start', '')) or end - timedelta(days=days - 1)
+        if start > end:
+            start, end = end, start
+        start = max(start, end - timedelta(days=ANALYTICS_MAX_DAYS - 1))
+    except (ValueError, OverflowError):
+        days = ANALYTICS_DEFAULT_DAYS
+        end = today
+        start = end - timedelta(days=days - 1)
+    return start, end, days
+
+
+@login_required
+@user_passes_test(is_admin)
+def admin_analytics(request):
+    """Utilisation de la flotte : heures, réservations, non-présentations, demande"""
+    start, end, days = _analytics_period(request.GET, timezone.localdate())
+
+    context = {
+        'analytics': get_fleet_analytics(start, end),
+        'periods': ANALYTICS_PERIODS,
+        'days': days,
+        'hours': range(24),
+    }
+    return render(request, 'fleet/admin/analytics.html', context)
+
 @login_required
 @user_passes_test(is_admin)
 def admin_aircraft_add(request):
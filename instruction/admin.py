@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (
-    TrainingPhase, TrainingExercise, StudentProgression,
+    TrainingProgram, TrainingPhase, TrainingExercise, StudentProgression,
     ExerciseProgress, Lesson, LessonExerciseEvaluation
 )
 
@@ -16,12 +16,20 @@ class TrainingExerciseInline(admin.TabularInline):
     ordering = ['order']
 
 
+@admin.register(TrainingProgram)
+class TrainingProgramAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'version')
+    search_fields = ('code', 'name')
+
+
 @admin.register(TrainingPhase)
 class TrainingPhaseAdmin(admin.ModelAdmin):
-    list_display = ('code', 'name', 'order', 'target_hours', 'is_solo_allowed', 'exercise_count')
+    list_display = ('code', 'name', 'program', 'order', 'target_hours', 'is_solo_allowed', 'exercise_count')
     list_editable = ('order', 'target_hours', 'is_solo_allowed')
+    list_filter = ('program',)
+    list_select_related = ('program',)
     search_fields = ('code', 'name')
-    ordering = ['order']
+    ordering = ['program', 'order']
     inlines = [TrainingExerciseInline]
 
     def exercise_count(self, obj):
@@ -32,10 +40,10 @@ class TrainingPhaseAdmin(admin.ModelAdmin):
 @admin.register(TrainingExercise)
 class TrainingExerciseAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'phase', 'order', 'is_mandatory', 'is_solo_exercise')
-    list_filter = ('phase', 'is_mandatory', 'is_solo_exercise')
+    list_filter = ('phase__program', 'phase', 'is_mandatory', 'is_solo_exercise')
     search_fields = ('code', 'name', 'description')
     list_editable = ('order', 'is_mandatory', 'is_solo_exercise')
-    ordering = ['phase__order', 'order']
+    ordering = ['phase__program', 'phase__order', 'order']
 
 
 # ============================================================
@@ -54,11 +62,12 @@ class ExerciseProgressInline(admin.TabularInline):
 @admin.register(StudentProgression)
 class StudentProgressionAdmin(admin.ModelAdmin):
     list_display = (
-        'student', 'current_phase', 'target_license',
+        'student', 'program', 'current_phase', 'target_license',
         'total_instruction_hours', 'total_solo_hours', 'total_hours',
         'first_solo_date', 'is_active'
     )
-    list_filter = ('current_phase', 'target_license', 'is_active', 'theory_exam_passed', 'practical_exam_passed')
+    list_filter = ('program', 'current_phase', 'target_license', 'is_active', 'theory_exam_passed', 'practical_exam_passed')
+    list_select_related = ('student', 'program', 'current_phase')
     search_fields = ('student__last_name', 'student__first_name', 'student__email', 'student__username')
     autocomplete_fields = ['student', 'primary_instructor', 'current_phase']
     readonly_fields = ['total_hours']
@@ -66,7 +75,7 @@ class StudentProgressionAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Eleve', {
-            'fields': ('student', 'primary_instructor', 'target_license', 'is_active')
+            'fields': ('student', 'primary_instructor', 'program', 'target_license', 'is_active')
         }),
         ('Progression', {
             'fields': ('current_phase', 'enrollment_date')
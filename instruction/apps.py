@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class InstructionConfig(AppConfig):
     name = "instruction"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instruction', '0003_trainingexercise_trainingphase_alter_lesson_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exerciseprogress',
+            index=models.Index(fields=['student_progression', 'level'], name='instruction_progress_level_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Programmes fournis (instruction/programs/*.json) : prefixe des codes de phase
+SHIPPED_PROGRAMS = {
+    'PH': ('PPL', "PPL(A) - Programme standard FFA"),
+    'LA': ('LAPL', "LAPL(A) - Licence de pilote d'aeronef leger"),
+    'BB': ('BB', "Brevet de Base - Vol local"),
+    'UL': ('ULM', "Brevet ULM multiaxes"),
+}
+
+
+def assign_programs(apps, schema_editor):
+    """
+    Rattache les phases existantes a leur programme (prefixe du code, PPL
+    par defaut) et les eleves au programme de leur licence visee.
+    """
+    TrainingProgram = apps.get_model('instruction', 'TrainingProgram')
+    TrainingPhase = apps.get_model('instruction', 'TrainingPhase')
+    StudentProgression = apps.get_model('instruction', 'StudentProgression')
+
+    programs = {}
+    for phase in TrainingPhase.objects.all():
+        code, name = SHIPPED_PROGRAMS.get(phase.code[:2], SHIPPED_PROGRAMS['PH'])
+        if code not in programs:
+            programs[code], _ = TrainingProgram.objects.get_or_create(code=code, defaults={'name': name})
+        phase.program = programs[code]
+        phase.save(update_fields=['program'])
+
+    default = programs.get('PPL') or next(iter(programs.values()), None)
+    if default is None:
+        return
+    for license_code in StudentProgression.objects.values_list('target_license', flat=True).distinct():
+        StudentProgression.objects.filter(target_license=license_code).update(
+            program=programs.get(license_code, default)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instruction', '0004_exerciseprogress_level_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingProgram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True, verbose_name='Code')),
+                ('name', models.CharField(max_length=100, verbose_name='Nom du programme')),
+                ('version', models.CharField(blank=True, max_length=20, verbose_name='Version')),
+            ],
+            options={
+                'verbose_name': 'Programme de formation',
+                'verbose_name_plural': 'Programmes de formation',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.AddField(
+            model_name='trainingphase',
+            name='program',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='phases', to='instruction.trainingprogram', verbose_name='Programme'),
+        ),
+        migrations.AddField(
+            model_name='studentprogression',
+            name='program',
+            field=models.ForeignKey(blank=True, help_text='Programme suivi (programme par defaut si vide)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='students', to='instruction.trainingprogram', verbose_name='Programme'),
+        ),
+        migrations.RunPython(assign_programs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='trainingphase',
+            name='program',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='phases', to='instruction.trainingprogram', verbose_name='Programme'),
+        ),
+        migrations.AlterField(
+            model_name='trainingphase',
+            name='code',
+            field=models.CharField(max_length=10, verbose_name='Code'),
+        ),
+        migrations.AlterModelOptions(
+            name='trainingphase',
+            options={'ordering': ['program', 'order'], 'verbose_name': 'Phase de formation', 'verbose_name_plural': 'Phases de formation'},
+        ),
+        migrations.AlterUniqueTogether(
+            name='trainingphase',
+            unique_together={('program', 'code')},
+        ),
+    ]
@@ -4,6 +4,36 @@ from django.utils import timezone
 from fleet.models import Flight
 
 
+# ============================================================
+# PROGRAMMES DE FORMATION (PPL, LAPL, BB, ULM)
+# ============================================================
+
+class TrainingProgram(models.Model):
+    """
+    Programme de formation (ex: PPL(A) FFA, LAPL(A), Brevet de Base).
+    Declare dans instruction/programs/*.json, charge par setup_training_program.
+    """
+    code = models.CharField("Code", max_length=10, unique=True)  # ex: PPL, LAPL
+    name = models.CharField("Nom du programme", max_length=100)
+    version = models.CharField("Version", max_length=20, blank=True)
+
+    # Programme des eleves inscrits sans programme explicite
+    DEFAULT_CODE = 'PPL'
+
+    class Meta:
+        verbose_name = "Programme de formation"
+        verbose_name_plural = "Programmes de formation"
+        ordering = ['code']
+
+    def __str__(self):
+        return self.name or self.code
+
+    @classmethod
+    def get_default(cls):
+        """Programme PPL s'il est charge, sinon le premier programme."""
+        return cls.objects.filter(code=cls.DEFAULT_CODE).first() or cls.objects.order_by('code').first()
+
+
 # ============================================================
 # PHASES DE FORMATION (Programme FFA/DGAC)
 # ============================================================
@@ -11,10 +41,16 @@ from fleet.models import Flight
 class TrainingPhase(models.Model):
     """
     Phase de formation (ex: Phase 1 - Decouverte, Phase 2 - Maniabilite, etc.)
-    Conforme au programme PPL FFA.
+    d'un programme de formation.
     """
+    program = models.ForeignKey(
+        TrainingProgram,
+        on_delete=models.CASCADE,
+        related_name='phases',
+        verbose_name="Programme"
+    )
     order = models.PositiveSmallIntegerField("Ordre", default=0)
-    code = models.CharField("Code", max_length=10, unique=True)  # ex: PH1, PH2
+    code = models.CharField("Code", max_length=10)  # ex: PH1, PH2
     name = models.CharField("Nom de la phase", max_length=100)
     description = models.TextField("Description", blank=True)
     target_hours = models.DecimalField(
@@ -29,7 +65,8 @@ class TrainingPhase(models.Model):
     class Meta:
         verbose_name = "Phase de formation"
         verbose_name_plural = "Phases de formation"
-        ordering = ['order']
+        ordering = ['program', 'order']
+        unique_together = ['program', 'code']
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -81,6 +118,15 @@ class StudentProgression(models.Model):
         related_name='training_progression',
         verbose_name="Eleve"
     )
+    program = models.ForeignKey(
+        TrainingProgram,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='students',
+        verbose_name="Programme",
+        help_text="Programme suivi (programme par defaut si vide)"
+    )
     current_phase = models.ForeignKey(
         TrainingPhase,
         on_delete=models.SET_NULL,
@@ -144,6 +190,11 @@ class StudentProgression(models.Model):
     def __str__(self):
         return f"Progression {self.student.last_name} {self.student.first_name}"
 
+    def save(self, *args, **kwargs):
+        if self.program_id is None:
+            self.program = TrainingProgram.get_default()
+        super().save(*args, **kwargs)
+
     @property
     def total_hours(self):
         return self.total_instruction_hours + self.total_solo_hours
@@ -190,6 +241,10 @@ class ExerciseProgress(models.Model):
         verbose_name = "Progression exercice"
         verbose_name_plural = "Progressions exercices"
         unique_together = ['student_progression', 'exercise']
+        indexes = [
+            # Synthese des niveaux par eleve
+            models.Index(fields=['student_progression', 'level'], name='instruction_progress_level_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student_progression.student.last_name} - {self.exercise.code}: {self.level}"
@@ -0,0 +1,382 @@
+"""
+Services du module instruction.
+
+Le programme de formation (phases + exercices) est une donnee de reference
+quasi statique : chaque programme (PPL, LAPL, BB, ULM) est charge une seule
+fois par processus puis servi depuis la memoire. Le numero de generation de
+l'espace de cache 'instruction.catalogue', partage entre processus, sert de
+version et permet d'invalider toutes les copies (admin,
+setup_training_program). Cette invalidation n'atteint les autres processus
+(workers web, Celery) qu'avec un backend de cache partage (CACHE_BACKEND
+file ou redis) : avec locmem, chaque processus garde sa propre generation
+et ne voit une modification qu'a son redemarrage.
+
+Les programmes sont declares dans des fichiers versionnes
+(instruction/programs/*.json) et synchronises en masse par
+sync_training_program.
+"""
+import json
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+
+from core.cache import CacheNamespace
+from .models import TrainingProgram, TrainingPhase, TrainingExercise, ExerciseProgress
+
+
+# ============================================================
+# CATALOGUE DU PROGRAMME DE FORMATION
+# ============================================================
+
+CATALOGUE_CACHE = CacheNamespace('instruction.catalogue', clearable=True)
+
+# (version, {program_id: TrainingCatalogue}), remplace d'un bloc
+_catalogues = (None, {})
+_catalogue_lock = threading.Lock()
+
+
+class TrainingCatalogue:
+    """
+    Instantane en memoire d'un programme de formation.
+
+    Les phases sont ordonnees et leurs exercices sont precharges, de sorte que
+    `phase.exercises.all` dans les templates ne declenche aucune requete.
+    Ces instances sont partagees entre requetes : ne pas les modifier.
+    """
+
+    def __init__(self, program, phases, version):
+        self.program = program
+        self.version = version
+        self.phases = phases
+        self.exercises = [ex for phase in phases for ex in phase.exercises.all()]
+
+        self._phases_by_id = {phase.id: phase for phase in phases}
+        self._phases_by_code = {phase.code: phase for phase in phases}
+        self._exercises_by_id = {ex.id: ex for ex in self.exercises}
+        self._exercises_by_code = {}
+        for ex in self.exercises:
+            # Le code n'est unique que par phase : le premier rencontre gagne
+            self._exercises_by_code.setdefault(ex.code, ex)
+
+    @classmethod
+    def load(cls, program_id, version):
+        """
+        Charge un programme complet en trois requetes (programme par defaut
+        si program_id est None, catalogue vide si aucun programme).
+        """
+        if program_id is None:
+            program = TrainingProgram.get_default()
+        else:
+            program = TrainingProgram.objects.filter(pk=program_id).first()
+        if program is None:
+            return cls(None, [], version)
+
+        phases = list(
+            TrainingPhase.objects.filter(program=program).order_by('order').prefetch_related(
+                Prefetch('exercises', queryset=TrainingExercise.objects.order_by('order'))
+            )
+        )
+        return cls(program, phases, version)
+
+    def get_phase(self, phase_id):
+        """Phase par identifiant (int ou str), None si inconnue."""
+        try:
+            return self._phases_by_id.get(int(phase_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_phase_by_code(self, code):
+        return self._phases_by_code.get(code)
+
+    def get_exercise(self, exercise_id):
+        """Exercice du programme par identifiant (int ou str), None si inconnu."""
+        try:
+            return self._exercises_by_id.get(int(exercise_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_exercise_by_code(self, code, phase_code=None):
+        if phase_code:
+            phase = self._phases_by_code.get(phase_code)
+            if not phase:
+                return None
+            for ex in phase.exercises.all():
+                if ex.code == code:
+                    return ex
+            return None
+        return self._exercises_by_code.get(code)
+
+
+def get_training_catalogue(program_id=None):
+    """
+    Retourne le catalogue d'un programme de formation (programme par defaut
+    si program_id est None, ex: progression.program_id d'un eleve sans
+    programme). Rechargement depuis la base uniquement si la version a change.
+    """
+    global _catalogues
+
+    version = CATALOGUE_CACHE.generation()
+    current_version, catalogues = _catalogues
+    if current_version == version and program_id in catalogues:
+        return catalogues[program_id]
+
+    with _catalogue_lock:
+        current_version, catalogues = _catalogues
+        if current_version != version:
+            catalogues = {}
+        if program_id not in catalogues:
+            catalogues = {**catalogues, program_id: TrainingCatalogue.load(program_id, version)}
+            _catalogues = (version, catalogues)
+        return catalogues[program_id]
+
+
+def invalidate_training_catalogue():
+    """
+    Invalide le catalogue dans tous les processus (nouvelle version)
+    et immediatement dans le processus courant.
+    """
+    global _catalogues
+
+    CATALOGUE_CACHE.clear()
+    _catalogues = (None, {})
+
+
+# ============================================================
+# PROGRESSION PAR PHASE
+# ============================================================
+
+def get_phases_progress(progression, catalogue=None):
+    """
+    Calcule la progression d'un eleve par phase.
+    Une seule requete d'agregation, le reste vient du catalogue.
+    """
+    catalogue = catalogue or get_training_catalogue()
+
+    counts = {}
+    rows = ExerciseProgress.objects.filter(
+        student_progression=progression
+    ).values('exercise__phase_id', 'level').annotate(n=Count('id')).order_by()
+    for row in rows:
+        counts[(row['exercise__phase_id'], row['level'])] = row['n']
+
+    phases_progress = []
+    for phase in catalogue.phases:
+        total = len(phase.exercises.all())
+        acquired = counts.get((phase.id, 'A'), 0) + counts.get((phase.id, '+'), 0)
+        in_progress = counts.get((phase.id, 'P'), 0) + counts.get((phase.id, 'E'), 0)
+
+        phases_progress.append({
+            'phase': phase,
+            'total': total,
+            'acquired': acquired,
+            'in_progress': in_progress,
+            'percentage': int((acquired / total * 100) if total > 0 else 0)
+        })
+
+    return phases_progress
+
+
+# ============================================================
+# CHARGEMENT D'UN PROGRAMME DE FORMATION
+# ============================================================
+
+PROGRAMS_DIR = Path(__file__).resolve().parent / 'programs'
+
+PHASE_FIELDS = ['order', 'name', 'description', 'target_hours', 'is_solo_allowed']
+EXERCISE_FIELDS = ['order', 'name', 'description', 'objectives', 'is_mandatory', 'is_solo_exercise']
+
+
+def available_training_programs():
+    """Programmes fournis avec l'application (ppl, lapl, bb, ulm...)."""
+    return sorted(path.stem for path in PROGRAMS_DIR.glob('*.json'))
+
+
+def read_training_program(source):
+    """
+    Lit un programme de formation depuis un fichier JSON ou YAML.
+
+    Args:
+        source: Nom d'un programme fourni (ex: 'ppl') ou chemin de fichier
+
+    Returns:
+        dict {'program', 'version', 'name', 'phases': [...]}
+    """
+    path = Path(source)
+    if not path.suffix:
+        path = PROGRAMS_DIR / f"{source.lower()}.json"
+    if not path.exists():
+        raise ValueError(f"Programme introuvable : {source}")
+
+    with open(path, encoding='utf-8') as f:
+        if path.suffix in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("PyYAML est requis pour lire un programme YAML")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if not isinstance(data, dict) or not data.get('phases'):
+        raise ValueError(f"Programme invalide (aucune phase) : {path}")
+    return data
+
+
+def _phase_values(data):
+    return {
+        'order': int(data.get('order', 0)),
+        'name': data['name'],
+        'description': data.get('description', ''),
+        'target_hours': Decimal(str(data.get('target_hours', 0))),
+        'is_solo_allowed': bool(data.get('is_solo_allowed', False)),
+    }
+
+
+def _exercise_values(data):
+    return {
+        'order': int(data.get('order', 0)),
+        'name': data['name'],
+        'description': data.get('description', ''),
+        'objectives': data.get('objectives', ''),
+        'is_mandatory': bool(data.get('is_mandatory', True)),
+        'is_solo_exercise': bool(data.get('is_solo_exercise', False)),
+    }
+
+
+def _has_changed(current, values, fields):
+    return any(current[field] != values[field] for field in fields)
+
+
+def sync_training_program(program, dry_run=False):
+    """
+    Synchronise la base avec un programme declare (idempotent).
+
+    Chaque programme (cle 'program' du fichier : PPL, LAPL...) a ses propres
+    phases : les codes de phase et d'exercice ne sont compares qu'au sein du
+    programme. Le programme est compare a l'existant puis seules les phases
+    et exercices nouveaux ou modifies sont ecrits, par upsert en masse dans
+    une seule transaction. Rien n'est supprime : les exercices retires du
+    fichier sont seulement signales (la suppression effacerait la
+    progression des eleves).
+
+    Returns:
+        dict de compteurs (programme cree/mis a jour, phases/exercices crees,
+        mis a jour, inchanges, obsoletes)
+    """
+    program_code = str(program.get('program') or '').strip().upper()
+    if not program_code:
+        raise ValueError("Programme invalide : cle 'program' manquante (ex: PPL)")
+    program_values = {
+        'name': program.get('name') or program_code,
+        'version': str(program.get('version') or ''),
+    }
+
+    declared_phases = {}
+    declared_exercises = {}
+    for phase_data in program['phases']:
+        code = phase_data['code']
+        if code in declared_phases:
+            raise ValueError(f"Phase en double dans le programme : {code}")
+        declared_phases[code] = _phase_values(phase_data)
+        for exercise_data in phase_data.get('exercises', []):
+            key = (code, exercise_data['code'])
+            if key in declared_exercises:
+                raise ValueError(f"Exercice en double dans le programme : {key[0]}/{key[1]}")
+            declared_exercises[key] = _exercise_values(exercise_data)
+
+    stats = {
+        'program_created': False, 'program_updated': False,
+        'phases_created': 0, 'phases_updated': 0, 'phases_unchanged': 0,
+        'exercises_created': 0, 'exercises_updated': 0, 'exercises_unchanged': 0,
+        'exercises_obsolete': 0,
+    }
+
+    # Etat actuel en base (3 requetes)
+    existing_program = TrainingProgram.objects.filter(code=program_code).values('id', 'name', 'version').first()
+    if existing_program is None:
+        stats['program_created'] = True
+    elif _has_changed(existing_program, program_values, ['name', 'version']):
+        stats['program_updated'] = True
+
+    existing_phases = {
+        row['code']: row
+        for row in TrainingPhase.objects.filter(
+            program__code=program_code, code__in=list(declared_phases),
+        ).values('id', 'code', *PHASE_FIELDS)
+    }
+    phase_codes_by_id = {row['id']: code for code, row in existing_phases.items()}
+    existing_exercises = {
+        (phase_codes_by_id[row['phase_id']], row['code']): row
+        for row in TrainingExercise.objects.filter(
+            phase_id__in=list(phase_codes_by_id)
+        ).values('phase_id', 'code', *EXERCISE_FIELDS)
+    }
+
+    # Diff
+    phases_to_write = []
+    for code, values in declared_phases.items():
+        current = existing_phases.get(code)
+        if current is None:
+            stats['phases_created'] += 1
+        elif _has_changed(current, values, PHASE_FIELDS):
+            stats['phases_updated'] += 1
+        else:
+            stats['phases_unchanged'] += 1
+            continue
+        phases_to_write.append(TrainingPhase(code=code, **values))
+
+    exercises_to_write = []
+    for key, values in declared_exercises.items():
+        current = existing_exercises.get(key)
+        if current is None:
+            stats['exercises_created'] += 1
+        elif _has_changed(current, values, EXERCISE_FIELDS):
+            stats['exercises_updated'] += 1
+        else:
+            stats['exercises_unchanged'] += 1
+            continue
+        exercises_to_write.append((key, values))
+
+    stats['exercises_obsolete'] = len(set(existing_exercises) - set(declared_exercises))
+
+    program_changed = stats['program_created'] or stats['program_updated']
+    if dry_run or not (program_changed or phases_to_write or exercises_to_write):
+        return stats
+
+    with transaction.atomic():
+        training_program, _ = TrainingProgram.objects.update_or_create(
+            code=program_code, defaults=program_values,
+        )
+
+        if phases_to_write:
+            for phase in phases_to_write:
+                phase.program = training_program
+            TrainingPhase.objects.bulk_create(
+                phases_to_write,
+                update_conflicts=True,
+                unique_fields=['program', 'code'],
+                update_fields=PHASE_FIELDS,
+            )
+
+        if exercises_to_write:
+            phase_ids = dict(
+                TrainingPhase.objects.filter(
+                    program=training_program, code__in=list(declared_phases),
+                ).values_list('code', 'id')
+            )
+            TrainingExercise.objects.bulk_create(
+                [
+                    TrainingExercise(phase_id=phase_ids[phase_code], code=code, **values)
+                    for (phase_code, code), values in exercises_to_write
+                ],
+                update_conflicts=True,
+                unique_fields=['phase', 'code'],
+                update_fields=EXERCISE_FIELDS,
+            )
+
+    # bulk_create n'emet pas de signaux
+    invalidate_training_catalogue()
+    return stats
@@ -0,0 +1,19 @@
+"""
+Invalidation du catalogue du programme de formation lors des modifications
+(admin, list_editable, commande setup_training_program).
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import TrainingProgram, TrainingPhase, TrainingExercise
+from .services import invalidate_training_catalogue
+
+
+@receiver(post_save, sender=TrainingProgram)
+@receiver(post_delete, sender=TrainingProgram)
+@receiver(post_save, sender=TrainingPhase)
+@receiver(post_delete, sender=TrainingPhase)
+@receiver(post_save, sender=TrainingExercise)
+@receiver(post_delete, sender=TrainingExercise)
+def training_program_changed(sender, **kwargs):
+    invalidate_training_catalogue()
@@ -1,3 +1,124 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from members.models import Member
+from .models import Lesson, LessonExerciseEvaluation, StudentProgression, TrainingProgram
+from .services import get_training_catalogue, read_training_program, sync_training_program
+
+
+def program(code, phase_codes=('PH1', 'PH2'), exercise_codes=('EX01', 'EX02')):
+    """Programme minimal : memes codes de phase et d'exercice d'un programme a l'autre."""
+    return {
+        'program': code,
+        'version': '1',
+        'name': f"Programme {code}",
+        'phases': [
+            {
+                'order': order,
+                'code': phase_code,
+                'name': f"{code} {phase_code}",
+                'exercises': [
+                    {'code': exercise_code, 'order': n, 'name': f"{code} {phase_code} {exercise_code}"}
+                    for n, exercise_code in enumerate(exercise_codes, start=1)
+                ],
+            }
+            for order, phase_code in enumerate(phase_codes, start=1)
+        ],
+    }
+
+
+# ============================================================
+# PROGRAMMES DE FORMATION
+# ============================================================
+
+class TrainingProgramSyncTests(TestCase):
+    def test_programs_with_shared_codes_stay_separate(self):
+        sync_training_program(program('PPL'))
+        sync_training_program(program('LAPL'))
+
+        ppl = get_training_catalogue(TrainingProgram.objects.get(code='PPL').id)
+        lapl = get_training_catalogue(TrainingProgram.objects.get(code='LAPL').id)
+        self.assertEqual([phase.name for phase in ppl.phases], ['PPL PH1', 'PPL PH2'])
+        self.assertEqual([phase.name for phase in lapl.phases], ['LAPL PH1', 'LAPL PH2'])
+        self.assertEqual(lapl.get_exercise_by_code('EX01', 'PH2').name, 'LAPL PH2 EX01')
+        self.assertIsNone(lapl.get_exercise(ppl.exercises[0].id))
+
+    def test_sync_is_idempotent(self):
+        sync_training_program(program('PPL'))
+        stats = sync_training_program(program('PPL'))
+        self.assertFalse(stats['program_created'] or stats['program_updated'])
+        self.assertEqual((stats['phases_unchanged'], stats['exercises_unchanged']), (2, 4))
+
+    def test_shipped_programs_load_together(self):
+        from .services import available_training_programs
+        for name in available_training_programs():
+            sync_training_program(read_training_program(name))
+        self.assertEqual(
+            set(TrainingProgram.objects.values_list('code', flat=True)),
+            {'BB', 'LAPL', 'PPL', 'ULM'},
+        )
+
+    def test_default_program_is_ppl(self):
+        sync_training_program(program('LAPL'))
+        sync_training_program(program('PPL'))
+        student = User.objects.create_user('eleve')
+        self.assertEqual(StudentProgression.objects.create(student=student).program.code, 'PPL')
+
+
+class ProgramScopedViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sync_training_program(program('PPL'))
+        sync_training_program(program('LAPL'))
+        cls.ppl = TrainingProgram.objects.get(code='PPL')
+        cls.lapl = TrainingProgram.objects.get(code='LAPL')
+
+        cls.instructor = User.objects.create_user('fi')
+        Member.objects.create(user=cls.instructor, is_instructor=True)
+        cls.student = User.objects.create_user('eleve', last_name='Martin')
+        Member.objects.create(user=cls.student, is_student=True)
+        StudentProgression.objects.create(student=cls.student, program=cls.lapl)
+
+    def test_log_lesson_uses_the_student_program(self):
+        self.client.force_login(self.instructor)
+        url = reverse('log_lesson', args=[self.student.id])
+        response = self.client.get(url)
+        self.assertEqual(
+            {phase.program_id for phase in response.context['phases']}, {self.lapl.id},
+        )
+
+        lapl_exercise = get_training_catalogue(self.lapl.id).exercises[0]
+        ppl_exercise = get_training_catalogue(self.ppl.id).exercises[0]
+        self.client.post(url, {
+            'title': 'Seance',
+            'comments': '-',
+            'exercises': [lapl_exercise.id, ppl_exercise.id],
+            f'level_{ppl_exercise.id}': 'A',
+        })
+        lesson = Lesson.objects.get(student=self.student)
+        self.assertEqual(list(lesson.exercises_practiced.all()), [lapl_exercise])
+        self.assertFalse(lesson.exercise_evaluations.exists())
+
+    def test_training_program_page_per_program(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('training_program'), {'program': 'lapl'})
+        self.assertEqual(response.context['program'], self.lapl)
+        response = self.client.get(reverse('training_program'))
+        self.assertEqual(response.context['program'], self.ppl)
+
+    def test_log_lesson_records_previous_levels(self):
+        self.client.force_login(self.instructor)
+        url = reverse('log_lesson', args=[self.student.id])
+        first, second = get_training_catalogue(self.lapl.id).exercises[:2]
+        for level in ('B', 'C'):
+            self.client.post(url, {
+                'title': f'Seance {level}', 'comments': '-',
+                f'level_{first.id}': level, f'level_{second.id}': 'A',
+            })
+
+        evaluations = LessonExerciseEvaluation.objects.filter(lesson__title='Seance C')
+        self.assertEqual(
+            dict(evaluations.values_list('exercise_id', 'level_before')),
+            {first.id: 'B', second.id: 'A'},
+        )
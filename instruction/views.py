@@ -4,24 +4,27 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from django.db.models import Count, Avg
 from .models import (
-    Lesson, TrainingPhase, TrainingExercise,
+    Lesson, TrainingProgram, TrainingExercise,
     StudentProgression, ExerciseProgress, LessonExerciseEvaluation
 )
+from .services import get_training_catalogue, get_phases_progress
 from members.models import Member
 
 
 @login_required
 def my_progression(request):
     """Vue Eleve : Voir son livret de progression complet"""
-    lessons = Lesson.objects.filter(student=request.user).order_by('-date')
+    lessons = Lesson.objects.filter(student=request.user).select_related('instructor').order_by('-date')
 
     # Recuperer ou creer la progression de l'eleve
     progression = None
     exercise_progress = []
     phases_progress = []
+    catalogue = None
 
     try:
         progression = request.user.training_progression
+        catalogue = get_training_catalogue(progression.program_id)
         exercise_progress = ExerciseProgress.objects.filter(
             student_progression=progression
         ).select_related('exercise', 'exercise__phase').order_by(
@@ -29,30 +32,10 @@ def my_progression(request):
         )
 
         # Calculer la progression par phase
-        for phase in TrainingPhase.objects.all().order_by('order'):
-            exercises = TrainingExercise.objects.filter(phase=phase)
-            total = exercises.count()
-            acquired = ExerciseProgress.objects.filter(
-                student_progression=progression,
-                exercise__phase=phase,
-                level__in=['A', '+']
-            ).count()
-            in_progress = ExerciseProgress.objects.filter(
-                student_progression=progression,
-                exercise__phase=phase,
-                level__in=['P', 'E']
-            ).count()
-
-            phases_progress.append({
-                'phase': phase,
-                'total': total,
-                'acquired': acquired,
-                'in_progress': in_progress,
-                'percentage': int((acquired / total * 100) if total > 0 else 0)
-            })
+        phases_progress = get_phases_progress(progression, catalogue)
 
     except StudentProgression.DoesNotExist:
-        pass
+        catalogue = get_training_catalogue()
 
     # Statistiques
     total_lessons = lessons.count()
@@ -65,7 +48,7 @@ def my_progression(request):
         'progression': progression,
         'exercise_progress': exercise_progress,
         'phases_progress': phases_progress,
-        'all_phases': TrainingPhase.objects.all().order_by('order'),
+        'all_phases': catalogue.phases,
     })
 
 
@@ -92,6 +75,7 @@ def student_progression_detail(request, student_id):
             student=student,
             primary_instructor=request.user
         )
+    catalogue = get_training_catalogue(progression.program_id)
 
     exercise_progress = ExerciseProgress.objects.filter(
         student_progression=progression
@@ -100,27 +84,7 @@ def student_progression_detail(request, student_id):
     )
 
     # Calculer la progression par phase
-    for phase in TrainingPhase.objects.all().order_by('order'):
-        exercises = TrainingExercise.objects.filter(phase=phase)
-        total = exercises.count()
-        acquired = ExerciseProgress.objects.filter(
-            student_progression=progression,
-            exercise__phase=phase,
-            level__in=['A', '+']
-        ).count()
-        in_progress = ExerciseProgress.objects.filter(
-            student_progression=progression,
-            exercise__phase=phase,
-            level__in=['P', 'E']
-        ).count()
-
-        phases_progress.append({
-            'phase': phase,
-            'total': total,
-            'acquired': acquired,
-            'in_progress': in_progress,
-            'percentage': int((acquired / total * 100) if total > 0 else 0)
-        })
+    phases_progress = get_phases_progress(progression, catalogue)
 
     return render(request, 'instruction/student_progression.html', {
         'student': student,
@@ -128,7 +92,7 @@ def student_progression_detail(request, student_id):
         'progression': progression,
         'exercise_progress': exercise_progress,
         'phases_progress': phases_progress,
-        'all_phases': TrainingPhase.objects.all().order_by('order'),
+        'all_phases': catalogue.phases,
     })
 
 
@@ -180,7 +144,7 @@ def instructor_dashboard(request):
         'students': students_with_progress,
         'my_lessons': my_lessons,
         'stats': stats,
-        'phases': TrainingPhase.objects.all().order_by('order'),
+        'phases': get_training_catalogue().phases,
     })
 
 
@@ -191,8 +155,6 @@ def log_lesson(request, student_id):
         return redirect('home')
 
     student = get_object_or_404(User, pk=student_id)
-    phases = TrainingPhase.objects.all().order_by('order')
-    exercises = TrainingExercise.objects.all().select_related('phase').order_by('phase__order', 'order')
 
     # Recuperer ou creer la progression de l'eleve
     try:
@@ -203,6 +165,16 @@ def log_lesson(request, student_id):
             primary_instructor=request.user
         )
 
+    # Phases et exercices du programme suivi par l'eleve
+    catalogue = get_training_catalogue(progression.program_id)
+    phases = catalogue.phases
+    exercises = catalogue.exercises
+
+    # Niveaux actuels de l'eleve (une requete, formulaire et niveau avant)
+    current_levels = dict(
+        ExerciseProgress.objects.filter(student_progression=progression).values_list('exercise_id', 'level')
+    )
+
     if request.method == 'POST':
         title = request.POST.get('title')
         comments = request.POST.get('comments')
@@ -221,7 +193,7 @@ def log_lesson(request, student_id):
 
         phase = None
         if phase_id:
-            phase = TrainingPhase.objects.filter(pk=phase_id).first()
+            phase = catalogue.get_phase(phase_id)
 
         lesson = Lesson.objects.create(
             instructor=request.user,
@@ -243,7 +215,10 @@ def log_lesson(request, student_id):
         )
 
         # Traiter les exercices pratiques
-        exercise_ids = request.POST.getlist('exercises')
+        exercise_ids = [
+            exercise.id for exercise in map(catalogue.get_exercise, request.POST.getlist('exercises'))
+            if exercise is not None
+        ]
         if exercise_ids:
             lesson.exercises_practiced.set(exercise_ids)
 
@@ -252,38 +227,22 @@ def log_lesson(request, student_id):
             if key.startswith('level_'):
                 ex_id = key.replace('level_', '')
                 if value and value != '-':
-                    try:
-                        exercise = TrainingExercise.objects.get(pk=ex_id)
-                        # Niveau avant
-                        level_before = '-'
-                        try:
-                            ep = ExerciseProgress.objects.get(
-                                student_progression=progression,
-                                exercise=exercise
-                            )
-                            level_before = ep.level
-                        except ExerciseProgress.DoesNotExist:
-                            pass
-
-                        # Creer l'evaluation
-                        LessonExerciseEvaluation.objects.create(
-                            lesson=lesson,
-                            exercise=exercise,
-                            level_before=level_before,
-                            level_after=value,
-                            notes=request.POST.get(f'note_{ex_id}', '')
-                        )
-                    except TrainingExercise.DoesNotExist:
-                        pass
+                    exercise = catalogue.get_exercise(ex_id)
+                    if exercise is None:
+                        continue
+
+                    # Creer l'evaluation (save() met a jour la progression)
+                    LessonExerciseEvaluation.objects.create(
+                        lesson=lesson,
+                        exercise=exercise,
+                        level_before=current_levels.get(exercise.id, '-'),
+                        level_after=value,
+                        notes=request.POST.get(f'note_{ex_id}', '')
+                    )
 
         messages.success(request, f"Lecon enregistree pour {student.last_name} !")
         return redirect('instructor_dashboard')
 
-    # Recuperer les niveaux actuels de l'eleve
-    current_levels = {}
-    for ep in ExerciseProgress.objects.filter(student_progression=progression):
-        current_levels[ep.exercise_id] = ep.level
-
     return render(request, 'instruction/log_lesson.html', {
         'student': student,
         'phases': phases,
@@ -295,11 +254,16 @@ def log_lesson(request, student_id):
 
 @login_required
 def training_program(request):
-    """Vue du programme de formation complet"""
-    phases = TrainingPhase.objects.all().prefetch_related('exercises').order_by('order')
+    """Vue d'un programme de formation complet (?program=LAPL, PPL par defaut)"""
+    programs = list(TrainingProgram.objects.order_by('code'))
+    code = request.GET.get('program', '').upper()
+    program = next((p for p in programs if p.code == code), None)
+    catalogue = get_training_catalogue(program.id if program else None)
 
     return render(request, 'instruction/training_program.html', {
-        'phases': phases,
+        'programs': programs,
+        'program': catalogue.program,
+        'phases': catalogue.phases,
     })
 
 
@@ -311,7 +275,6 @@ def update_exercise_level(request, student_id, exercise_id):
 
     if request.method == 'POST':
         student = get_object_or_404(User, pk=student_id)
-        exercise = get_object_or_404(TrainingExercise, pk=exercise_id)
         new_level = request.POST.get('level', '-')
 
         try:
@@ -321,6 +284,8 @@ def update_exercise_level(request, student_id, exercise_id):
                 student=student,
                 primary_instructor=request.user
             )
+        # Exercice du programme de l'eleve uniquement
+        exercise = get_object_or_404(TrainingExercise, pk=exercise_id, phase__program_id=progression.program_id)
 
         ep, created = ExerciseProgress.objects.update_or_create(
             student_progression=progression,
@@ -41,6 +41,8 @@ class MemberInline(admin.StackedInline):
 class UserAdmin(BaseUserAdmin):
     inlines = (MemberInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_active', 'get_balance', 'get_medical_status')
+    list_select_related = ('member_profile',)
+    show_full_result_count = False
 
     def get_balance(self, obj):
         try:
@@ -67,6 +69,8 @@ admin.site.register(User, UserAdmin)
 @admin.register(Member)
 class MemberAdmin(admin.ModelAdmin):
     list_display = ['user', 'license_type', 'medical_status', 'sep_status', 'account_balance', 'is_instructor', 'is_active']
+    list_select_related = ['user']
+    show_full_result_count = False
     list_filter = ['license_type', 'medical_class', 'is_instructor', 'is_student', 'is_active', 'has_sep', 'has_night']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'license_number', 'ffa_number']
     readonly_fields = ['full_name', 'qualifications_list', 'can_fly_solo', 'landings_last_90_days']
@@ -145,6 +149,7 @@ class QualificationTypeAdmin(admin.ModelAdmin):
 @admin.register(MemberTypeQualification)
 class MemberTypeQualificationAdmin(admin.ModelAdmin):
     list_display = ['member', 'qualification_type', 'granted_date', 'granted_by', 'is_active']
+    list_select_related = ['member__user', 'qualification_type', 'granted_by']
     list_filter = ['qualification_type', 'is_active', 'granted_date']
     search_fields = ['member__user__last_name', 'member__user__first_name']
     autocomplete_fields = ['member', 'granted_by']
@@ -161,16 +166,18 @@ class MemberDocumentInline(admin.TabularInline):
 @admin.register(MemberDocument)
 class MemberDocumentAdmin(admin.ModelAdmin):
     list_display = ['member', 'document_type', 'title', 'expiry_date', 'status_badge', 'is_current', 'upload_date']
+    list_select_related = ['member__user']
+    show_full_result_count = False
     list_filter = ['document_type', 'status', 'is_current']
     search_fields = ['member__user__last_name', 'member__user__first_name', 'title']
     date_hierarchy = 'upload_date'
     autocomplete_fields = ['member', 'validated_by']
-    readonly_fields = ['upload_date']
+    readonly_fields = ['upload_date', 'sha256', 'file_size', 'thumbnail']
     actions = ['validate_documents', 'reject_documents']
 
     fieldsets = (
         ('Document', {
-            'fields': ('member', 'document_type', 'title', 'file')
+            'fields': ('member', 'document_type', 'title', 'file', 'thumbnail', 'file_size', 'sha256')
         }),
         ('Dates', {
             'fields': ('issue_date', 'expiry_date', 'upload_date')
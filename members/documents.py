@@ -0,0 +1,356 @@
+"""
+Depot des documents membres (licences, medicaux, assurances...).
+
+Le fichier recu est lu une fois par morceaux (UploadedFile.chunks) pour
+calculer son empreinte SHA-256 et verifier sa taille, sans le charger en
+memoire. Un fichier identique deja present dans l'historique (quel que soit
+le membre) n'est pas stocke une seconde fois : le nouveau document pointe
+vers le fichier existant.
+
+La creation du document, le passage des anciens documents du meme type en
+"non courant" et la mise a jour de la validite correspondante sur le profil
+membre sont faits dans une seule transaction. Les miniatures des images sont
+generees apres validation de la transaction par une tache Celery
+(members.tasks.generate_document_thumbnail) : un redemarrage du serveur web
+ne perd pas le travail en cours.
+"""
+import hashlib
+import logging
+import os
+from datetime import date
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils.dateparse import parse_date
+
+from .models import Member, MemberDocument
+from .services import invalidate_member_status
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DOCUMENT_SIZE = 10 * 1024 * 1024  # 10 Mo
+
+ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+THUMBNAIL_SIZE = (320, 320)
+
+# Type de document -> date de validite portee par le profil membre
+VALIDITY_FIELDS = {
+    'MEDICAL': 'medical_validity',
+    'FFA': 'ffa_subscription_validity',
+    'INSURANCE': 'insurance_validity',
+    'CLUB': 'club_subscription_validity',
+}
+
+
+class DocumentRejected(ValueError):
+    pass
+
+
+def max_document_size():
+    return getattr(settings, 'MEMBER_DOCUMENT_MAX_SIZE', DEFAULT_MAX_DOCUMENT_SIZE)
+
+
+# ============================================================
+# EMPREINTE ET CONTROLES
+# ============================================================
+
+def hash_upload(upload, max_size=None):
+    """
+    Empreinte SHA-256 et taille d'un fichier recu, lu par morceaux.
+
+    Raises:
+        DocumentRejected: fichier vide ou trop volumineux
+    """
+    max_size = max_size or max_document_size()
+    if upload.size and upload.size > max_size:
+        raise DocumentRejected(f"Fichier trop volumineux (maximum {max_size // (1024 * 1024)} Mo)")
+
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in upload.chunks():
+        size += len(chunk)
+        if size > max_size:
+            raise DocumentRejected(f"Fichier trop volumineux (maximum {max_size // (1024 * 1024)} Mo)")
+        digest.update(chunk)
+    if not size:
+        raise DocumentRejected("Fichier vide")
+
+    upload.seek(0)
+    return digest.hexdigest(), size
+
+
+def _parse_date(value, label):
+    """Date saisie (AAAA-MM-JJ) ; DocumentRejected si mal formee ou inexistante (30 fevrier)."""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise DocumentRejected(f"Date {label} invalide : {value}")
+    return parsed
+
+
+def check_extension(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise DocumentRejected("Format non accepte (PDF, JPG ou PNG)")
+    return extension
+
+
+# ============================================================
+# DEPOT
+# ============================================================
+
+def ingest_document(member, document_type, upload, title='', issue_date=None, expiry_date=None):
+    """
+    Enregistre un document depose par un membre.
+
+    Returns:
+        MemberDocument cree
+
+    Raises:
+        DocumentRejected: type, format, taille invalides ou document deja depose
+    """
+    if document_type not in dict(MemberDocument.DOCUMENT_TYPES):
+        raise DocumentRejected("Veuillez selectionner un type de document.")
+    check_extension(upload.name)
+    sha256, size = hash_upload(upload)
+
+    issue_date = _parse_date(issue_date, "d'emission")
+    expiry_date = _parse_date(expiry_date, "d'expiration")
+    title = title or dict(MemberDocument.DOCUMENT_TYPES)[document_type]
+
+    # Fichier deja stocke (meme contenu) : on reutilise le fichier existant
+    existing = list(
+        MemberDocument.objects.filter(sha256=sha256)
+        .values_list('member_id', 'document_type', 'is_current', 'file', 'thumbnail')[:50]
+    )
+    if any(m == member.pk and t == document_type and current for m, t, current, _, _ in existing):
+        raise DocumentRejected("Ce document a deja ete depose.")
+
+    doc = MemberDocument(
+        member=member,
+        document_type=document_type,
+        title=title,
+        sha256=sha256,
+        file_size=size,
+        issue_date=issue_date,
+        expiry_date=expiry_date,
+        status='PENDING',
+        is_current=True,
+    )
+    if existing:
+        doc.file.name = existing[0][3]
+        doc.thumbnail.name = existing[0][4] or None
+    else:
+        doc.file = upload
+
+    validity_field = VALIDITY_FIELDS.get(document_type)
+    with transaction.atomic():
+        doc.save()
+        if validity_field and expiry_date:
+            Member.objects.filter(pk=member.pk).update(**{validity_field: expiry_date})
+            setattr(member, validity_field, expiry_date)
+        # update() n'emet pas post_save
+        transaction.on_commit(lambda: invalidate_member_status(member.pk))
+
+        if not doc.thumbnail and os.path.splitext(doc.file.name)[1].lower() in IMAGE_EXTENSIONS:
+            transaction.on_commit(lambda: schedule_thumbnail(doc.pk))
+
+    return doc
+
+
+# ============================================================
+# MINIATURES (ARRIERE-PLAN)
+# ============================================================
+
+def schedule_thumbnail(document_id):
+    """Lance la tache de miniature (synchrone si MEMBER_DOCUMENT_THUMBNAILS_ASYNC = False)."""
+    if not getattr(settings, 'MEMBER_DOCUMENT_THUMBNAILS_ASYNC', True):
+        generate_thumbnail(document_id)
+        return
+
+    from .tasks import generate_document_thumbnail
+    try:
+        generate_document_thumbnail.delay(document_id)
+    except Exception:
+        # Broker injoignable (ou echec en mode eager) : le document est
+        # enregistre, seule la miniature manque
+        logger.exception("Miniature du document %s non lancee", document_id)
+
+
+def generate_thumbnail(document_id):
+    """
+    Genere et enregistre la miniature JPEG d'un document image.
+
+    Returns:
+        Nom du fichier de la miniature, None si le document a ete supprime
+    """
+    from PIL import Image
+
+    doc = MemberDocument.objects.only('file', 'thumbnail').filter(pk=document_id).first()
+    if doc is None:
+        return None
+    if doc.thumbnail:
+        return doc.thumbnail.name
+
+    with doc.file.open('rb') as f:
+        image = Image.open(f)
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        image.convert('RGB').save(buffer, format='JPEG', quality=80)
+
+    name = f"{os.path.splitext(os.path.basename(doc.file.name))[0]}.jpg"
+    doc.thumbnail.save(name, ContentFile(buffer.getvalue()), save=False)
+    MemberDocument.objects.filter(pk=document_id).update(thumbnail=doc.thumbnail.name)
+    return doc.thumbnail.name
+
+
+# ============================================================
+# EXPIRATION (TACHE NOCTURNE)
+# ============================================================
+# Le statut EXPIRED n'etait pose qu'a la sauvegarde d'un document : la
+# tache quotidienne expire_documents le pose en une requete, recale les
+# dates de validite du profil sur les documents courants valides et cree
+# les alertes correspondantes en une insertion.
+
+# Type de document -> type d'alerte (documents sans alerte : ID, CHECKOUT, OTHER)
+EXPIRY_ALERT_TYPES = {
+    'MEDICAL': 'MEDICAL',
+    'LICENSE': 'LICENSE',
+    'FFA': 'LICENSE',
+    'RADIO': 'LICENSE',
+    'ENGLISH': 'LICENSE',
+    'INSURANCE': 'INSURANCE',
+    'CLUB': 'COTISATION',
+}
+
+
+def expire_documents(today=None):
+    """
+    Passe en EXPIRED les documents dont la date d'expiration est depassee.
+
+    Returns:
+        Liste des documents courants expires (dict), pour les alertes
+    """
+    today = today or date.today()
+    expired = MemberDocument.objects.filter(expiry_date__lt=today).exclude(status__in=['EXPIRED', 'REJECTED'])
+
+    current = list(expired.filter(is_current=True).values(
+        'id', 'member_id', 'member__user_id', 'document_type', 'title', 'expiry_date',
+    ))
+    expired.update(status='EXPIRED')
+    return current
+
+
+def sync_member_validities():
+    """
+    Recale les dates de validite du profil (medical, FFA, assurance,
+    cotisation) sur le document courant valide de chaque type : une requete
+    de selection et une mise a jour ensembliste par type.
+
+    Returns:
+        Ensemble des id des membres modifies
+    """
+    changed = set()
+    for document_type, field in VALIDITY_FIELDS.items():
+        expiry = Subquery(
+            MemberDocument.objects.filter(
+                member_id=OuterRef('pk'),
+                document_type=document_type,
+                is_current=True,
+                status='VALID',
+                expiry_date__isnull=False,
+            ).order_by('-upload_date').values('expiry_date')[:1]
+        )
+        member_ids = list(
+            Member.objects.annotate(document_expiry=expiry)
+            .filter(document_expiry__isnull=False)
+            .filter(~Q(**{field: F('document_expiry')}) | Q(**{f'{field}__isnull': True}))
+            .values_list('pk', flat=True)
+        )
+        if member_ids:
+            Member.objects.filter(pk__in=member_ids).update(**{field: expiry})
+            changed.update(member_ids)
+    return changed
+
+
+def _expiry_alert_key(doc):
+    # Medical : meme cle que l'alerte nocturne (check_member_medical_alerts),
+    # une seule alerte par echeance quelle que soit la source
+    if doc['document_type'] == 'MEDICAL':
+        from alerts.services import medical_alert_key
+        return medical_alert_key(doc['member__user_id'], doc['expiry_date'])
+    return f"document_{doc['id']}_expired"
+
+
+def create_expiry_alerts(documents):
+    """
+    Alertes d'expiration des documents, inserees en une fois (les alertes
+    deja creees, par ce balayage ou par les verifications nocturnes, sont
+    ignorees grace a unique_key).
+
+    Returns:
+        Nombre d'alertes creees
+    """
+    from alerts.models import Alert, AlertConfiguration
+    from alerts.services import invalidate_alerts_cache
+
+    configs = {
+        config.alert_type: config
+        for config in AlertConfiguration.objects.filter(is_active=True)
+    }
+    alerts = {}
+    for doc in documents:
+        alert_type = EXPIRY_ALERT_TYPES.get(doc['document_type'])
+        if not alert_type:
+            continue
+        config = configs.get(alert_type)
+        expiry = doc['expiry_date'].strftime('%d/%m/%Y')
+        unique_key = _expiry_alert_key(doc)
+        alerts.setdefault(unique_key, Alert(
+            user_id=doc['member__user_id'],
+            alert_type=alert_type,
+            severity='CRITICAL' if config and not config.block_on_expiry else 'BLOCKING',
+            title=f"{doc['title']} expiré",
+            message=f"Votre document « {doc['title']} » a expiré le {expiry}. Merci d'en déposer un nouveau.",
+            expires_at=doc['expiry_date'],
+            unique_key=unique_key,
+        ))
+
+    existing = set(Alert.objects.filter(unique_key__in=list(alerts)).values_list('unique_key', flat=True))
+    alerts = [alert for key, alert in alerts.items() if key not in existing]
+    Alert.objects.bulk_create(alerts, batch_size=500, ignore_conflicts=True)
+    if alerts:
+        # bulk_create n'emet pas post_save
+        invalidate_alerts_cache()
+    return len(alerts)
+
+
+def sweep_documents(today=None):
+    """
+    Tache quotidienne : expiration des documents, validites du profil,
+    alertes, puis invalidation des statuts scanner concernes.
+
+    Returns:
+        dict (expired, members_synced, alerts)
+    """
+    with transaction.atomic():
+        expired = expire_documents(today)
+        synced = sync_member_validities()
+        alerts = create_expiry_alerts(expired)
+
+    invalidate_member_status(*(synced | {doc['member_id'] for doc in expired}))
+    return {
+        'expired': len(expired),
+        'members_synced': len(synced),
+        'alerts': alerts,
+    }
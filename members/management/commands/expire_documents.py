@@ -0,0 +1,21 @@
+"""
+Commande Django d'expiration des documents membres.
+Utilisation : python manage.py expire_documents
+
+A planifier chaque nuit via cron ou Celery Beat : passe en EXPIRED les
+documents echus, recale les validites du profil membre sur les documents
+valides et cree les alertes d'expiration.
+"""
+from django.core.management.base import BaseCommand
+from members.documents import sweep_documents
+
+
+class Command(BaseCommand):
+    help = 'Expire les documents echus, synchronise les validites membres et cree les alertes'
+
+    def handle(self, *args, **options):
+        self.stdout.write("[*] Expiration des documents en cours...")
+        results = sweep_documents()
+        self.stdout.write(self.style.SUCCESS(f"[OK] {results['expired']} document(s) courant(s) expire(s)"))
+        self.stdout.write(self.style.SUCCESS(f"[OK] {results['members_synced']} profil(s) membre(s) mis a jour"))
+        self.stdout.write(self.style.SUCCESS(f"[OK] {results['alerts']} alerte(s) d'expiration"))
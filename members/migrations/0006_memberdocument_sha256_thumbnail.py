@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_memberdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberdocument',
+            name='file_size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Taille (octets)'),
+        ),
+        migrations.AddField(
+            model_name='memberdocument',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Empreinte SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='memberdocument',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='members/documents/thumbs/', verbose_name='Miniature'),
+        ),
+    ]
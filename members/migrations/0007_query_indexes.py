@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0006_memberdocument_sha256_thumbnail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['medical_validity'], name='members_medical_validity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberdocument',
+            index=models.Index(fields=['member', 'document_type', 'is_current'], name='members_doc_current_idx'),
+        ),
+    ]
@@ -1,9 +1,66 @@
 from django.db import models
+from django.db.models import Max, Q, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.functional import cached_property
 from datetime import date, timedelta
 
 
+# Proprietes calculees a partir des vols : memorisees par instance,
+# pre-calculables en une requete par MemberQuerySet.with_flight_stats()
+FLIGHT_STATS = ('last_flight_date', 'landings_last_90_days', 'hours_last_12_months')
+
+# FCL.060 : atterrissages requis sur 90 jours (experience recente)
+RECENT_LANDINGS_REQUIRED = 3
+
+
+def is_valid_on(validity, today):
+    """Date de validite renseignee et non depassee."""
+    return bool(validity) and validity >= today
+
+
+def flight_privileges(medical_valid, sep_valid, club_subscription_valid, account_balance, landings_90_days):
+    """
+    Regles d'eligibilite au vol, communes au modele et au statut du scanner.
+
+    Returns:
+        (peut voler seul, peut emporter des passagers)
+    """
+    recent_experience = landings_90_days >= RECENT_LANDINGS_REQUIRED
+    can_fly_solo = (
+        medical_valid and
+        sep_valid and
+        club_subscription_valid and
+        account_balance > 0 and
+        recent_experience
+    )
+    # FCL.060 : 3 atterrissages en 90 jours, deja exiges pour voler seul
+    return can_fly_solo, can_fly_solo and recent_experience
+
+
+class MemberQuerySet(models.QuerySet):
+    def with_flight_stats(self, today=None):
+        """
+        Annote les statistiques de vol sous le nom des proprietes du modele :
+        les instances retournees n'executent plus aucune requete pour
+        last_flight_date, landings_last_90_days et hours_last_12_months.
+        """
+        today = today or date.today()
+        return self.annotate(
+            last_flight_date=Max('user__flights__date'),
+            landings_last_90_days=Sum(
+                'user__flights__landings_count',
+                filter=Q(user__flights__date__gte=today - timedelta(days=90)),
+                default=0,
+            ),
+            hours_last_12_months=Sum(
+                'user__flights__duration',
+                filter=Q(user__flights__date__gte=today - timedelta(days=365)),
+                default=0,
+            ),
+        )
+
+
 class Member(models.Model):
     """
     Profil pilote complet conforme aux standards EASA/DGAC/FFA.
@@ -135,39 +192,57 @@ class Member(models.Model):
     # ========== NOTES ==========
     notes = models.TextField("Notes internes", blank=True)
 
+    objects = MemberQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Membre"
         verbose_name_plural = "Membres"
         ordering = ['user__last_name', 'user__first_name']
+        indexes = [
+            # Alertes d'expiration du medical
+            models.Index(fields=['medical_validity'], name='members_medical_validity_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.last_name} {self.user.first_name} ({self.user.username})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.clear_flight_stats()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_flight_stats()
+
+    def clear_flight_stats(self):
+        """Oublie les statistiques de vol memorisees (recalcul au prochain acces)."""
+        for name in FLIGHT_STATS:
+            self.__dict__.pop(name, None)
+
     # ========== PROPRIETES CALCULEES ==========
-    @property
+    # Statistiques de vol : une requete au premier acces puis memorisees
+    # (ou annotees par with_flight_stats). Invalidees par save(),
+    # refresh_from_db() et les signaux de Flight.
+    @cached_property
     def last_flight_date(self):
         last_flight = self.user.flights.order_by('-date').first()
         return last_flight.date if last_flight else None
 
-    @property
+    @cached_property
     def landings_last_90_days(self):
-        from django.db.models import Sum
         cutoff = date.today() - timedelta(days=90)
         total = self.user.flights.filter(date__gte=cutoff).aggregate(Sum('landings_count'))['landings_count__sum']
         return total or 0
 
-    @property
+    @cached_property
     def hours_last_12_months(self):
-        from django.db.models import Sum
         cutoff = date.today() - timedelta(days=365)
         total = self.user.flights.filter(date__gte=cutoff).aggregate(Sum('duration'))['duration__sum']
         return total or 0
 
     @property
     def is_medical_valid(self):
-        if not self.medical_validity:
-            return False
-        return self.medical_validity >= date.today()
+        return is_valid_on(self.medical_validity, date.today())
 
     @property
     def is_license_valid(self):
@@ -179,42 +254,39 @@ class Member(models.Model):
     @property
     def is_sep_valid(self):
         """Verifie si la qualification SEP est valide."""
-        if not self.has_sep or not self.sep_validity:
-            return False
-        return self.sep_validity >= date.today()
+        return self.has_sep and is_valid_on(self.sep_validity, date.today())
 
     @property
     def is_club_subscription_valid(self):
-        if not self.club_subscription_validity:
-            return False
-        return self.club_subscription_validity >= date.today()
+        return is_valid_on(self.club_subscription_validity, date.today())
 
     @property
     def is_ffa_valid(self):
-        if not self.ffa_subscription_validity:
-            return False
-        return self.ffa_subscription_validity >= date.today()
+        return is_valid_on(self.ffa_subscription_validity, date.today())
+
+    def _flight_privileges(self):
+        return flight_privileges(
+            self.is_medical_valid,
+            self.is_sep_valid,
+            self.is_club_subscription_valid,
+            self.account_balance,
+            self.landings_last_90_days,
+        )
 
     @property
     def can_fly_solo(self):
         """Verifie si le pilote peut voler seul."""
-        return (
-            self.is_medical_valid and
-            self.is_sep_valid and
-            self.is_club_subscription_valid and
-            self.account_balance > 0 and
-            self.landings_last_90_days >= 3
-        )
+        return self._flight_privileges()[0]
 
     @property
     def can_carry_passengers(self):
         """Verifie si le pilote peut emporter des passagers (FCL.060)."""
-        return self.can_fly_solo and self.landings_last_90_days >= 3
+        return self._flight_privileges()[1]
 
     @property
     def needs_instructor_flight(self):
         """Verifie si un vol avec instructeur est requis (< 3 atterrissages)."""
-        return self.landings_last_90_days < 3
+        return self.landings_last_90_days < RECENT_LANDINGS_REQUIRED
 
     @property
     def full_name(self):
@@ -274,6 +346,9 @@ class MemberDocument(models.Model):
     document_type = models.CharField("Type de document", max_length=20, choices=DOCUMENT_TYPES)
     title = models.CharField("Titre", max_length=100)
     file = models.FileField("Fichier", upload_to='members/documents/%Y/%m/')
+    sha256 = models.CharField("Empreinte SHA-256", max_length=64, blank=True, db_index=True)
+    file_size = models.PositiveIntegerField("Taille (octets)", null=True, blank=True)
+    thumbnail = models.ImageField("Miniature", upload_to='members/documents/thumbs/', blank=True, null=True)
 
     # Dates
     issue_date = models.DateField("Date d'emission", null=True, blank=True)
@@ -302,6 +377,10 @@ class MemberDocument(models.Model):
         verbose_name = "Document membre"
         verbose_name_plural = "Documents membres"
         ordering = ['-upload_date']
+        indexes = [
+            # Document courant d'un type (depot, recalage des validites)
+            models.Index(fields=['member', 'document_type', 'is_current'], name='members_doc_current_idx'),
+        ]
 
     def __str__(self):
         return f"{self.member.user.last_name} - {self.get_document_type_display()} ({self.upload_date.strftime('%d/%m/%Y')})"
@@ -319,9 +398,20 @@ class MemberDocument(models.Model):
         delta = self.expiry_date - date.today()
         return delta.days
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_current = instance._current_key()
+        return instance
+
+    def _current_key(self):
+        values = self.__dict__
+        return (values.get('is_current'), values.get('member_id'), values.get('document_type'))
+
     def save(self, *args, **kwargs):
         # Marquer les anciens documents du meme type comme non courants
-        if self.is_current:
+        # (seulement si le document devient courant, pas a chaque sauvegarde)
+        if self.is_current and (self._state.adding or self._current_key() != getattr(self, '_saved_current', None)):
             MemberDocument.objects.filter(
                 member=self.member,
                 document_type=self.document_type,
@@ -333,6 +423,7 @@ class MemberDocument(models.Model):
             self.status = 'EXPIRED'
 
         super().save(*args, **kwargs)
+        self._saved_current = self._current_key()
 
 
 class QualificationType(models.Model):
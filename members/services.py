@@ -0,0 +1,298 @@
+"""
+Services du module members.
+
+QR codes : le rendu (qrcode + PIL + encodage PNG) est mis en cache sous
+l'empreinte du contenu encode. Tant que les champs encodes d'un membre ne
+changent pas, l'image est servie depuis le cache ; l'empreinte sert aussi
+d'ETag et de parametre de version de l'URL de l'image (cache navigateur longue
+duree).
+
+Le QR code ne contient qu'un jeton signe compact (id membre + date
+d'emission + HMAC). Le scanner verifie la signature sans acces a la base,
+puis lit le statut du membre dans un instantane d'eligibilite mis en cache.
+"""
+import base64
+import hashlib
+import hmac
+from datetime import date, timedelta
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+from core.cache import CacheNamespace
+from .models import RECENT_LANDINGS_REQUIRED, Member, flight_privileges, is_valid_on
+
+
+# ============================================================
+# QR CODES
+# ============================================================
+
+QR_CACHE = CacheNamespace('members.qr')
+QR_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 jours
+
+# Rendu par usage : 'full' (telechargement), 'card' (carte de membre)
+QR_STYLES = {
+    'full': {'box_size': 10, 'border': 4},
+    'card': {'box_size': 6, 'border': 2},
+}
+
+
+def member_qr_payload(member):
+    """Contenu encode dans le QR code d'un membre : son jeton signe."""
+    return make_member_token(member.id)
+
+
+def qr_digest(payload, style='full'):
+    """Empreinte du rendu (contenu + style) : cle de cache et ETag."""
+    return hashlib.sha256(f"{style}:{payload}".encode()).hexdigest()[:24]
+
+
+def render_qr_png(payload, style='full'):
+    """Genere l'image PNG d'un QR code (sans cache)."""
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        **QR_STYLES[style],
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def get_qr_png(payload, style='full'):
+    """
+    Image PNG du QR code, depuis le cache si deja rendue.
+
+    Returns:
+        (empreinte, octets PNG)
+    """
+    digest = qr_digest(payload, style)
+    png = QR_CACHE.get_or_set(digest, lambda: render_qr_png(payload, style), QR_CACHE_TIMEOUT)
+    return digest, png
+
+
+# ============================================================
+# JETON QR SIGNE
+# ============================================================
+# Format : AC1.<id membre>.<jour d'emission>.<signature>
+# - id et jour (depuis le 01/01/1970) en base 36,
+# - signature : HMAC-SHA256 tronque a 80 bits, en base 32.
+# Uniquement des caracteres du mode alphanumerique QR : ~30 caracteres,
+# soit un QR code version 2.
+
+TOKEN_PREFIX = 'AC1'
+TOKEN_SIGNATURE_LENGTH = 16
+TOKEN_SALT = 'members.qr_token'
+DEFAULT_TOKEN_MAX_AGE_DAYS = 400
+
+EPOCH = date(1970, 1, 1)
+BASE36 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _base36(number):
+    digits = ''
+    while True:
+        number, rest = divmod(number, 36)
+        digits = BASE36[rest] + digits
+        if not number:
+            return digits
+
+
+def _sign(message):
+    digest = salted_hmac(TOKEN_SALT, message, algorithm='sha256').digest()
+    return base64.b32encode(digest).decode()[:TOKEN_SIGNATURE_LENGTH]
+
+
+def make_member_token(member_id, issued=None):
+    """
+    Jeton signe d'un membre. La date d'emission est le premier jour du mois :
+    le jeton (donc l'image du QR code) change au plus une fois par mois.
+    """
+    issued = issued or date.today().replace(day=1)
+    message = f"{TOKEN_PREFIX}.{_base36(member_id)}.{_base36((issued - EPOCH).days)}"
+    return f"{message}.{_sign(message)}"
+
+
+def verify_member_token(token, max_age_days=None):
+    """
+    Verifie un jeton sans acces a la base.
+
+    Returns:
+        (id membre, date d'emission)
+
+    Raises:
+        InvalidToken: format, signature ou anciennete invalide
+    """
+    token = (token or '').strip().upper()
+    parts = token.split('.')
+    if len(parts) != 4 or parts[0] != TOKEN_PREFIX:
+        raise InvalidToken("Format de jeton invalide")
+
+    message, signature = token.rsplit('.', 1)
+    if not hmac.compare_digest(signature, _sign(message)):
+        raise InvalidToken("Signature invalide")
+
+    try:
+        member_id = int(parts[1], 36)
+        issued = EPOCH + timedelta(days=int(parts[2], 36))
+    except (ValueError, OverflowError):
+        raise InvalidToken("Format de jeton invalide")
+
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'MEMBER_QR_TOKEN_MAX_AGE_DAYS', DEFAULT_TOKEN_MAX_AGE_DAYS)
+    age = (date.today() - issued).days
+    if age > max_age_days or age < -1:
+        raise InvalidToken("Jeton expire")
+    return member_id, issued
+
+
+# ============================================================
+# INSTANTANE D'ELIGIBILITE (CACHE)
+# ============================================================
+# Statut d'un membre tel que presente au scanner. Invalide par signaux a
+# chaque modification du membre ou de ses vols, et recalcule chaque jour
+# (les validites et la fenetre de 90 jours dependent de la date).
+
+STATUS_CACHE = CacheNamespace('members.status')
+STATUS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class MemberStatusSnapshot:
+    """
+    Statut d'un membre a une date donnee, calcule une seule fois.
+
+    Les atterrissages sur 90 jours sont lus une fois (annotes par
+    member_status_queryset, sinon memorises par le modele) et toutes les
+    regles d'eligibilite et les avertissements s'appuient sur ces valeurs.
+    Les regles sont celles du modele (flight_privileges), evaluees a today.
+    """
+
+    def __init__(self, member, today=None):
+        self.member = member
+        self.today = today or date.today()
+
+        self.landings_90_days = member.landings_last_90_days
+
+        self.medical_valid = is_valid_on(member.medical_validity, self.today)
+        self.sep_valid = member.has_sep and is_valid_on(member.sep_validity, self.today)
+        self.club_subscription_valid = is_valid_on(member.club_subscription_validity, self.today)
+        self.ffa_valid = is_valid_on(member.ffa_subscription_validity, self.today)
+        self.account_balance = member.account_balance
+
+        self.recent_experience = self.landings_90_days >= RECENT_LANDINGS_REQUIRED
+        self.can_fly_solo, self.can_carry_passengers = flight_privileges(
+            self.medical_valid,
+            self.sep_valid,
+            self.club_subscription_valid,
+            self.account_balance,
+            self.landings_90_days,
+        )
+
+    @property
+    def warnings(self):
+        warnings = []
+
+        if not self.medical_valid:
+            warnings.append({'type': 'error', 'message': 'Medical expire ou manquant'})
+
+        if not self.sep_valid:
+            warnings.append({'type': 'error', 'message': 'Qualification SEP expiree'})
+
+        if not self.recent_experience:
+            warnings.append({
+                'type': 'warning',
+                'message': (
+                    f'Seulement {self.landings_90_days} atterrissages en 90 jours '
+                    f'({RECENT_LANDINGS_REQUIRED} requis)'
+                ),
+            })
+
+        if self.account_balance <= 0:
+            warnings.append({'type': 'error', 'message': 'Solde compte insuffisant'})
+        elif self.account_balance < 100:
+            warnings.append({'type': 'warning', 'message': f'Solde faible: {self.account_balance} EUR'})
+
+        if not self.club_subscription_valid:
+            warnings.append({'type': 'warning', 'message': 'Cotisation club expiree'})
+
+        if not self.ffa_valid:
+            warnings.append({'type': 'warning', 'message': 'Licence FFA expiree'})
+
+        return warnings
+
+    def as_dict(self):
+        member = self.member
+        return {
+            'id': member.id,
+            'name': member.full_name,
+            'member_number': member.member_number,
+            'license_type': member.license_type,
+            'can_fly_solo': self.can_fly_solo,
+            'can_carry_passengers': self.can_carry_passengers,
+            'medical_valid': self.medical_valid,
+            'medical_expiry': member.medical_validity.isoformat() if member.medical_validity else None,
+            'sep_valid': self.sep_valid,
+            'sep_expiry': member.sep_validity.isoformat() if member.sep_validity else None,
+            'landings_90_days': self.landings_90_days,
+            'account_balance': float(self.account_balance),
+            'qualifications': member.qualifications_list,
+        }
+
+
+def member_status_queryset(today=None):
+    """
+    Membres avec utilisateur et atterrissages sur 90 jours annotes :
+    un scan = une seule requete.
+    """
+    return Member.objects.select_related('user').with_flight_stats(today)
+
+
+def build_member_status(member):
+    """Statut complet d'un membre (donnees renvoyees au scanner)."""
+    snapshot = MemberStatusSnapshot(member)
+    return {
+        'as_of': snapshot.today.isoformat(),
+        'member': snapshot.as_dict(),
+        'warnings': snapshot.warnings,
+    }
+
+
+def get_member_status(member_id):
+    """
+    Instantane d'eligibilite depuis le cache, recalcule si absent ou date
+    d'hier.
+
+    Returns:
+        (statut ou None si membre inconnu, True si lu depuis le cache)
+    """
+    status = STATUS_CACHE.get(member_id)
+    if status is not None and status['as_of'] == date.today().isoformat():
+        return status, True
+
+    try:
+        member = member_status_queryset().get(pk=member_id)
+    except Member.DoesNotExist:
+        return None, False
+
+    status = build_member_status(member)
+    STATUS_CACHE.set(member_id, status, STATUS_CACHE_TIMEOUT)
+    return status, False
+
+
+def invalidate_member_status(*member_ids):
+    STATUS_CACHE.delete_many(member_ids)
+
+
+def get_member_warnings(member):
+    """Genere les avertissements pour un membre."""
+    return MemberStatusSnapshot(member).warnings
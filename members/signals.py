@@ -0,0 +1,27 @@
+"""
+Invalidation de l'instantane d'eligibilite des membres (scanner QR) et des
+statistiques de vol memorisees sur les instances Member.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from django.dispatch import receiver
+
+from fleet.models import Flight
+from .models import Member
+from .services import invalidate_member_status
+
+
+@receiver(post_save, sender=Member)
+def member_changed(sender, instance, **kwargs):
+    invalidate_member_status(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Flight)
+def flight_changed(sender, instance, **kwargs):
+    # Statistiques memorisees sur le profil deja charge du pilote
+    if Flight.pilot.is_cached(instance) and User.member_profile.is_cached(instance.pilot):
+        instance.pilot.member_profile.clear_flight_stats()
+
+    # Atterrissages sur 90 jours du pilote
+    member_ids = Member.objects.filter(user_id=instance.pilot_id).values_list('id', flat=True)
+    invalidate_member_status(*member_ids)
@@ -0,0 +1,34 @@
+"""
+Taches Celery des membres (planifiees dans aeroclub_project/celery.py).
+"""
+import logging
+
+from celery import shared_task
+
+from core.tasks import single_instance
+from .documents import generate_thumbnail, sweep_documents
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+@single_instance('members:expire_documents', timeout=30 * 60)
+def expire_documents():
+    """Expiration nocturne des documents (voir members.documents.sweep_documents)."""
+    return sweep_documents()
+
+
+# Relancee si le stockage est indisponible ; acks_late : une tache perdue
+# avec son worker (arret, recyclage) est redistribuee
+@shared_task(autoretry_for=(OSError,), retry_backoff=30, max_retries=5, acks_late=True)
+def generate_document_thumbnail(document_id):
+    """Miniature d'un document image depose (voir members.documents.generate_thumbnail)."""
+    from PIL import UnidentifiedImageError
+
+    try:
+        return generate_thumbnail(document_id)
+    except UnidentifiedImageError:
+        # Fichier illisible : inutile de relancer
+        logger.warning("Document %s : image illisible, pas de miniature", document_id)
+        return None
@@ -1,3 +1,180 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from alerts.models import Alert
+from alerts.services import check_member_medical_alerts
+from .documents import DocumentRejected, ingest_document, sweep_documents
+from .models import Member, MemberDocument
+from .services import InvalidToken, MemberStatusSnapshot, make_member_token, verify_member_token
+from .tasks import generate_document_thumbnail
+
+
+# ============================================================
+# SCAN PAR IDENTIFIANT
+# ============================================================
+
+class ScanMemberTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote')
+        cls.member = Member.objects.create(user=cls.pilot)
+        cls.url = reverse('scan_member', args=[cls.member.id])
+
+    def test_anonymous_and_members_cannot_enumerate(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(self.pilot)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_staff_can_scan(self):
+        self.client.force_login(User.objects.create_user('accueil', is_staff=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+
+
+# ============================================================
+# JETON SIGNE DU QR CODE
+# ============================================================
+
+class MemberTokenTests(SimpleTestCase):
+    def test_round_trip(self):
+        issued = date.today().replace(day=1)
+        self.assertEqual(verify_member_token(make_member_token(1234, issued).lower()), (1234, issued))
+
+    def test_tampered_or_expired_tokens_are_refused(self):
+        token = make_member_token(1234)
+        prefix, member, issued, signature = token.split('.')
+        forged = '.'.join((prefix, '1', issued, signature))
+        old = make_member_token(1234, date.today() - timedelta(days=30))
+        for value in (forged, token[:-1], 'abc', ''):
+            with self.subTest(value=value), self.assertRaises(InvalidToken):
+                verify_member_token(value)
+        with self.assertRaises(InvalidToken):
+            verify_member_token(old, max_age_days=7)
+
+
+# ============================================================
+# REGLES D'ELIGIBILITE
+# ============================================================
+
+class FlightPrivilegesTests(SimpleTestCase):
+    def test_snapshot_and_model_agree(self):
+        today = date.today()
+        valid, expired = today + timedelta(days=30), today - timedelta(days=1)
+        cases = product((valid, expired, None), (True, False), (valid, expired), (Decimal('50'), Decimal('0')), (0, 3))
+        for medical, has_sep, subscription, balance, landings in cases:
+            member = Member(
+                medical_validity=medical, has_sep=has_sep, sep_validity=valid,
+                club_subscription_validity=subscription, account_balance=balance,
+            )
+            member.landings_last_90_days = landings
+            snapshot = MemberStatusSnapshot(member, today)
+            with self.subTest(medical=medical, sep=has_sep, subscription=subscription, balance=balance, landings=landings):
+                self.assertEqual(snapshot.can_fly_solo, member.can_fly_solo)
+                self.assertEqual(snapshot.can_carry_passengers, member.can_carry_passengers)
+
+        member = Member(
+            medical_validity=valid, has_sep=True, sep_validity=valid,
+            club_subscription_validity=valid, account_balance=Decimal('50'),
+        )
+        member.landings_last_90_days = 3
+        self.assertTrue(member.can_fly_solo and member.can_carry_passengers)
+
+
+# ============================================================
+# ALERTES D'EXPIRATION DES DOCUMENTS
+# ============================================================
+
+class ExpiryAlertsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote')
+        yesterday = date.today() - timedelta(days=1)
+        cls.member = Member.objects.create(user=cls.pilot, medical_validity=yesterday)
+        # Valides mais echus, en attente du balayage (save() les passerait en EXPIRED)
+        MemberDocument.objects.bulk_create(
+            MemberDocument(
+                member=cls.member, document_type=document_type, title=document_type,
+                file='members/documents/doc.pdf', status='VALID', expiry_date=yesterday,
+            )
+            for document_type in ('MEDICAL', 'INSURANCE')
+        )
+
+    def test_medical_alert_is_not_duplicated(self):
+        self.assertEqual(check_member_medical_alerts(), 1)
+        self.assertEqual(sweep_documents()['alerts'], 1)
+        self.assertEqual(
+            sorted(Alert.objects.filter(user=self.pilot).values_list('alert_type', flat=True)),
+            ['INSURANCE', 'MEDICAL'],
+        )
+        self.assertEqual(check_member_medical_alerts(), 0)
+
+    def test_count_only_new_alerts(self):
+        self.assertEqual(sweep_documents()['alerts'], 2)
+        MemberDocument.objects.update(status='VALID')
+        self.assertEqual(sweep_documents()['alerts'], 0)
+        self.assertEqual(Alert.objects.filter(user=self.pilot).count(), 2)
+
+
+# ============================================================
+# DEPOT DE DOCUMENTS
+# ============================================================
+
+def png_upload(name='scan.png', color='red'):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class DocumentUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pilot = User.objects.create_user('pilote')
+        cls.member = Member.objects.create(user=cls.pilot)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ('2026-02-30', '30/02/2026', 'demain'):
+            with self.subTest(value=value), self.assertRaises(DocumentRejected):
+                ingest_document(self.member, 'MEDICAL', png_upload(), expiry_date=value)
+        self.assertFalse(MemberDocument.objects.exists())
+
+    def test_invalid_date_is_a_form_error(self):
+        self.client.force_login(self.pilot)
+        response = self.client.post(reverse('upload_document'), {
+            'document_type': 'MEDICAL', 'file': png_upload(), 'expiry_date': '2026-02-30',
+        })
+        self.assertRedirects(response, reverse('documents'), fetch_redirect_response=False)
+        self.assertIn('invalide', str(list(get_messages(response.wsgi_request))[0]))
+
+    def test_thumbnail_is_built_by_the_task_after_commit(self):
+        # Taches executees dans le processus (CELERY_TASK_ALWAYS_EAGER avec locmem)
+        with mock.patch.object(generate_document_thumbnail, 'delay', wraps=generate_document_thumbnail.delay) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                doc = ingest_document(self.member, 'MEDICAL', png_upload(), expiry_date='2027-01-31')
+        delay.assert_called_once_with(doc.pk)
+        doc.refresh_from_db()
+        self.assertTrue(doc.thumbnail.name.endswith('.jpg'))
+        self.assertEqual(self.member.medical_validity, date(2027, 1, 31))
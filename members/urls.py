@@ -11,4 +11,5 @@ urlpatterns = [
     path('qrcode/', views.member_qrcode, name='member_qrcode'),
     path('card/', views.member_card, name='member_card'),
     path('api/scan/<int:member_id>/', views.scan_member, name='scan_member'),
+    path('api/scan/token/<str:token>/', views.scan_token, name='scan_token'),
 ]
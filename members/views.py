@@ -1,12 +1,15 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
 from .models import Member, MemberDocument
-import qrcode
-from io import BytesIO
-import base64
-import json
+from .documents import ingest_document, DocumentRejected
+from .services import (
+    member_qr_payload, qr_digest, get_qr_png,
+    verify_member_token, InvalidToken, build_member_status, get_member_status,
+    member_status_queryset,
+)
 
 
 @login_required
@@ -68,55 +71,25 @@ def upload_document(request):
         messages.error(request, "Profil membre non trouve.")
         return redirect('home')
 
-    document_type = request.POST.get('document_type')
-    title = request.POST.get('title', '')
     file = request.FILES.get('file')
-    issue_date = request.POST.get('issue_date') or None
-    expiry_date = request.POST.get('expiry_date') or None
-
     if not file:
         messages.error(request, "Veuillez selectionner un fichier.")
         return redirect('documents')
 
-    if not document_type:
-        messages.error(request, "Veuillez selectionner un type de document.")
+    try:
+        doc = ingest_document(
+            member,
+            request.POST.get('document_type'),
+            file,
+            title=request.POST.get('title', ''),
+            issue_date=request.POST.get('issue_date') or None,
+            expiry_date=request.POST.get('expiry_date') or None,
+        )
+    except DocumentRejected as e:
+        messages.error(request, str(e))
         return redirect('documents')
 
-    # Generer un titre par defaut si non fourni
-    if not title:
-        for code, label in MemberDocument.DOCUMENT_TYPES:
-            if code == document_type:
-                title = label
-                break
-
-    # Creer le document
-    doc = MemberDocument.objects.create(
-        member=member,
-        document_type=document_type,
-        title=title,
-        file=file,
-        issue_date=issue_date,
-        expiry_date=expiry_date,
-        status='PENDING',
-        is_current=True,
-    )
-
-    # Mettre a jour les dates sur le profil membre si pertinent
-    if expiry_date:
-        if document_type == 'MEDICAL':
-            member.medical_validity = expiry_date
-            member.save()
-        elif document_type == 'FFA':
-            member.ffa_subscription_validity = expiry_date
-            member.save()
-        elif document_type == 'INSURANCE':
-            member.insurance_validity = expiry_date
-            member.save()
-        elif document_type == 'CLUB':
-            member.club_subscription_validity = expiry_date
-            member.save()
-
-    messages.success(request, f"Document '{title}' uploade avec succes. En attente de validation.")
+    messages.success(request, f"Document '{doc.title}' uploade avec succes. En attente de validation.")
     return redirect('documents')
 
 
@@ -167,41 +140,34 @@ def document_status_api(request):
 
 @login_required
 def member_qrcode(request):
-    """Genere un QR code pour identification rapide du membre."""
+    """
+    QR code d'identification rapide du membre (image PNG).
+    ?style=card pour le format carte de membre, ?v=<empreinte> pour une URL
+    versionnee mise en cache longue duree par le navigateur.
+    """
     try:
         member = request.user.member_profile
     except Member.DoesNotExist:
         return HttpResponse("Profil non trouve", status=404)
 
-    # Donnees a encoder dans le QR code
-    qr_data = {
-        'id': member.id,
-        'member_number': member.member_number or '',
-        'name': member.full_name,
-        'license': member.license_type,
-        'can_fly': member.can_fly_solo,
-        'medical_valid': member.is_medical_valid,
-        'sep_valid': member.is_sep_valid,
-    }
-
-    # Generer le QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(json.dumps(qr_data))
-    qr.make(fit=True)
+    style = 'card' if request.GET.get('style') == 'card' else 'full'
+    payload = member_qr_payload(member)
+    digest = qr_digest(payload, style)
+    etag = f'"{digest}"'
 
-    img = qr.make_image(fill_color="black", back_color="white")
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        digest, png = get_qr_png(payload, style)
+        response = HttpResponse(png, content_type='image/png')
 
-    # Retourner l'image
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-
-    return HttpResponse(buffer.getvalue(), content_type='image/png')
+    response['ETag'] = etag
+    if request.GET.get('v') == digest:
+        # L'URL change avec le contenu : l'image peut etre gardee indefiniment
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @login_required
@@ -213,86 +179,56 @@ def member_card(request):
         messages.error(request, "Profil membre non trouve.")
         return redirect('home')
 
-    # Generer le QR code en base64 pour inclusion dans le HTML
-    qr_data = {
-        'id': member.id,
-        'member_number': member.member_number or '',
-        'name': member.full_name,
-    }
-
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=6,
-        border=2,
-    )
-    qr.add_data(json.dumps(qr_data))
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    # Image servie par member_qrcode, URL versionnee par l'empreinte du contenu
+    qr_version = qr_digest(member_qr_payload(member), 'card')
 
     return render(request, 'members/card.html', {
         'member': member,
-        'qr_base64': qr_base64,
+        'qr_version': qr_version,
     })
 
 
+@staff_member_required
 def scan_member(request, member_id):
-    """API pour scanner un membre (verification rapide)."""
+    """
+    API pour scanner un membre par son identifiant (verification rapide).
+
+    Reservee au staff : les identifiants se suivent, un acces public
+    permettrait de parcourir les statuts de tous les membres. Les scanners
+    publics utilisent le jeton signe du QR code (scan_token).
+    """
     try:
-        member = Member.objects.get(pk=member_id)
+        member = member_status_queryset().get(pk=member_id)
     except Member.DoesNotExist:
         return JsonResponse({'error': 'Membre non trouve'}, status=404)
 
+    status = build_member_status(member)
     return JsonResponse({
         'success': True,
-        'member': {
-            'id': member.id,
-            'name': member.full_name,
-            'member_number': member.member_number,
-            'license_type': member.license_type,
-            'can_fly_solo': member.can_fly_solo,
-            'can_carry_passengers': member.can_carry_passengers,
-            'medical_valid': member.is_medical_valid,
-            'medical_expiry': member.medical_validity.isoformat() if member.medical_validity else None,
-            'sep_valid': member.is_sep_valid,
-            'sep_expiry': member.sep_validity.isoformat() if member.sep_validity else None,
-            'landings_90_days': member.landings_last_90_days,
-            'account_balance': float(member.account_balance),
-            'qualifications': member.qualifications_list,
-        },
-        'warnings': get_member_warnings(member),
+        'member': status['member'],
+        'warnings': status['warnings'],
     })
 
 
-def get_member_warnings(member):
-    """Genere les avertissements pour un membre."""
-    warnings = []
-
-    if not member.is_medical_valid:
-        warnings.append({'type': 'error', 'message': 'Medical expire ou manquant'})
-
-    if not member.is_sep_valid:
-        warnings.append({'type': 'error', 'message': 'Qualification SEP expiree'})
-
-    if member.landings_last_90_days < 3:
-        warnings.append({
-            'type': 'warning',
-            'message': f'Seulement {member.landings_last_90_days} atterrissages en 90 jours (3 requis)'
-        })
-
-    if member.account_balance <= 0:
-        warnings.append({'type': 'error', 'message': 'Solde compte insuffisant'})
-    elif member.account_balance < 100:
-        warnings.append({'type': 'warning', 'message': f'Solde faible: {member.account_balance} EUR'})
-
-    if not member.is_club_subscription_valid:
-        warnings.append({'type': 'warning', 'message': 'Cotisation club expiree'})
+def scan_token(request, token):
+    """
+    API scanner : verifie le jeton signe du QR code (sans acces a la base)
+    puis renvoie l'instantane d'eligibilite du membre (cache).
+    """
+    try:
+        member_id, issued = verify_member_token(token)
+    except InvalidToken as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-    if not member.is_ffa_valid:
-        warnings.append({'type': 'warning', 'message': 'Licence FFA expiree'})
+    status, cached = get_member_status(member_id)
+    if status is None:
+        return JsonResponse({'success': False, 'error': 'Membre non trouve'}, status=404)
 
-    return warnings
+    return JsonResponse({
+        'success': True,
+        'token_issued': issued.isoformat(),
+        'as_of': status['as_of'],
+        'cached': cached,
+        'member': status['member'],
+        'warnings': status['warnings'],
+    })
@@ -4,10 +4,11 @@ Utilise l'API Aviation Weather Center (AWC) de la NOAA.
 """
 import requests
 from datetime import datetime, timedelta
-from django.core.cache import cache
 import xml.etree.ElementTree as ET
 import re
 
+from core.cache import CacheNamespace
+
 
 # URL de l'API AWC NOAA (gratuit, pas de cle API requise)
 AWC_METAR_URL = "https://aviationweather.gov/api/data/metar"
@@ -17,6 +18,8 @@ AWC_TAF_URL = "https://aviationweather.gov/api/data/taf"
 METAR_CACHE_DURATION = 300  # 5 minutes
 TAF_CACHE_DURATION = 1800   # 30 minutes
 
+METEO_CACHE = CacheNamespace('meteo')
+
 
 def get_metar(icao_code):
     """
@@ -28,14 +31,12 @@ def get_metar(icao_code):
     Returns:
         dict avec les donnees METAR ou None si erreur
     """
-    icao_code = icao_code.upper().strip()
-    cache_key = f"metar_{icao_code}"
+    return fetch_metar(icao_code.upper().strip())
 
-    # Verifier le cache
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
 
+@METEO_CACHE.cached('metar:{icao_code}', ttl=METAR_CACHE_DURATION)
+def fetch_metar(icao_code):
+    """Appel AWC (un seul appel simultane par aeroport, resultat en cache)."""
     try:
         response = requests.get(
             AWC_METAR_URL,
@@ -52,9 +53,7 @@ def get_metar(icao_code):
         data = response.json()
         if data and len(data) > 0:
             metar_data = data[0]
-            result = parse_metar_json(metar_data)
-            cache.set(cache_key, result, METAR_CACHE_DURATION)
-            return result
+            return parse_metar_json(metar_data)
 
         return None
 
@@ -73,14 +72,12 @@ def get_taf(icao_code):
     Returns:
         dict avec les donnees TAF ou None si erreur
     """
-    icao_code = icao_code.upper().strip()
-    cache_key = f"taf_{icao_code}"
+    return fetch_taf(icao_code.upper().strip())
 
-    # Verifier le cache
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
 
+@METEO_CACHE.cached('taf:{icao_code}', ttl=TAF_CACHE_DURATION)
+def fetch_taf(icao_code):
+    """Appel AWC (un seul appel simultane par aeroport, resultat en cache)."""
     try:
         response = requests.get(
             AWC_TAF_URL,
@@ -95,9 +92,7 @@ def get_taf(icao_code):
         data = response.json()
         if data and len(data) > 0:
             taf_data = data[0]
-            result = parse_taf_json(taf_data)
-            cache.set(cache_key, result, TAF_CACHE_DURATION)
-            return result
+            return parse_taf_json(taf_data)
 
         return None
 
@@ -0,0 +1,41 @@
+"""
+Taches Celery meteo : prechargement des METAR / TAF des aerodromes du club
+pour que les pages meteo n'attendent jamais l'API AWC.
+"""
+import requests
+from celery import shared_task
+from django.conf import settings
+
+from core.tasks import single_instance
+from core.weather_service import RAW_METAR_CACHE_DURATION, WEATHER_CACHE, WeatherService
+from .services import METAR_CACHE_DURATION, METEO_CACHE, fetch_metar, fetch_taf
+
+
+@shared_task
+@single_instance('meteo:prefetch', timeout=2 * 60)
+def prefetch_weather(stations=None):
+    """
+    Rafraichit le METAR (remplace la valeur en cache, avant son expiration)
+    et le TAF (recalcule seulement s'il a expire) de chaque aerodrome.
+
+    Returns:
+        dict {icao: True si METAR disponible}
+    """
+    stations = stations or settings.WEATHER_PREFETCH_STATIONS
+    refreshed = {}
+    for icao in stations:
+        icao = icao.upper()
+        metar = fetch_metar.uncached(icao)
+        if metar is not None:
+            METEO_CACHE.set(f"metar:{icao}", metar, METAR_CACHE_DURATION)
+        fetch_taf(icao)
+
+        try:
+            raw = WeatherService._fetch_metar(icao)
+        except requests.RequestException:
+            raw = None
+        if raw is not None:
+            WEATHER_CACHE.set(f"metar:{icao}", raw, RAW_METAR_CACHE_DURATION)
+
+        refreshed[icao] = metar is not None
+    return refreshed
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0005_flight_query_indexes'),
+        ('planning', '0003_alter_reservation_options_reservation_destination_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['aircraft', 'start_time', 'end_time'], name='planning_res_aircraft_time_idx'),
+        ),
+    ]
@@ -64,6 +64,10 @@ class Reservation(models.Model):
         verbose_name = "Reservation"
         verbose_name_plural = "Reservations"
         ordering = ['-start_time']
+        indexes = [
+            # Detection des chevauchements et planning d'un aeronef
+            models.Index(fields=['aircraft', 'start_time', 'end_time'], name='planning_res_aircraft_time_idx'),
+        ]
 
     def clean(self):
         """Valide la reservation et verifie l'eligibilite du pilote."""
@@ -4,6 +4,7 @@ from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from .models import Reservation
+from fleet.forecast import get_next_deadlines, next_deadlines
 from fleet.models import Aircraft
 from members.models import Member
 import json
@@ -14,12 +15,16 @@ from .services import check_reservation_compliance
 @login_required
 def calendar_view(request):
     """Affiche le calendrier principal"""
-    aircrafts = Aircraft.objects.filter(status__in=['AVAILABLE', 'MAINTENANCE'])
+    aircrafts = list(Aircraft.objects.filter(status__in=['AVAILABLE', 'MAINTENANCE']))
+    # Prochaine échéance de maintenance (date calendaire ou estimée)
+    upcoming = get_next_deadlines()
+    for aircraft in aircrafts:
+        aircraft.upcoming_maintenance = upcoming.get(aircraft.id)
     return render(request, 'planning/calendrier.html', {'aircrafts': aircrafts})
 
 def events_api(request):
     """Renvoie les réservations au format JSON pour FullCalendar"""
-    reservations = Reservation.objects.all()
+    reservations = Reservation.objects.select_related('aircraft', 'user')
     events = []
     
     colors = {
@@ -96,7 +101,22 @@ def create_reservation(request):
             end_time=end_time,
             title=f"Vol {request.user.last_name}"
         )
-        
+
+        # Échéance de maintenance prévue avant le vol : réservation acceptée
+        # mais signalée (la date d'une butée horaire n'est qu'une estimation).
+        # Prévision de cet avion seul : la réservation vient d'effacer son
+        # entrée du cache
+        upcoming = next_deadlines([aircraft.id]).get(aircraft.id)
+        end_day = (timezone.localtime(end_time) if timezone.is_aware(end_time) else end_time).date()
+        if upcoming and upcoming['due_date'] <= end_day:
+            return JsonResponse({
+                'success': True,
+                'warning': (
+                    f"Maintenance « {upcoming['deadline'].title} » prévue vers le "
+                    f"{upcoming['due_date'].strftime('%d/%m/%Y')} : l'avion risque d'être indisponible."
+                ),
+            })
+
         return JsonResponse({'success': True})
         
     except Exception as e:
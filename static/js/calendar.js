@@ -68,6 +68,9 @@ window.submitReservation = function () {
             if (data.success) {
                 closeModal();
                 calendar.refetchEvents(); // Refresh calendar
+                if (data.warning) {
+                    alert(data.warning); // Maintenance prevue avant le vol
+                }
             } else {
                 const errorDiv = document.getElementById('errorMessage');
                 errorDiv.textContent = data.error;